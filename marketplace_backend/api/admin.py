@@ -90,9 +90,10 @@ class ProductAdmin(admin.ModelAdmin):
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ("id", "name", "seller", "icon", "created_at")
+    list_display = ("id", "name", "slug", "seller", "parent", "icon", "created_at")
     search_fields = ("name", "seller__business_name")
     list_filter = ("seller",)
+    readonly_fields = ("slug",)
 
 @admin.register(ProductLike)
 class ProductLikeAdmin(admin.ModelAdmin):
@@ -4,3 +4,20 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+
+        from marketplace_backend.db import configure_sqlite
+
+        from . import checks, signals  # noqa: F401
+
+        connection_created.connect(configure_sqlite, dispatch_uid="sqlite_pragmas")
+
+        if settings.SUGGEST_WARM_ON_STARTUP:
+            from django.core.signals import request_started
+
+            from .suggest import warm_on_first_request
+
+            request_started.connect(warm_on_first_request, dispatch_uid="suggest_warm_index")
@@ -0,0 +1,19 @@
+# api/benchmarks/__init__.py
+"""
+Benchmark / load-test suite ya API na WebSocket.
+
+- seed.py      : data generator (deterministic kwa --seed): sellers + Location,
+                 products, likes, orders, conversations, messages.
+- scenarios.py : scenarios za kupima (nearby, inbox, message + WS fan-out,
+                 order create).
+- report.py    : p50/p95/p99, queries kwa request, baseline JSON + compare.
+- query_counts.py : kikomo cha queries kwa kila action ya viewsets
+                 (`python manage.py check_query_counts`).
+- writers.py   : throughput chini ya writers wengi kwa wakati mmoja
+                 (`python manage.py bench_db_writers`).
+- stock.py     : buyers wengi wanaagiza product moja – hakuna oversell
+                 (`python manage.py stress_orders`).
+
+Inaendeshwa na `python manage.py bench_api` kwenye test database ya muda
+(DB yako haiguswi).
+"""
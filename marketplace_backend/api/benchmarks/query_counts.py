@@ -0,0 +1,543 @@
+# api/benchmarks/query_counts.py
+"""
+Query-count regression checks kwa kila action ya viewsets kuu.
+
+Kila `Case` ni request moja halisi (APIClient, middleware stack nzima) kwa
+role fulani (anon / buyer / seller) pamoja na `max_queries` – kikomo cha juu
+kinachoruhusiwa. `check_query_counts` inaendesha cases zote kwenye scales
+mbili (default small + medium): idadi ya queries lazima
+- isizidi max_queries, na
+- isiongezeke scale ikiongezeka (N+1 => inakua na idadi ya rows).
+
+StreamingJSONResponse (GET /api/products/ bila lat/lng) ina prefetch moja kwa
+kila chunk ya PRODUCT_STREAM_CHUNK_SIZE rows – hilo ni makusudi (memory
+isikue), kwa hiyo cases za aina hiyo zina `per_chunk` na kikomo kinapimwa
+baada ya kutoa queries za chunks.
+
+Kila case inaendeshwa ndani ya transaction inayorudishwa nyuma (rollback),
+kwa hiyo create/update/destroy hazibadilishi data ya cases zinazofuata.
+Hooks za `transaction.on_commit` (suggest index, FTS n.k.) hazihesabiwi.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ..models import (
+    Conversation,
+    Favorite,
+    Message,
+    Notification,
+    Order,
+    Product,
+    ProductLike,
+    SellerProfile,
+)
+from .seed import CITIES, Dataset
+
+ANON, BUYER, SELLER = "anon", "buyer", "seller"
+
+
+@dataclass
+class Fixtures:
+    """
+    Ids zinazotumiwa na cases (zinachaguliwa kwa utaratibu ule ule kwenye
+    kila scale ili matokeo yalinganishwe).
+    """
+
+    buyer: int
+    seller_user: int
+    seller: int
+    product: int
+    unordered_product: int
+    unliked_product: int
+    conversation: int
+    message: int
+    order: int
+    notification: int
+    favorite: int
+    unfavorited_seller: int
+    like: int
+    cart: Tuple[int, ...] = ()  # products za sellers wawili (checkout)
+    lat: float = CITIES[0][1]
+    lng: float = CITIES[0][2]
+
+    def as_dict(self) -> Dict[str, object]:
+        return dict(self.__dict__)
+
+
+def build_fixtures(dataset: Dataset) -> Fixtures:
+    buyer = dataset.buyer_ids[0]
+    conversation = (
+        Conversation.objects.filter(buyer_id=buyer)
+        .select_related("seller")
+        .order_by("id")
+        .first()
+    )
+    seller = conversation.seller
+    products = Product.objects.filter(seller=seller, is_active=True).order_by("id")
+    liked = ProductLike.objects.filter(user_id=buyer).values("product_id")
+    favorited = Favorite.objects.filter(user_id=buyer).values("seller_id")
+
+    message = (
+        Message.objects.filter(conversation=conversation, sender_id=seller.user_id)
+        .order_by("id")
+        .first()
+    )
+    # mark_read ipite njia ya "unread" (save + participant state)
+    Message.objects.filter(pk=message.pk).update(is_read=False)
+
+    # set_status (buyer anacancel) inahitaji order inayoshikilia stock
+    order = Order.objects.filter(buyer_id=buyer).order_by("id").first()
+    Order.objects.filter(pk=order.pk).update(status=Order.STATUS_PENDING)
+
+    return Fixtures(
+        buyer=buyer,
+        seller_user=seller.user_id,
+        seller=seller.id,
+        product=products.filter(stock_quantity__gte=10).first().id,
+        # Order.product ni PROTECT – destroy inahitaji product isiyo na orders
+        unordered_product=products.filter(orders__isnull=True).first().id,
+        unliked_product=products.exclude(id__in=liked).first().id,
+        conversation=conversation.id,
+        message=message.id,
+        order=order.id,
+        notification=Notification.objects.filter(user_id=buyer).order_by("id").first().id,
+        favorite=Favorite.objects.filter(user_id=buyer).order_by("id").first().id,
+        unfavorited_seller=SellerProfile.objects.exclude(id__in=favorited)
+        .exclude(id=seller.id)
+        .order_by("id")
+        .first()
+        .id,
+        like=ProductLike.objects.filter(user_id=buyer).order_by("id").first().id,
+        cart=tuple(
+            products.filter(stock_quantity__gte=10).values_list("id", flat=True)[:2]
+        )
+        + tuple(
+            Product.objects.filter(is_active=True, stock_quantity__gte=10)
+            .exclude(seller=seller)
+            .order_by("id")
+            .values_list("id", flat=True)[:2]
+        ),
+    )
+
+
+@dataclass(frozen=True)
+class Case:
+    viewset: str
+    action: str
+    role: str
+    method: str
+    path: str  # format string juu ya Fixtures, mf. "/api/products/{product}/"
+    max_queries: int
+    body: Optional[Callable[[Fixtures], dict]] = None
+    expect: Tuple[int, ...] = (200,)
+    per_chunk: int = 0  # queries za ziada kwa kila chunk ya streaming
+    variant: str = ""
+
+    @property
+    def name(self) -> str:
+        who = f"{self.role}, {self.variant}" if self.variant else self.role
+        return f"{self.viewset}.{self.action} ({who})"
+
+
+@dataclass
+class CaseResult:
+    case: Case
+    queries: int
+    status: int
+    chunks: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def bounded(self) -> int:
+        """
+        Queries zinazolinganishwa na max_queries (bila zile za chunks).
+        """
+        return self.queries - self.case.per_chunk * self.chunks
+
+
+def _user_id(role: str, fx: Fixtures) -> Optional[int]:
+    return {ANON: None, BUYER: fx.buyer, SELLER: fx.seller_user}[role]
+
+
+def run_case(case: Case, fx: Fixtures) -> CaseResult:
+    client = APIClient()
+    user_id = _user_id(case.role, fx)
+    if user_id:
+        # user mpya kwa kila case – cache za relations (seller_profile,
+        # profile) zisihamie case nyingine
+        client.force_authenticate(User.objects.get(pk=user_id))
+
+    path = case.path.format(**fx.as_dict())
+    body = case.body(fx) if case.body else None
+    call = getattr(client, case.method.lower())
+
+    content = b""
+    try:
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as captured:
+                if body is None:
+                    response = call(path)
+                else:
+                    response = call(path, body, format="json")
+                if response.streaming:
+                    content = b"".join(response.streaming_content)
+            transaction.set_rollback(True)
+    except Exception as exc:
+        return CaseResult(case, len(captured), 500, errors=[f"{type(exc).__name__}: {exc}"])
+
+    result = CaseResult(case, len(captured), response.status_code)
+    if case.per_chunk and content:
+        rows = len(json.loads(content))
+        result.chunks = math.ceil(rows / settings.PRODUCT_STREAM_CHUNK_SIZE)
+    if response.status_code not in case.expect:
+        result.errors.append(f"status {response.status_code} (expected {case.expect})")
+    if result.bounded > case.max_queries:
+        result.errors.append(f"{result.bounded} queries > max {case.max_queries}")
+    return result
+
+
+def run_cases(cases: List[Case], fx: Fixtures) -> List[CaseResult]:
+    return [run_case(case, fx) for case in cases]
+
+
+# =========================
+#  CASES
+# =========================
+
+CASES: List[Case] = [
+    # ---------- products ----------
+    Case("products", "list", ANON, "GET", "/api/products/", 1, per_chunk=1),
+    Case(
+        "products",
+        "list",
+        BUYER,
+        "GET",
+        "/api/products/?lat={lat}&lng={lng}",
+        2,
+        variant="lat/lng",
+    ),
+    Case("products", "retrieve", BUYER, "GET", "/api/products/{product}/", 2),
+    Case("products", "nearby", ANON, "GET", "/api/products/nearby/?lat={lat}&lng={lng}", 2),
+    Case(
+        "products",
+        "search_nearby",
+        BUYER,
+        "POST",
+        "/api/products/search_nearby/",
+        2,
+        body=lambda fx: {"latitude": fx.lat, "longitude": fx.lng, "sort_by": "price"},
+    ),
+    Case("products", "mine", SELLER, "GET", "/api/products/mine/", 4),
+    Case(
+        "products",
+        "create",
+        SELLER,
+        "POST",
+        "/api/products/",
+        8,
+        body=lambda fx: {
+            "name": "Query count product",
+            "description": "bench",
+            "price": "1500.00",
+            "stock_quantity": 5,
+        },
+        expect=(201,),
+    ),
+    Case(
+        "products",
+        "partial_update",
+        SELLER,
+        "PATCH",
+        "/api/products/{product}/",
+        7,
+        body=lambda fx: {"price": "2500.00"},
+    ),
+    Case(
+        "products",
+        "destroy",
+        SELLER,
+        "DELETE",
+        "/api/products/{unordered_product}/",
+        9,
+        expect=(204,),
+    ),
+    # ---------- sellers ----------
+    Case("sellers", "list", ANON, "GET", "/api/sellers/", 2),
+    Case("sellers", "retrieve", ANON, "GET", "/api/sellers/{seller}/", 1),
+    Case("sellers", "me", SELLER, "GET", "/api/sellers/me/", 3),
+    Case("sellers", "nearby", ANON, "GET", "/api/sellers/nearby/?lat={lat}&lng={lng}", 1),
+    Case(
+        "sellers",
+        "nearby",
+        ANON,
+        "GET",
+        "/api/sellers/nearby/?lat={lat}&lng={lng}&radius=25",
+        2,
+        variant="radius, cold region cache",
+    ),
+    Case("sellers", "products", ANON, "GET", "/api/sellers/{seller}/products/", 3),
+    Case("sellers", "reviews", ANON, "GET", "/api/sellers/{seller}/reviews/", 2),
+    Case("sellers", "categories", ANON, "GET", "/api/sellers/{seller}/categories/", 2),
+    Case(
+        "sellers",
+        "create",
+        BUYER,
+        "POST",
+        "/api/sellers/",
+        2,
+        body=lambda fx: {
+            "business_name": "Query Count Shop",
+            "phone_number": "+255700000001",
+            "location": {
+                "address": "Mtaa 1",
+                "city": CITIES[0][0],
+                "country": "Tanzania",
+                "latitude": f"{fx.lat:.6f}",
+                "longitude": f"{fx.lng:.6f}",
+            },
+        },
+        expect=(201,),
+    ),
+    Case(
+        "sellers",
+        "partial_update",
+        SELLER,
+        "PATCH",
+        "/api/sellers/{seller}/",
+        5,
+        body=lambda fx: {"description": "updated"},
+    ),
+    # ---------- conversations ----------
+    Case("conversations", "list", BUYER, "GET", "/api/conversations/", 3),
+    Case("conversations", "list", SELLER, "GET", "/api/conversations/", 3),
+    Case("conversations", "retrieve", BUYER, "GET", "/api/conversations/{conversation}/", 4),
+    Case(
+        "conversations",
+        "create",
+        BUYER,
+        "POST",
+        "/api/conversations/",
+        19,
+        body=lambda fx: {"seller_id": fx.seller, "product_id": fx.product},
+        expect=(200, 201),
+    ),
+    Case(
+        "conversations",
+        "mark_seen",
+        BUYER,
+        "POST",
+        "/api/conversations/{conversation}/mark_seen/",
+        4,
+    ),
+    Case(
+        "conversations",
+        "typing",
+        BUYER,
+        "POST",
+        "/api/conversations/{conversation}/typing/",
+        3,
+        body=lambda fx: {"is_typing": True},
+    ),
+    Case(
+        "conversations",
+        "destroy",
+        BUYER,
+        "DELETE",
+        "/api/conversations/{conversation}/",
+        8,
+        expect=(204,),
+    ),
+    # ---------- messages ----------
+    Case("messages", "list", BUYER, "GET", "/api/messages/", 2),
+    Case(
+        "messages",
+        "list",
+        BUYER,
+        "GET",
+        "/api/messages/?conversation_id={conversation}",
+        2,
+        variant="conversation_id",
+    ),
+    Case("messages", "retrieve", BUYER, "GET", "/api/messages/{message}/", 1),
+    Case(
+        "messages",
+        "create",
+        BUYER,
+        "POST",
+        "/api/messages/",
+        15,
+        body=lambda fx: {"conversation": fx.conversation, "text": "query count"},
+        expect=(201,),
+    ),
+    Case("messages", "mark_read", BUYER, "POST", "/api/messages/{message}/mark_read/", 4),
+    Case(
+        "messages",
+        "partial_update",
+        BUYER,
+        "PATCH",
+        "/api/messages/{message}/",
+        2,
+        body=lambda fx: {"text": "imebadilishwa"},
+    ),
+    Case("messages", "destroy", BUYER, "DELETE", "/api/messages/{message}/", 4, expect=(204,)),
+    # ---------- orders ----------
+    Case("orders", "list", BUYER, "GET", "/api/orders/", 3),
+    Case("orders", "list", SELLER, "GET", "/api/orders/", 3),
+    Case("orders", "retrieve", BUYER, "GET", "/api/orders/{order}/", 2),
+    Case(
+        "orders",
+        "create",
+        BUYER,
+        "POST",
+        "/api/orders/",
+        8,
+        body=lambda fx: {"product": fx.product, "quantity": 1},
+        expect=(201,),
+    ),
+    Case(
+        "orders",
+        "checkout",
+        BUYER,
+        "POST",
+        "/api/orders/checkout/",
+        8,
+        body=lambda fx: {
+            "items": [{"product": pk, "quantity": 2} for pk in fx.cart],
+            "delivery_address": "Sinza, Dar es Salaam",
+        },
+        expect=(201,),
+    ),
+    Case(
+        "orders",
+        "partial_update",
+        BUYER,
+        "PATCH",
+        "/api/orders/{order}/",
+        3,
+        body=lambda fx: {"note": "piga simu kabla"},
+    ),
+    Case("orders", "as_buyer", BUYER, "GET", "/api/orders/as_buyer/", 2),
+    Case("orders", "as_seller", SELLER, "GET", "/api/orders/as_seller/", 3),
+    Case(
+        "orders",
+        "set_status",
+        BUYER,
+        "POST",
+        "/api/orders/{order}/status/",
+        9,
+        body=lambda fx: {"status": "cancelled"},
+    ),
+    Case("orders", "destroy", BUYER, "DELETE", "/api/orders/{order}/", 6, expect=(204,)),
+    # ---------- notifications ----------
+    Case("notifications", "list", BUYER, "GET", "/api/notifications/", 2),
+    Case("notifications", "retrieve", BUYER, "GET", "/api/notifications/{notification}/", 1),
+    Case(
+        "notifications",
+        "partial_update",
+        BUYER,
+        "PATCH",
+        "/api/notifications/{notification}/",
+        4,
+        body=lambda fx: {"is_read": True},
+    ),
+    Case("notifications", "mark_all_read", BUYER, "POST", "/api/notifications/mark_all_read/", 2),
+    Case(
+        "notifications",
+        "destroy",
+        BUYER,
+        "DELETE",
+        "/api/notifications/{notification}/",
+        3,
+        expect=(204,),
+    ),
+    # ---------- favorites ----------
+    Case("favorites", "list", BUYER, "GET", "/api/favorites/", 2),
+    Case(
+        "favorites",
+        "create",
+        BUYER,
+        "POST",
+        "/api/favorites/",
+        5,
+        body=lambda fx: {"seller_id": fx.unfavorited_seller},
+        expect=(201,),
+    ),
+    Case(
+        "favorites",
+        "toggle",
+        BUYER,
+        "POST",
+        "/api/favorites/toggle/",
+        8,
+        body=lambda fx: {"seller_id": fx.unfavorited_seller},
+        expect=(201,),
+    ),
+    Case("favorites", "destroy", BUYER, "DELETE", "/api/favorites/{favorite}/", 2, expect=(204,)),
+    # ---------- product likes ----------
+    Case("product-likes", "list", BUYER, "GET", "/api/product-likes/", 2),
+    Case(
+        "product-likes",
+        "create",
+        BUYER,
+        "POST",
+        "/api/product-likes/",
+        5,
+        body=lambda fx: {"product": fx.unliked_product},
+        expect=(201,),
+    ),
+    Case(
+        "product-likes",
+        "toggle",
+        BUYER,
+        "POST",
+        "/api/product-likes/toggle/",
+        5,
+        body=lambda fx: {"product_id": fx.unliked_product},
+    ),
+    Case("product-likes", "destroy", BUYER, "DELETE", "/api/product-likes/{like}/", 2, expect=(204,)),
+]
+
+
+def find_growth(cases: List[Case], by_scale: Dict[str, List[CaseResult]]) -> List[str]:
+    """
+    Cases ambazo idadi ya queries iliongezeka scale ikiongezeka.
+    `by_scale` lazima iwe kwa mpangilio wa scales (ndogo -> kubwa).
+    """
+    problems = []
+    scales = list(by_scale)
+    for index, case in enumerate(cases):
+        counts = [by_scale[scale][index].bounded for scale in scales]
+        if any(later > earlier for earlier, later in zip(counts, counts[1:])):
+            joined = " -> ".join(f"{s}={c}" for s, c in zip(scales, counts))
+            problems.append(f"{case.name}: queries grow with data ({joined})")
+    return problems
+
+
+def format_results(cases: List[Case], by_scale: Dict[str, List[CaseResult]]) -> str:
+    scales = list(by_scale)
+    header = f"{'case':<44} {'max':>4} " + " ".join(f"{s:>12}" for s in scales)
+    lines = [header, "-" * len(header)]
+    for index, case in enumerate(cases):
+        row = [by_scale[scale][index] for scale in scales]
+        flag = "  !" if any(r.errors for r in row) else ""
+        cells = [
+            f"{r.bounded}+{r.queries - r.bounded}ch" if r.chunks else str(r.queries)
+            for r in row
+        ]
+        lines.append(
+            f"{case.name:<44} {case.max_queries:>4} "
+            + " ".join(f"{c:>12}" for c in cells)
+            + flag
+        )
+    return "\n".join(lines)
@@ -0,0 +1,137 @@
+# api/benchmarks/report.py
+"""
+Percentiles, ripoti ya jedwali na baseline JSON.
+
+Baseline ina latency (ms) na queries kwa kila scenario. Compare:
+- queries: ongezeko lolote ni regression (N+1 mpya) – hazitegemei mashine.
+- latency: p95 ikizidi baseline kwa zaidi ya `tolerance` (default 25%).
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import platform
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from django.utils import timezone
+
+BASELINE_VERSION = 1
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile (p kati ya 0 na 100).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies_ms: List[float] = field(default_factory=list)
+    queries: List[int] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self) -> Dict[str, float]:
+        n = len(self.latencies_ms)
+        return {
+            "requests": n,
+            "errors": self.errors,
+            "p50_ms": round(percentile(self.latencies_ms, 50), 2),
+            "p95_ms": round(percentile(self.latencies_ms, 95), 2),
+            "p99_ms": round(percentile(self.latencies_ms, 99), 2),
+            "max_ms": round(max(self.latencies_ms, default=0.0), 2),
+            "avg_queries": round(sum(self.queries) / len(self.queries), 2) if self.queries else 0,
+            "max_queries": max(self.queries, default=0),
+        }
+
+
+def format_table(results: List[ScenarioResult]) -> str:
+    header = (
+        f"{'scenario':<22} {'n':>5} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'p99 ms':>9} {'q/req':>7} {'max q':>6}"
+    )
+    lines = [header, "-" * len(header)]
+    for result in results:
+        s = result.summary()
+        lines.append(
+            f"{result.name:<22} {s['requests']:>5} {s['errors']:>4} {s['p50_ms']:>9.2f} "
+            f"{s['p95_ms']:>9.2f} {s['p99_ms']:>9.2f} {s['avg_queries']:>7.2f} "
+            f"{s['max_queries']:>6}"
+        )
+    return "\n".join(lines)
+
+
+def build_baseline(results: List[ScenarioResult], meta: Dict) -> Dict:
+    return {
+        "version": BASELINE_VERSION,
+        "created_at": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "meta": meta,
+        "scenarios": {r.name: r.summary() for r in results},
+    }
+
+
+def write_baseline(path: str, baseline: Dict) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(baseline, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def load_baseline(path: str) -> Dict:
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def compare(
+    results: List[ScenarioResult],
+    baseline: Dict,
+    tolerance: float = 0.25,
+) -> List[str]:
+    """
+    Rudisha list ya regressions (tupu => sawa na baseline au bora).
+    """
+    problems = []
+    base_scenarios = baseline.get("scenarios", {})
+    for result in results:
+        base: Optional[Dict] = base_scenarios.get(result.name)
+        if base is None:
+            continue
+        now = result.summary()
+
+        if now["avg_queries"] > base["avg_queries"]:
+            problems.append(
+                f"{result.name}: queries/request {base['avg_queries']} -> {now['avg_queries']}"
+            )
+        if base["p95_ms"] and now["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            problems.append(
+                f"{result.name}: p95 {base['p95_ms']}ms -> {now['p95_ms']}ms "
+                f"(> {tolerance:.0%} slower)"
+            )
+        if now["errors"] > base.get("errors", 0):
+            problems.append(f"{result.name}: errors {base.get('errors', 0)} -> {now['errors']}")
+    return problems
+
+
+def format_comparison(results: List[ScenarioResult], baseline: Dict) -> str:
+    base_scenarios = baseline.get("scenarios", {})
+    lines = [f"{'scenario':<22} {'p95 base':>9} {'p95 now':>9} {'Δ%':>7} {'q base':>7} {'q now':>7}"]
+    for result in results:
+        base = base_scenarios.get(result.name)
+        if base is None:
+            lines.append(f"{result.name:<22} (haipo kwenye baseline)")
+            continue
+        now = result.summary()
+        delta = (now["p95_ms"] / base["p95_ms"] - 1) * 100 if base["p95_ms"] else 0.0
+        lines.append(
+            f"{result.name:<22} {base['p95_ms']:>9.2f} {now['p95_ms']:>9.2f} {delta:>+7.1f} "
+            f"{base['avg_queries']:>7.2f} {now['avg_queries']:>7.2f}"
+        )
+    return "\n".join(lines)
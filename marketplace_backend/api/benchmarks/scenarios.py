@@ -0,0 +1,377 @@
+# api/benchmarks/scenarios.py
+"""
+Scenarios za benchmark.
+
+Kila scenario inapiga endpoint halisi kupitia middleware stack nzima
+(APIClient / WebsocketCommunicator), kwa hiyo vipimo vinajumuisha auth,
+serializers, signals n.k. Idadi ya queries inasomwa kutoka `Server-Timing`
+header ya RequestMetricsMiddleware.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import re
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.routing import URLRouter
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .. import regions
+from ..models import Conversation, Message, Product
+from .report import ScenarioResult
+from .seed import CITIES, Dataset
+
+_QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def queries_from(response) -> int:
+    """
+    Idadi ya queries kutoka Server-Timing (api.instrumentation).
+    """
+    match = _QUERIES_RE.search(response.get("Server-Timing", ""))
+    return int(match.group(1)) if match else 0
+
+
+class Scenario:
+    """
+    Scenario moja: `prepare()` mara moja, kisha `run_once(i)` kwa kila
+    iteration. run_once inarudisha (latency_ms, queries) au inarusha
+    exception (inahesabiwa kama error).
+    """
+
+    name = ""
+    description = ""
+
+    def __init__(self, dataset: Dataset, rng: random.Random):
+        self.dataset = dataset
+        self.rng = rng
+        self._clients: Dict[int, APIClient] = {}
+
+    def client_for(self, user_id: Optional[int]) -> APIClient:
+        key = user_id or 0
+        client = self._clients.get(key)
+        if client is None:
+            client = APIClient()
+            if user_id:
+                client.force_authenticate(User.objects.get(pk=user_id))
+            self._clients[key] = client
+        return client
+
+    def prepare(self) -> None:
+        pass
+
+    def run_once(self, i: int) -> Tuple[float, int]:
+        raise NotImplementedError
+
+    def run(self, iterations: int, warmup: int = 3) -> ScenarioResult:
+        self.prepare()
+        result = ScenarioResult(self.name)
+        for i in range(warmup + iterations):
+            try:
+                latency_ms, queries = self.run_once(i)
+            except Exception:
+                if i >= warmup:
+                    result.errors += 1
+                continue
+            if i >= warmup:
+                result.latencies_ms.append(latency_ms)
+                result.queries.append(queries)
+        return result
+
+
+def _timed(fn: Callable):
+    started = time.perf_counter()
+    response = fn()
+    return (time.perf_counter() - started) * 1000, response
+
+
+async def _receive_events(ws, timeout: float) -> List[dict]:
+    """
+    Frame moja kutoka socket; {"type": "batch"} (api/outbound.py) => events zake.
+    """
+    frame = await ws.receive_json_from(timeout=timeout)
+    if frame.get("type") == "batch":
+        return frame["events"]
+    return [frame]
+
+
+def _expect(response, *codes):
+    if response.status_code not in codes:
+        raise AssertionError(f"unexpected status {response.status_code}")
+    return response
+
+
+# =========================
+#  HTTP SCENARIOS
+# =========================
+
+class ProductsNearby(Scenario):
+    name = "products_nearby"
+    description = "GET /api/products/nearby/ (guest, coordinates karibu na mji)"
+
+    def run_once(self, i):
+        _, lat, lng = self.rng.choice(CITIES)
+        lat += self.rng.uniform(-0.2, 0.2)
+        lng += self.rng.uniform(-0.2, 0.2)
+        client = self.client_for(None)
+        ms, response = _timed(
+            lambda: client.get("/api/products/nearby/", {"lat": lat, "lng": lng})
+        )
+        _expect(response, 200)
+        return ms, queries_from(response)
+
+
+class SellersNearby(Scenario):
+    name = "sellers_nearby"
+    description = "GET /api/sellers/nearby/?radius=25 (regions, cache ya joto)"
+
+    def prepare(self):
+        regions.warm()
+
+    def run_once(self, i):
+        _, lat, lng = self.rng.choice(CITIES)
+        lat += self.rng.uniform(-0.2, 0.2)
+        lng += self.rng.uniform(-0.2, 0.2)
+        client = self.client_for(None)
+        ms, response = _timed(
+            lambda: client.get(
+                "/api/sellers/nearby/", {"lat": lat, "lng": lng, "radius": 25}
+            )
+        )
+        _expect(response, 200)
+        return ms, queries_from(response)
+
+
+class ConversationInbox(Scenario):
+    name = "conversation_inbox"
+    description = "GET /api/conversations/ (inbox ya buyer)"
+
+    def run_once(self, i):
+        client = self.client_for(self.rng.choice(self.dataset.buyer_ids))
+        ms, response = _timed(lambda: client.get("/api/conversations/"))
+        _expect(response, 200)
+        return ms, queries_from(response)
+
+
+class OrderCreate(Scenario):
+    name = "order_create"
+    description = "POST /api/orders/ (buyer, quantity 1)"
+
+    def prepare(self):
+        self.in_stock = list(
+            Product.objects.filter(
+                pk__in=self.dataset.product_ids, stock_quantity__gt=100
+            ).values_list("id", flat=True)
+        )
+
+    def run_once(self, i):
+        client = self.client_for(self.rng.choice(self.dataset.buyer_ids))
+        body = {"product": self.rng.choice(self.in_stock), "quantity": 1}
+        ms, response = _timed(lambda: client.post("/api/orders/", body, format="json"))
+        _expect(response, 201)
+        return ms, queries_from(response)
+
+
+# =========================
+#  MESSAGE SEND + WEBSOCKET FAN-OUT
+# =========================
+
+class MessageSendFanout(Scenario):
+    """
+    Sockets `listeners` kwa kila upande (buyer + seller, kama tabs nyingi)
+    zinaunganishwa kwenye conversation; tunapima kuanzia POST /api/messages/
+    hadi socket ya mwisho ipate `message.created`.
+    """
+
+    name = "message_send_ws"
+    description = "POST /api/messages/ -> message.created kwa sockets zote"
+
+    listeners = 2
+    receive_timeout = 5
+
+    def prepare(self):
+        # channels.testing ina-import daphne/Twisted – tunaichelewesha hadi
+        # scenario hii itumike
+        from channels.testing import WebsocketCommunicator
+        from marketplace_backend.channels_jwt_middleware import JWTAuthMiddleware
+
+        from .. import routing
+
+        self.communicator_class = WebsocketCommunicator
+        self.application = JWTAuthMiddleware(URLRouter(routing.websocket_urlpatterns))
+        self.conversations = list(
+            Conversation.objects.filter(pk__in=self.dataset.conversation_ids).values_list(
+                "id", "buyer_id", "seller__user_id"
+            )
+        )
+        self.tokens: Dict[int, str] = {}
+
+    def _token(self, user_id: int) -> str:
+        if user_id not in self.tokens:
+            self.tokens[user_id] = str(AccessToken.for_user(User(pk=user_id)))
+        return self.tokens[user_id]
+
+    def run_once(self, i):
+        conv_id, buyer_id, seller_user_id = self.rng.choice(self.conversations)
+        sender_id = buyer_id if i % 2 == 0 else seller_user_id
+        tokens = [self._token(buyer_id), self._token(seller_user_id)]
+        # socket ya kwanza ya sender (sockets: buyer kwanza, kisha seller)
+        sender_socket = 0 if sender_id == buyer_id else self.listeners
+        client = self.client_for(sender_id)
+        return async_to_sync(self._round_trip)(conv_id, tokens, client, sender_socket, i)
+
+    async def _send(self, conv_id: int, client: APIClient, ws, i: int) -> int:
+        """
+        Tuma message; rudisha idadi ya queries.
+        """
+        response = await sync_to_async(client.post)(
+            "/api/messages/",
+            {"conversation": conv_id, "text": "bench ping"},
+            format="json",
+        )
+        _expect(response, 201)
+        return queries_from(response)
+
+    async def _round_trip(
+        self, conv_id: int, tokens: List[str], client: APIClient, sender_socket: int, i: int
+    ):
+        sockets = []
+        try:
+            for token in tokens:
+                for _ in range(self.listeners):
+                    ws = self.communicator_class(
+                        self.application, f"/ws/chat/{conv_id}/?token={token}"
+                    )
+                    connected, _ = await ws.connect(timeout=self.receive_timeout)
+                    if not connected:
+                        raise AssertionError("websocket rejected")
+                    await ws.receive_json_from(timeout=self.receive_timeout)  # "connection"
+                    sockets.append(ws)
+
+            started = time.perf_counter()
+            queries = await self._send(conv_id, client, sockets[sender_socket], i)
+            await asyncio.gather(*(self._wait_for_message(ws) for ws in sockets))
+            latency_ms = (time.perf_counter() - started) * 1000
+            return latency_ms, queries
+        finally:
+            for ws in sockets:
+                await ws.disconnect()
+
+    async def _wait_for_message(self, ws) -> None:
+        while True:
+            events = await _receive_events(ws, self.receive_timeout)
+            if any(event.get("type") == "message.created" for event in events):
+                return
+
+
+class MessageSendSocket(MessageSendFanout):
+    """
+    Kama message_send_ws, lakini message inatumwa kama frame `message.send`
+    kwenye socket ya sender (bila HTTP/JWT/DRF). Queries zinahesabiwa hadi
+    `message.ack` (database_sync_to_async inatumia connection ya thread hii).
+    """
+
+    name = "message_send_socket"
+    description = "WS message.send -> message.ack + message.created kwa sockets zote"
+
+    def run_once(self, i):
+        self.db = connections[DEFAULT_DB_ALIAS]  # connection ya thread ya sync
+        return super().run_once(i)
+
+    async def _send(self, conv_id: int, client: APIClient, ws, i: int) -> int:
+        captured = []
+
+        def count(execute, sql, params, many, context):
+            captured.append(sql)
+            return execute(sql, params, many, context)
+
+        with self.db.execute_wrapper(count):
+            await ws.send_json_to(
+                {"type": "message.send", "client_id": f"bench-{i}-{time.time_ns()}", "text": "bench ping"}
+            )
+            acked = False
+            self.created_with_ack = None
+            while not acked:
+                for event in await _receive_events(ws, self.receive_timeout):
+                    if event.get("type") == "message.error":
+                        raise AssertionError(f"message.error: {event.get('errors')}")
+                    if event.get("type") == "message.created":
+                        # ack + message.created kwenye batch moja
+                        self.created_with_ack = ws
+                    acked = acked or event.get("type") == "message.ack"
+        return len(captured)
+
+    async def _wait_for_message(self, ws) -> None:
+        if ws is self.created_with_ack:
+            return
+        await super()._wait_for_message(ws)
+
+
+class ChatResume(MessageSendFanout):
+    """
+    Reconnect ya chat yenye `?last_message_id=` (messages `missed` nyuma ya
+    mwisho): tunapima kuanzia connect hadi frame ya "resume" ifike. Queries
+    zinahesabiwa kama message_send_socket (connection ya thread ya sync).
+    """
+
+    name = "chat_resume"
+    description = "WS connect ?last_message_id= -> resume (messages zilizokosekana)"
+
+    missed = 10
+
+    def run_once(self, i):
+        conv_id, buyer_id, _ = self.rng.choice(self.conversations)
+        cursor = (
+            Message.objects.filter(conversation_id=conv_id)
+            .order_by("-id")
+            .values_list("id", flat=True)[self.missed : self.missed + 1]
+            .first()
+        ) or 0
+        self.db = connections[DEFAULT_DB_ALIAS]
+        return async_to_sync(self._resume)(conv_id, self._token(buyer_id), cursor)
+
+    async def _resume(self, conv_id: int, token: str, cursor: int):
+        captured = []
+
+        def count(execute, sql, params, many, context):
+            captured.append(sql)
+            return execute(sql, params, many, context)
+
+        ws = self.communicator_class(
+            self.application, f"/ws/chat/{conv_id}/?token={token}&last_message_id={cursor}"
+        )
+        try:
+            with self.db.execute_wrapper(count):
+                started = time.perf_counter()
+                connected, _ = await ws.connect(timeout=self.receive_timeout)
+                if not connected:
+                    raise AssertionError("websocket rejected")
+                while True:
+                    events = await _receive_events(ws, self.receive_timeout)
+                    if any(event.get("type") == "resume" for event in events):
+                        break
+                latency_ms = (time.perf_counter() - started) * 1000
+            return latency_ms, len(captured)
+        finally:
+            await ws.disconnect()
+
+
+SCENARIOS = {
+    cls.name: cls
+    for cls in (
+        ProductsNearby,
+        SellersNearby,
+        ConversationInbox,
+        MessageSendFanout,
+        MessageSendSocket,
+        ChatResume,
+        OrderCreate,
+    )
+}
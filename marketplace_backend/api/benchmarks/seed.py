@@ -0,0 +1,337 @@
+# api/benchmarks/seed.py
+"""
+Seeded data generator ya benchmarks (na check_query_counts).
+
+Kila kitu kinatokana na `random.Random(seed)` – seed ile ile + scale ile ile
+=> data ile ile (ids, bei, coordinates, nani-kapenda-nini), kwa hiyo matokeo
+ya runs tofauti yanalinganishwa.
+
+Tunatumia bulk_create (signals hazipigwi): FTS index, suggest index na
+category counts hazihitajiki na scenarios.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, field
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, List
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .. import regions, unread
+from ..models import (
+    Category,
+    Conversation,
+    ConversationParticipantState,
+    Favorite,
+    Location,
+    Message,
+    Notification,
+    Order,
+    Product,
+    ProductLike,
+    Review,
+    SellerProfile,
+    UserProfile,
+)
+
+BENCH_PASSWORD = "bench-pass-123"
+
+# (mji, lat, lng) – sellers wanatawanywa karibu na miji hii
+CITIES = [
+    ("Dar es Salaam", -6.7924, 39.2083),
+    ("Dodoma", -6.1630, 35.7516),
+    ("Arusha", -3.3869, 36.6830),
+    ("Mwanza", -2.5164, 32.9175),
+    ("Mbeya", -8.9094, 33.4608),
+]
+
+CATEGORY_NAMES = [
+    "Electronics",
+    "Phones",
+    "Fashion",
+    "Home & Kitchen",
+    "Groceries",
+    "Furniture",
+]
+
+WORDS = [
+    "simu",
+    "laptop",
+    "kiatu",
+    "shati",
+    "sufuria",
+    "kitanda",
+    "mchele",
+    "tv",
+    "redio",
+    "meza",
+    "kiti",
+    "friji",
+]
+
+
+@dataclass(frozen=True)
+class Scale:
+    sellers: int
+    products_per_seller: int
+    buyers: int
+    likes_per_buyer: int
+    orders_per_buyer: int
+    conversations_per_buyer: int
+    messages_per_conversation: int
+    favorites_per_buyer: int
+    reviews_per_buyer: int
+    notifications_per_user: int
+
+
+SCALES: Dict[str, Scale] = {
+    "small": Scale(
+        sellers=20,
+        products_per_seller=10,
+        buyers=50,
+        likes_per_buyer=5,
+        orders_per_buyer=2,
+        conversations_per_buyer=2,
+        messages_per_conversation=10,
+        favorites_per_buyer=2,
+        reviews_per_buyer=1,
+        notifications_per_user=5,
+    ),
+    "medium": Scale(
+        sellers=100,
+        products_per_seller=30,
+        buyers=400,
+        likes_per_buyer=15,
+        orders_per_buyer=4,
+        conversations_per_buyer=4,
+        messages_per_conversation=25,
+        favorites_per_buyer=6,
+        reviews_per_buyer=3,
+        notifications_per_user=20,
+    ),
+    "large": Scale(
+        sellers=400,
+        products_per_seller=50,
+        buyers=2000,
+        likes_per_buyer=25,
+        orders_per_buyer=5,
+        conversations_per_buyer=5,
+        messages_per_conversation=40,
+        favorites_per_buyer=10,
+        reviews_per_buyer=3,
+        notifications_per_user=30,
+    ),
+}
+
+
+@dataclass
+class Dataset:
+    """
+    Ids za data iliyo-seed – scenarios zinachagua kutoka hapa.
+    """
+
+    seller_user_ids: List[int] = field(default_factory=list)
+    buyer_ids: List[int] = field(default_factory=list)
+    product_ids: List[int] = field(default_factory=list)
+    conversation_ids: List[int] = field(default_factory=list)
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+def _jitter(rng: random.Random, value: float, spread: float = 0.15) -> Decimal:
+    return Decimal(f"{value + rng.uniform(-spread, spread):.6f}")
+
+
+def seed(scale: Scale, seed_value: int = 42) -> Dataset:
+    rng = random.Random(seed_value)
+    now = timezone.now()
+    password = make_password(BENCH_PASSWORD)
+    data = Dataset()
+
+    # ---------- users ----------
+    seller_users = User.objects.bulk_create(
+        [
+            User(username=f"bench_seller_{i}", email=f"seller{i}@bench.local", password=password)
+            for i in range(scale.sellers)
+        ]
+    )
+    buyers = User.objects.bulk_create(
+        [
+            User(username=f"bench_buyer_{i}", email=f"buyer{i}@bench.local", password=password)
+            for i in range(scale.buyers)
+        ]
+    )
+    UserProfile.objects.bulk_create(
+        [UserProfile(user=u, is_seller=True) for u in seller_users]
+        + [UserProfile(user=u) for u in buyers]
+    )
+
+    # ---------- sellers + locations ----------
+    sellers = SellerProfile.objects.bulk_create(
+        [
+            SellerProfile(
+                user=u,
+                business_name=f"{rng.choice(WORDS).title()} Shop {i}",
+                phone_number=f"+2557{i:08d}",
+                rating=Decimal(f"{rng.uniform(2.5, 5):.2f}"),
+            )
+            for i, u in enumerate(seller_users)
+        ]
+    )
+    locations = []
+    for seller in sellers:
+        city, lat, lng = rng.choice(CITIES)
+        latitude, longitude = _jitter(rng, lat), _jitter(rng, lng)
+        locations.append(
+            Location(
+                seller=seller,
+                address=f"Mtaa {rng.randint(1, 99)}",
+                city=city,
+                country="Tanzania",
+                latitude=latitude,
+                longitude=longitude,
+                # bulk_create haipiti Location.save()
+                region=regions.region_key(latitude, longitude),
+            )
+        )
+    Location.objects.bulk_create(locations)
+    regions.invalidate_all()
+
+    categories = Category.objects.bulk_create(
+        [Category(name=name, slug=slugify(name)) for name in CATEGORY_NAMES]
+    )
+
+    # ---------- products ----------
+    products = Product.objects.bulk_create(
+        [
+            Product(
+                seller=seller,
+                category=rng.choice(categories),
+                name=f"{rng.choice(WORDS)} {rng.choice(WORDS)} {j}",
+                description=" ".join(rng.choice(WORDS) for _ in range(30)),
+                price=Decimal(rng.randint(1000, 2_000_000)),
+                stock_quantity=rng.randint(0, 500),
+            )
+            for seller in sellers
+            for j in range(scale.products_per_seller)
+        ],
+        batch_size=1000,
+    )
+
+    # ---------- likes ----------
+    likes = []
+    for buyer in buyers:
+        for product in rng.sample(products, min(scale.likes_per_buyer, len(products))):
+            likes.append(ProductLike(user=buyer, product=product))
+    ProductLike.objects.bulk_create(likes, batch_size=1000)
+
+    # ---------- orders ----------
+    statuses = [s for s, _ in Order.STATUS_CHOICES]
+    orders = []
+    for buyer in buyers:
+        for _ in range(scale.orders_per_buyer):
+            product = rng.choice(products)
+            quantity = rng.randint(1, 3)
+            orders.append(
+                Order(
+                    buyer=buyer,
+                    seller_id=product.seller_id,
+                    product=product,
+                    quantity=quantity,
+                    unit_price=product.price,
+                    total_price=product.price * quantity,
+                    status=rng.choice(statuses),
+                )
+            )
+    Order.objects.bulk_create(orders, batch_size=1000)
+
+    # ---------- favorites + reviews ----------
+    favorites = []
+    reviews = []
+    for buyer in buyers:
+        for seller in rng.sample(sellers, min(scale.favorites_per_buyer, len(sellers))):
+            favorites.append(Favorite(user=buyer, seller=seller))
+        for seller in rng.sample(sellers, min(scale.reviews_per_buyer, len(sellers))):
+            reviews.append(
+                Review(
+                    user=buyer,
+                    seller=seller,
+                    rating=rng.randint(1, 5),
+                    comment=" ".join(rng.choice(WORDS) for _ in range(8)),
+                )
+            )
+    Favorite.objects.bulk_create(favorites, batch_size=1000)
+    Review.objects.bulk_create(reviews, batch_size=1000)
+
+    # ---------- conversations + messages ----------
+    seller_user_by_id = {s.id: s.user_id for s in sellers}
+    conversations = []
+    for buyer in buyers:
+        for seller in rng.sample(sellers, min(scale.conversations_per_buyer, len(sellers))):
+            conversations.append(Conversation(buyer=buyer, seller=seller))
+    conversations = Conversation.objects.bulk_create(conversations, batch_size=1000)
+
+    states = []
+    messages = []
+    for conv in conversations:
+        seller_user_id = seller_user_by_id[conv.seller_id]
+        states.append(ConversationParticipantState(conversation=conv, user_id=conv.buyer_id))
+        states.append(ConversationParticipantState(conversation=conv, user_id=seller_user_id))
+        for k in range(scale.messages_per_conversation):
+            messages.append(
+                Message(
+                    conversation=conv,
+                    sender_id=conv.buyer_id if k % 2 == 0 else seller_user_id,
+                    text=" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 15))),
+                    is_read=rng.random() < 0.7,
+                )
+            )
+    ConversationParticipantState.objects.bulk_create(states, batch_size=1000)
+    Message.objects.bulk_create(messages, batch_size=1000)
+
+    # ---------- notifications ----------
+    notif_types = [t for t, _ in Notification.NOTIF_TYPE_CHOICES]
+    notifications = [
+        Notification(
+            user=u,
+            notif_type=rng.choice(notif_types),
+            title="Bench notification",
+            body=" ".join(rng.choice(WORDS) for _ in range(6)),
+            data={"n": k},
+            is_read=rng.random() < 0.5,
+        )
+        for u in seller_users + buyers
+        for k in range(scale.notifications_per_user)
+    ]
+    Notification.objects.bulk_create(notifications, batch_size=1000)
+
+    # last_message_at iwe tofauti kwa kila conversation (inbox ordering)
+    for i, conv in enumerate(conversations):
+        conv.last_message_at = now - timedelta(minutes=i)
+    Conversation.objects.bulk_update(conversations, ["last_message_at"], batch_size=1000)
+
+    # bulk_create haipiti api.unread – jaza counters kutoka rows zenyewe
+    unread.recalculate()
+
+    data.seller_user_ids = [u.id for u in seller_users]
+    data.buyer_ids = [u.id for u in buyers]
+    data.product_ids = [p.id for p in products]
+    data.conversation_ids = [c.id for c in conversations]
+    data.counts = {
+        "sellers": len(sellers),
+        "buyers": len(buyers),
+        "products": len(products),
+        "likes": len(likes),
+        "orders": len(orders),
+        "conversations": len(conversations),
+        "messages": len(messages),
+        "favorites": len(favorites),
+        "reviews": len(reviews),
+        "notifications": len(notifications),
+    }
+    return data
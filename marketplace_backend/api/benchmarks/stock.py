@@ -0,0 +1,157 @@
+# api/benchmarks/stock.py
+"""
+Stress test ya stock: buyers wengi wananunua product moja kwa wakati mmoja.
+
+Product inapewa stock `stock`; threads `threads` (kila moja buyer wake,
+connection yake ya DB) zinapiga POST /api/orders/ hadi stock iishe. Mwisho
+tunahakiki invariants:
+
+- units za orders zilizofaulu == stock iliyopungua (hakuna oversell)
+- stock haijashuka chini ya 0
+- kila order ina notifications zake mbili (order_new + order_created)
+- requests zilizokataliwa ni 400 (stock haitoshi), si 500 / "locked"
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List
+
+from django.db import connection
+
+from ..models import Notification, Order, Product
+from .report import percentile
+from .writers import ThreadResult, _client, _merge
+
+
+@dataclass
+class StressResult:
+    threads: int
+    initial_stock: int
+    final_stock: int
+    units_ordered: int
+    orders: int
+    notifications: int
+    rejected: int
+    wall_s: float
+    result: ThreadResult = field(default_factory=ThreadResult)
+
+    @property
+    def oversold(self) -> int:
+        return max(self.units_ordered - self.initial_stock, 0)
+
+    def problems(self) -> List[str]:
+        problems = []
+        if self.oversold:
+            problems.append(f"oversold by {self.oversold} units")
+        if self.final_stock < 0:
+            problems.append(f"stock went negative ({self.final_stock})")
+        if self.initial_stock - self.final_stock != self.units_ordered:
+            problems.append(
+                f"stock moved by {self.initial_stock - self.final_stock} "
+                f"but {self.units_ordered} units were ordered"
+            )
+        if self.notifications != self.orders * 2:
+            problems.append(f"{self.orders} orders but {self.notifications} notifications")
+        if self.result.errors:
+            problems.append(f"{len(self.result.errors)} errors, first: {self.result.errors[0]}")
+        return problems
+
+    def format(self) -> str:
+        ok = self.result.latencies_ms
+        wall = self.wall_s or 1e-9
+        return "\n".join([
+            f"threads:        {self.threads}",
+            f"stock:          {self.initial_stock} -> {self.final_stock}",
+            f"orders:         {self.orders} ({self.units_ordered} units)",
+            f"rejected (400): {self.rejected}",
+            f"errors:         {len(self.result.errors)}",
+            f"orders/s:       {len(ok) / wall:.1f}",
+            f"p50 / p95 ms:   {percentile(ok, 50):.2f} / {percentile(ok, 95):.2f}",
+        ])
+
+
+def _buyer(barrier, user_id, product_id, quantity, attempts, result, rejected) -> None:
+    try:
+        client = _client(user_id)
+        barrier.wait()
+        for _ in range(attempts):
+            started = time.perf_counter()
+            try:
+                response = client.post(
+                    "/api/orders/",
+                    {"product": product_id, "quantity": quantity},
+                    format="json",
+                )
+            except Exception as exc:
+                result.errors.append(f"{type(exc).__name__}: {exc}")
+                continue
+            if response.status_code == 201:
+                result.latencies_ms.append((time.perf_counter() - started) * 1000)
+            elif response.status_code == 400:
+                rejected.append(1)
+                # stock imeisha – hakuna haja ya kuendelea kujaribu
+                break
+            else:
+                result.errors.append(f"HTTP {response.status_code}")
+    finally:
+        connection.close()
+
+
+def run_stress(
+    product_id: int,
+    buyer_ids: List[int],
+    threads: int,
+    attempts: int,
+    quantity: int = 1,
+) -> StressResult:
+    """
+    Endesha buyers `threads` kwa pamoja (Barrier), kila mmoja hadi orders
+    `attempts`. Stock ya product iwe imeshawekwa na caller.
+    """
+    initial_stock = Product.objects.values_list("stock_quantity", flat=True).get(pk=product_id)
+    results = [ThreadResult() for _ in range(threads)]
+    rejected: List[int] = []
+    barrier = threading.Barrier(threads + 1)
+    workers = [
+        threading.Thread(
+            target=_buyer,
+            args=(
+                barrier,
+                buyer_ids[i % len(buyer_ids)],
+                product_id,
+                quantity,
+                attempts,
+                results[i],
+                rejected,
+            ),
+        )
+        for i in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+
+    barrier.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    wall = time.perf_counter() - started
+
+    orders = Order.objects.filter(product_id=product_id)
+    order_ids = list(orders.values_list("id", flat=True))
+    return StressResult(
+        threads=threads,
+        initial_stock=initial_stock,
+        final_stock=Product.objects.values_list("stock_quantity", flat=True).get(pk=product_id),
+        units_ordered=sum(orders.values_list("quantity", flat=True)),
+        orders=len(order_ids),
+        notifications=Notification.objects.filter(
+            notif_type__in=["order_new", "order_created"],
+            data__order_id__in=order_ids,
+        ).count(),
+        rejected=len(rejected),
+        wall_s=wall,
+        result=_merge(results),
+    )
@@ -0,0 +1,223 @@
+# api/benchmarks/writers.py
+"""
+Throughput ya requests chini ya writers wengi kwa wakati mmoja.
+
+Kila thread ni "client" mmoja (connection yake ya DB, kama worker thread ya
+ASGI/WSGI):
+- writers: POST /api/messages/ na POST /api/orders/ kwa kupokezana
+- readers: GET /api/conversations/ (inbox)
+
+Wote wanaanza pamoja (Barrier). Tunapima requests zilizofaulu kwa sekunde,
+p50/p95 na errors (mf. "database is locked" kwenye SQLite bila busy_timeout).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from django.contrib.auth.models import User
+from django.db import connection
+from rest_framework.test import APIClient
+
+from ..models import Conversation, Product
+from .report import percentile
+from .seed import Dataset
+
+
+@dataclass
+class ThreadResult:
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ProfileResult:
+    profile: str
+    writers: int
+    readers: int
+    wall_s: float
+    writes: ThreadResult
+    reads: ThreadResult
+
+    def summary(self) -> dict:
+        wall = self.wall_s or 1e-9
+        return {
+            "profile": self.profile,
+            "writers": self.writers,
+            "readers": self.readers,
+            "writes_ok": len(self.writes.latencies_ms),
+            "write_errors": len(self.writes.errors),
+            "writes_per_s": round(len(self.writes.latencies_ms) / wall, 1),
+            "write_p50_ms": round(percentile(self.writes.latencies_ms, 50), 2),
+            "write_p95_ms": round(percentile(self.writes.latencies_ms, 95), 2),
+            "reads_ok": len(self.reads.latencies_ms),
+            "read_errors": len(self.reads.errors),
+            "reads_per_s": round(len(self.reads.latencies_ms) / wall, 1),
+            "read_p95_ms": round(percentile(self.reads.latencies_ms, 95), 2),
+        }
+
+
+def _writer_plan(dataset: Dataset, count: int) -> List[Tuple[int, int, int]]:
+    """
+    (user_id, conversation_id, product_id) kwa kila writer – buyer tofauti
+    kwa kila thread ili writes zisiwe kwenye rows zile zile tu.
+    """
+    plan = []
+    product_ids = list(
+        Product.objects.filter(pk__in=dataset.product_ids, stock_quantity__gt=0)
+        .order_by("id")
+        .values_list("id", flat=True)[: max(count, 1)]
+    )
+    for i in range(count):
+        buyer_id = dataset.buyer_ids[i % len(dataset.buyer_ids)]
+        conversation_id = (
+            Conversation.objects.filter(buyer_id=buyer_id)
+            .order_by("id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        plan.append((buyer_id, conversation_id, product_ids[i % len(product_ids)]))
+    return plan
+
+
+def _client(user_id: int) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(User.objects.get(pk=user_id))
+    return client
+
+
+def _timed(result: ThreadResult, fn, expect: int) -> None:
+    started = time.perf_counter()
+    try:
+        response = fn()
+    except Exception as exc:  # OperationalError n.k. – inahesabiwa kama error
+        result.errors.append(f"{type(exc).__name__}: {exc}")
+        return
+    if response.status_code != expect:
+        result.errors.append(f"HTTP {response.status_code}")
+        return
+    result.latencies_ms.append((time.perf_counter() - started) * 1000)
+
+
+def _writer(barrier, plan, requests: int, result: ThreadResult) -> None:
+    user_id, conversation_id, product_id = plan
+    try:
+        client = _client(user_id)
+        barrier.wait()
+        for i in range(requests):
+            if i % 2 == 0:
+                _timed(
+                    result,
+                    lambda: client.post(
+                        "/api/messages/",
+                        {"conversation": conversation_id, "text": f"load {i}"},
+                        format="json",
+                    ),
+                    201,
+                )
+            else:
+                _timed(
+                    result,
+                    lambda: client.post(
+                        "/api/orders/",
+                        {"product": product_id, "quantity": 1},
+                        format="json",
+                    ),
+                    201,
+                )
+    finally:
+        connection.close()
+
+
+def _reader(barrier, user_id: int, stop: threading.Event, result: ThreadResult) -> None:
+    try:
+        client = _client(user_id)
+        barrier.wait()
+        while not stop.is_set():
+            _timed(result, lambda: client.get("/api/conversations/"), 200)
+    finally:
+        connection.close()
+
+
+def run_profile(
+    profile: str,
+    dataset: Dataset,
+    writers: int,
+    readers: int,
+    requests: int,
+) -> ProfileResult:
+    """
+    Endesha writers (kila mmoja `requests` requests) + readers hadi writers
+    wote wamalize. Settings za profile (PRAGMAs) ziwe zimeshawekwa na caller.
+    """
+    plans = _writer_plan(dataset, writers)
+    writes = [ThreadResult() for _ in range(writers)]
+    reads = [ThreadResult() for _ in range(readers)]
+    barrier = threading.Barrier(writers + readers + 1)
+    stop = threading.Event()
+
+    threads = [
+        threading.Thread(target=_writer, args=(barrier, plans[i], requests, writes[i]))
+        for i in range(writers)
+    ] + [
+        threading.Thread(
+            target=_reader,
+            args=(barrier, dataset.buyer_ids[-(i + 1)], stop, reads[i]),
+        )
+        for i in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads[:writers]:
+        thread.join()
+    wall = time.perf_counter() - started
+    stop.set()
+    for thread in threads[writers:]:
+        thread.join()
+
+    return ProfileResult(
+        profile=profile,
+        writers=writers,
+        readers=readers,
+        wall_s=wall,
+        writes=_merge(writes),
+        reads=_merge(reads),
+    )
+
+
+def _merge(results: List[ThreadResult]) -> ThreadResult:
+    merged = ThreadResult()
+    for result in results:
+        merged.latencies_ms.extend(result.latencies_ms)
+        merged.errors.extend(result.errors)
+    return merged
+
+
+def format_profiles(results: List[ProfileResult]) -> str:
+    header = (
+        f"{'profile':<10} {'w':>3} {'r':>3} {'writes':>7} {'w err':>6} {'w/s':>8} "
+        f"{'w p50':>8} {'w p95':>8} {'reads':>6} {'r err':>6} {'r/s':>8} {'r p95':>8}"
+    )
+    lines = [header, "-" * len(header)]
+    for result in results:
+        s = result.summary()
+        lines.append(
+            f"{s['profile']:<10} {s['writers']:>3} {s['readers']:>3} {s['writes_ok']:>7} "
+            f"{s['write_errors']:>6} {s['writes_per_s']:>8.1f} {s['write_p50_ms']:>8.2f} "
+            f"{s['write_p95_ms']:>8.2f} {s['reads_ok']:>6} {s['read_errors']:>6} "
+            f"{s['reads_per_s']:>8.1f} {s['read_p95_ms']:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def first_error(results: List[ProfileResult]) -> Optional[str]:
+    for result in results:
+        for error in result.writes.errors + result.reads.errors:
+            return f"{result.profile}: {error}"
+    return None
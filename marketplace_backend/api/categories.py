@@ -0,0 +1,112 @@
+# api/categories.py
+"""
+Category filter ya products (`?category=`) bila LIKE wala join.
+
+- `?category_id=<id>`: category hiyo (global au ya duka) na descendants wake.
+- `?category=<slug>` (mf. "laptops-computers" au jina "Laptops & Computers"):
+  global categories tu (seller NULL). Categories za maduka zina majina
+  yanayojirudia kati ya maduka – zinafikiwa kwa `category_id`, au kupitia
+  global category zilizo chini yake.
+- Thamani inageuzwa kuwa list ya category ids, kisha products zinachujwa kwa
+  `category_id__in` (inatumia index ya Product.category).
+- Global category inajumuisha descendants wake (categories za maduka zenye
+  `parent` = global hiyo, na kuendelea).
+
+Mapping (slug -> ids, id -> descendants) ni ndogo; inajengwa mara moja na
+kuhifadhiwa kwenye Django cache. Signals (api/signals.py) zinaifuta kila
+Category inapobadilika.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.text import slugify
+from rest_framework.exceptions import ValidationError
+
+CACHE_KEY = "api:category-tree:v2"
+
+
+def build_tree() -> dict:
+    """
+    {"slugs": {slug: [global ids...]}, "descendants": {id: [id, child ids...]}}
+    """
+    from .models import Category
+
+    children: Dict[int, List[int]] = defaultdict(list)
+    slugs: Dict[str, List[int]] = defaultdict(list)
+    ids = []
+    rows = Category.objects.values_list("id", "slug", "parent_id", "seller_id")
+    for pk, slug, parent_id, seller_id in rows:
+        ids.append(pk)
+        if slug and seller_id is None:
+            slugs[slug].append(pk)
+        if parent_id is not None:
+            children[parent_id].append(pk)
+
+    descendants: Dict[int, List[int]] = {}
+    for root in ids:
+        seen = {root}
+        stack = [root]
+        while stack:
+            for child in children.get(stack.pop(), ()):
+                if child not in seen:
+                    seen.add(child)
+                    stack.append(child)
+        descendants[root] = sorted(seen)
+
+    return {"slugs": dict(slugs), "descendants": descendants}
+
+
+def get_tree() -> dict:
+    tree = cache.get(CACHE_KEY)
+    if tree is None:
+        tree = build_tree()
+        cache.set(CACHE_KEY, tree, settings.CATEGORY_TREE_CACHE_SECONDS)
+    return tree
+
+
+def invalidate_tree() -> None:
+    cache.delete(CACHE_KEY)
+
+
+def resolve_category_ids(category=None, category_id=None) -> Optional[List[int]]:
+    """
+    Geuza `category` (slug/jina la global category) na/au `category_id` kuwa
+    category ids (pamoja na descendants). Zote mbili => ids zinazokubaliwa
+    na zote.
+
+    Inarudisha None kama zote ni tupu (hakuna filter), au [] kama hakuna
+    category inayolingana. `category_id` isiyo namba => ValidationError (400).
+    """
+    category = str(category or "").strip()
+    category_id = str(category_id or "").strip()
+    if not category and not category_id:
+        return None
+
+    tree = get_tree()
+    descendants = tree["descendants"]
+
+    ids = None
+    if category_id:
+        if not category_id.isdigit():
+            raise ValidationError({"category_id": "A valid integer is required."})
+        ids = set(descendants.get(int(category_id), ()))
+    if category:
+        matched = set()
+        for root in tree["slugs"].get(slugify(category), ()):
+            matched.update(descendants.get(root, ()))
+        ids = matched if ids is None else ids & matched
+    return sorted(ids)
+
+
+def filter_by_category(queryset, category=None, category_id=None):
+    ids = resolve_category_ids(category, category_id)
+    if ids is None:
+        return queryset
+    if not ids:
+        return queryset.none()
+    return queryset.filter(category_id__in=ids)
@@ -0,0 +1,122 @@
+# api/chat.py
+"""
+Kutuma chat message – logic moja kwa REST (POST /api/messages/) na
+WebSocket (`message.send` kwenye ChatConsumer).
+
+`send_message()` inafanya kila kitu ndani ya transaction moja:
+  - Message mpya (au ya zamani kama `client_id` imeshatumika na sender huyu
+    kwenye conversation hii; conversation nyingine => ClientIdConflict)
+  - Conversation.last_message_at
+  - presence ya sender (last_seen / last_read) + typing indicator izimwe
+  - unread counters + chat notification ya mpokeaji
+
+Broadcast kwa group "chat_<conversation_id>" inafanywa na caller
+(REST: `broadcast_message()`, WebSocket: `group_send` ya consumer) na kwa
+message mpya tu – retry haipigi group mara ya pili.
+"""
+
+from __future__ import annotations
+
+from contextlib import nullcontext
+from typing import Any, Dict, Optional, Tuple
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import IntegrityError, transaction
+
+from . import notifications, presence, unread
+from .models import Conversation, ConversationParticipantState, Message
+from .serializers import MessageSerializer
+
+CLIENT_ID_MAX_LENGTH = 64
+
+
+class ClientIdConflict(Exception):
+    """
+    `client_id` imeshatumika na sender huyu kwenye conversation nyingine.
+    """
+
+    detail = "This client_id was already used for a message in another conversation."
+
+
+def room_group(conversation_id: int) -> str:
+    return f"chat_{conversation_id}"
+
+
+def is_participant(conversation: Conversation, user) -> bool:
+    return conversation.buyer_id == user.id or conversation.seller.user_id == user.id
+
+
+def send_message(
+    conversation: Conversation,
+    sender,
+    text: str,
+    client_id: Optional[str] = None,
+) -> Tuple[Message, bool]:
+    """
+    Hifadhi message ya `sender` (lazima awe participant). Rudisha
+    (message, created); created=False => `client_id` hii ilikwisha tumwa na
+    message ya awali inarudishwa bila side effects. Kama message hiyo ya
+    awali iko kwenye conversation nyingine => ClientIdConflict.
+    """
+    client_id = client_id or None
+    with transaction.atomic():
+        try:
+            # savepoint inahitajika tu pale unique (sender, client_id) inaweza kugongana
+            with transaction.atomic() if client_id else nullcontext():
+                msg = Message.objects.create(
+                    conversation=conversation,
+                    sender=sender,
+                    text=text,
+                    status=Message.STATUS_SENT,
+                    is_read=False,
+                    client_id=client_id,
+                )
+        except IntegrityError:
+            if not client_id:
+                raise
+            try:
+                existing = Message.objects.select_related("sender__profile").get(
+                    conversation=conversation, sender=sender, client_id=client_id
+                )
+            except Message.DoesNotExist:
+                raise ClientIdConflict from None
+            return existing, False
+
+        Conversation.objects.filter(pk=conversation.pk).update(last_message_at=msg.created_at)
+
+        # sender: seen + read kupitia presence; typing indicator izimwe
+        presence.heartbeat(sender.id, conversation.id, read=True)
+        ConversationParticipantState.objects.filter(
+            conversation=conversation, user=sender, is_typing=True
+        ).update(is_typing=False)
+
+        # mpokeaji: participant mwingine
+        if sender.id == conversation.buyer_id:
+            target_user_id = conversation.seller.user_id
+        else:
+            target_user_id = conversation.buyer_id
+        unread.message_created(conversation.id, target_user_id)
+        notifications.notify_chat_message(msg, [target_user_id])
+
+    return msg, True
+
+
+def message_payload(message: Message, request=None) -> Dict[str, Any]:
+    """
+    MessageSerializer data (ile ile kwa REST response na socket frames).
+    """
+    return MessageSerializer(message, context={"request": request}).data
+
+
+def broadcast_message(conversation_id: int, payload: Dict[str, Any]) -> None:
+    """
+    Piga message kwa group ya conversation kutoka code ya sync (REST).
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(
+        room_group(conversation_id),
+        {"type": "chat.message", "message": payload},
+    )
@@ -0,0 +1,33 @@
+"""
+System checks za api.
+
+- api.E001: presence (api/presence.py), cache za nearby regions
+  (api/regions.py) na category tree (api/categories.py) zinafutwa na signals
+  kwenye cache ya default. Cache ya process moja (LocMem) => delete inagusa
+  worker aliyebadilisha data tu; wengine wanabaki na data ya zamani mpaka
+  TTL. Kwa hiyo `CACHE_REQUIRE_SHARED=True` (default DEBUG=False) inakataa
+  LocMem.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if not settings.CACHE_REQUIRE_SHARED or not isinstance(caches["default"], LocMemCache):
+        return []
+    return [
+        Error(
+            "The default cache is LocMemCache, which each worker process keeps on its own.",
+            hint=(
+                "Set CACHE_URL to a shared cache (e.g. redis://127.0.0.1:6379/1 or "
+                "dbcache://cache_table), or CACHE_REQUIRE_SHARED=False for a "
+                "single-process deployment."
+            ),
+            obj="CACHES['default']",
+            id="api.E001",
+        )
+    ]
@@ -4,26 +4,63 @@ from __future__ import annotations
 
 import logging
 from typing import Any, Dict, Optional
+from urllib.parse import parse_qs
 
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils import timezone
 
-from .models import Conversation, ConversationParticipantState
+from . import chat, notifications, presence, wire
+from .outbound import QueuedSendMixin, batching_requested
+from .models import Conversation, ConversationParticipantState, Message
+from .serializers import (
+    ConversationParticipantStateSerializer,
+    MessageCreateSerializer,
+    MessageSerializer,
+)
 
 User = get_user_model()
 logger = logging.getLogger("chat.ws")
 
 
-class ChatConsumer(AsyncJsonWebsocketConsumer):
+class ScopeRequest:
+    """
+    Sehemu ya HttpRequest inayohitajika na serializers (request.user,
+    build_absolute_uri) kwa frames zinazotengenezwa ndani ya socket.
+    """
+
+    def __init__(self, scope: Dict[str, Any]):
+        headers = dict(scope.get("headers") or [])
+        host = headers.get(b"host", b"").decode("latin1")
+        scheme = "https" if scope.get("scheme") in ("wss", "https") else "http"
+        self.user = scope.get("user")
+        self._base = f"{scheme}://{host}" if host else ""
+
+    def build_absolute_uri(self, location: str) -> str:
+        if not self._base or location.startswith(("http://", "https://")):
+            return location
+        return self._base + location
+
+
+class ChatConsumer(QueuedSendMixin, AsyncJsonWebsocketConsumer):
     """
     WebSocket consumer kwa mazungumzo ya 1-to-1 (buyer <-> seller).
 
     URL (frontend):
       ws://<host>/ws/chat/<conversation_id>/?token=<JWT_ACCESS_TOKEN>
-
+      ws://<host>/ws/chat/<conversation_id>/?token=<JWT>&last_message_id=<id>
+      ws://<host>/ws/chat/<conversation_id>/?token=<JWT>&batch=1  (frames za "batch")
+
+    - `last_message_id` (reconnect): baada ya "connection" socket inatuma
+      frame moja {"type": "resume", ...} yenye messages zenye id kubwa kuliko
+      hiyo + participant_states – hakuna haja ya kupakia conversation
+      nzima upya kwa REST.
+    - Subprotocol `meetme.compact.v1+msgpack` / `meetme.compact.v1+json`
+      (opt-in) => frames fupi, sender cards mara moja kwa connection
+      (api/wire.py). Bila hiyo => JSON ya kawaida.
     - JWTAuthMiddleware tayari inaweka scope["user"] (au AnonymousUser).
     - Hapa tunahakikisha:
         * User lazima awe authenticated.
@@ -31,6 +68,10 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
         * Kila conversation ina group yake: "chat_<conversation_id>".
         * Messages zinapigwa kwa group hii tu, kwa hiyo washiriki wengine
           hawapati chochote hata kama wana JWT halali.
+    - Frames zote baada ya accept zinapita kwenye foleni ya connection hii
+      (api/outbound.py): typing inaweza kukunjwa/kutupwa, messages hapana;
+      `?batch=1` => events kadhaa zinazosubiri zinakuwa frame moja
+      {"type": "batch", "events"}; bila hiyo event moja kwa kila frame.
     """
 
     async def connect(self) -> None:
@@ -58,6 +99,14 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             await self.close(code=4400)  # Bad request
             return
 
+        # 2b) Cursor ya reconnect (optional)
+        try:
+            last_message_id = self._last_message_id()
+        except ValueError:
+            logger.info("ChatConsumer.connect: invalid last_message_id")
+            await self.close(code=4400)  # Bad request
+            return
+
         # 3) Hakikisha user ni participant (buyer au seller.user)
         is_participant = await self._user_in_conversation(user.id, self.conversation_id)
         if not is_participant:
@@ -73,14 +122,20 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
         self.room_group_name = f"chat_{self.conversation_id}"
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
 
-        # 5) Accept WebSocket
-        await self.accept()
+        # 5) Accept WebSocket (compact encoding kama client ameiomba)
+        self.codec = wire.negotiate(self.scope.get("subprotocols"))
+        self.send_batches = batching_requested(self.scope)
+        await self.accept(subprotocol=self.codec.subprotocol if self.codec else None)
 
-        # 6) Mark messages zote kama "seen" kwa user huyu anapoingia
-        await self._mark_seen(user.id, self.conversation_id)
+        # 6) Presence: online + last_seen/last_read ya conversation hii
+        #    (cache + buffer, DB inaandikwa kwa batches – api/presence.py)
+        await database_sync_to_async(presence.connect)(
+            user.id, self.conversation_id, read=True
+        )
+        self.presence_user_id = user.id
 
         # 7) (Optional) tuma small debug event
-        await self.send_json(
+        self.push(
             {
                 "type": "connection",
                 "conversation_id": self.conversation_id,
@@ -88,6 +143,12 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             }
         )
 
+        # 8) Reconnect: messages zilizopita wakati socket ilikuwa imekatika.
+        #    Group events zinashughulikiwa baada ya connect() kurudi, kwa hiyo
+        #    resume inamfikia client kabla ya message.created yoyote mpya.
+        if last_message_id is not None:
+            self.push(await self._resume(last_message_id))
+
         logger.debug(
             "ChatConsumer.connect: user %s joined room %s",
             user.id,
@@ -106,6 +167,12 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
                 self.room_group_name,
                 self.channel_name,
             )
+        await self.stop_send_queue()
+
+        if hasattr(self, "presence_user_id"):
+            await database_sync_to_async(presence.disconnect)(
+                self.presence_user_id, self.conversation_id
+            )
 
         # Ukijua user ni halali na conversation_id ipo, sema ha-type tena
         if user and not getattr(user, "is_anonymous", True):
@@ -120,6 +187,44 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             close_code,
         )
 
+    def _last_message_id(self) -> Optional[int]:
+        """
+        ?last_message_id=<id> kutoka query string; None kama haipo.
+        """
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        values = query.get("last_message_id")
+        if not values or values[0] == "":
+            return None
+        value = int(values[0])
+        if value < 0:
+            raise ValueError(value)
+        return value
+
+    # ------------------------------------------------------------------
+    #  FRAME ENCODING (JSON ya kawaida au compact – api/wire.py)
+    # ------------------------------------------------------------------
+
+    codec: Optional[wire.CompactCodec] = None
+
+    async def send_json(self, content: Dict[str, Any], close: bool = False) -> None:
+        if self.codec is None:
+            await super().send_json(content, close=close)
+            return
+        text_data, bytes_data = self.codec.encode(content)
+        await self.send(text_data=text_data, bytes_data=bytes_data, close=close)
+
+    async def receive(self, text_data=None, bytes_data=None, **kwargs) -> None:
+        if text_data is None and bytes_data is not None and self.codec is not None:
+            try:
+                content = self.codec.decode(bytes_data)
+            except ValueError:
+                await self.close(code=4400)  # frame ya binary isiyosomeka
+                return
+            if isinstance(content, dict):
+                await self.receive_json(content, **kwargs)
+            return
+        await super().receive(text_data=text_data, bytes_data=bytes_data, **kwargs)
+
     # ------------------------------------------------------------------
     #  RECEIVE FROM CLIENT
     # ------------------------------------------------------------------
@@ -129,14 +234,21 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
         Messages zinazotumwa kutoka frontend kupitia WebSocket.
 
         Tunategemea formats zifuatazo:
-          - Ping:
+          - Ping (heartbeat ya presence – tuma kila < PRESENCE_ONLINE_SECONDS):
               { "type": "ping" }
 
           - Typing indicator:
               { "type": "typing", "is_typing": true/false }
 
-        NB: Message halisi za chat zinatumwa kupitia REST (POST /api/messages/),
-        kisha DRF inatumia channel_layer.group_send(...) kuzi-push hapa.
+          - Kutuma message (bila HTTP request):
+              { "type": "message.send", "client_id": "7f3c...", "text": "Habari" }
+            => sender anapata { "type": "message.ack", "client_id", "message",
+               "duplicate" }, kisha group nzima "message.created". client_id
+               ikitumwa tena (reconnect/retry) => ack ya message ile ile,
+               duplicate=true, bila broadcast. Kosa (validation, au client_id
+               ya conversation nyingine) => "message.error".
+
+        NB: POST /api/messages/ bado inafanya kazi (logic ile ile – api.chat).
         """
         user = self.scope.get("user")
         if not user or getattr(user, "is_anonymous", True):
@@ -145,9 +257,12 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
 
         event_type = content.get("type")
 
-        # --- ping/pong kwa test ---
+        # --- ping/pong (pia ni heartbeat ya presence) ---
         if event_type == "ping":
-            await self.send_json({"type": "pong"})
+            await database_sync_to_async(presence.heartbeat)(
+                user.id, getattr(self, "conversation_id", None)
+            )
+            self.push({"type": "pong"}, droppable=True, key="pong")
             return
 
         # --- typing over WebSocket ---
@@ -173,8 +288,51 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
                 )
             return
 
+        # --- message mpya moja kwa moja kwenye socket ---
+        if event_type == "message.send":
+            await self._receive_message(content)
+            return
+
         # future: unaweza kuongeza aina zingine kama "read_receipt" etc.
 
+    async def _receive_message(self, content: Dict[str, Any]) -> None:
+        client_id = content.get("client_id")
+        if not isinstance(client_id, str) or not client_id.strip():
+            self.push(
+                {
+                    "type": "message.error",
+                    "client_id": client_id,
+                    "errors": {"client_id": ["This field is required."]},
+                }
+            )
+            return
+
+        try:
+            payload, created, errors = await self._send_message(
+                content.get("text"), client_id
+            )
+        except Conversation.DoesNotExist:
+            await self.close(code=4404)  # conversation imefutwa
+            return
+
+        if errors:
+            self.push({"type": "message.error", "client_id": client_id, "errors": errors})
+            return
+
+        self.push(
+            {
+                "type": "message.ack",
+                "client_id": client_id,
+                "message": payload,
+                "duplicate": not created,
+            }
+        )
+        if created:
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                {"type": "chat.message", "message": payload},
+            )
+
     # ------------------------------------------------------------------
     #  EVENTS FROM BACKEND (DRF -> group_send)
     # ------------------------------------------------------------------
@@ -191,7 +349,7 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
               },
           )
 
-        Tunaipeleka kwa client kama:
+        Tunaipeleka kwa client kama (kupitia foleni – haitupwi kamwe):
 
           {
             "type": "message.created",
@@ -200,7 +358,7 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
         """
         payload = event.get("message")
 
-        await self.send_json(
+        self.push(
             {
                 "type": "message.created",
                 "message": payload,
@@ -218,17 +376,22 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             "state": { ... }
           }
 
-        Hapa tunai-pass kama ilivyo kwa frontend.
+        Hapa tunai-pass kama ilivyo kwa frontend. Ni event ya kutupika: kama
+        ya user huyu bado inasubiri kwenye foleni, mpya inaichukua nafasi.
         """
         state = event.get("state")
         if state is None:
             return
 
-        await self.send_json(
+        # socket inatuma `user_id`, REST (/typing/) inatuma `user: {"id"}`
+        user_id = state.get("user_id") or (state.get("user") or {}).get("id")
+        self.push(
             {
                 "type": "conversation.typing",
                 "state": state,
-            }
+            },
+            droppable=True,
+            key=("typing", user_id) if user_id is not None else None,
         )
 
     # ------------------------------------------------------------------
@@ -247,28 +410,70 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
         ).exists()
 
     @database_sync_to_async
-    def _mark_seen(self, user_id: int, conversation_id: int) -> None:
+    def _resume(self, last_message_id: int) -> Dict[str, Any]:
         """
-        Mark conversation kama 'imeonekana' na user huyu:
-          - last_seen_at
-          - last_read_at
-          - is_typing=False
+        Frame ya "resume": messages zenye id > last_message_id (kwa mpangilio,
+        hadi CHAT_RESUME_MAX_MESSAGES) + participant_states za sasa (typing,
+        last_seen_at, last_read_at => read receipts) – queries tatu.
+
+        has_more=True => pengo ni kubwa kuliko limit; client apakie
+        conversation kwa REST. Message iliyofika wakati wa connect inaweza
+        kuja kwenye resume na pia kama message.created – client atumie `id`
+        kuondoa marudio.
         """
-        try:
-            conv = Conversation.objects.get(id=conversation_id)
-            user = User.objects.get(id=user_id)
-        except (Conversation.DoesNotExist, User.DoesNotExist):
-            return
+        limit = settings.CHAT_RESUME_MAX_MESSAGES
+        messages = list(
+            Message.objects.filter(conversation_id=self.conversation_id, id__gt=last_message_id)
+            .select_related("sender__profile")
+            .order_by("id")[: limit + 1]
+        )
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        states = ConversationParticipantState.objects.filter(
+            conversation_id=self.conversation_id
+        ).select_related("user__profile")
 
-        ConversationParticipantState.objects.update_or_create(
-            conversation=conv,
-            user=user,
-            defaults={
-                "last_seen_at": timezone.now(),
-                "last_read_at": timezone.now(),
-                "is_typing": False,
-            },
+        context = {"request": ScopeRequest(self.scope)}
+        return {
+            "type": "resume",
+            "conversation_id": self.conversation_id,
+            "last_message_id": messages[-1].id if messages else last_message_id,
+            "has_more": has_more,
+            "messages": MessageSerializer(messages, many=True, context=context).data,
+            "participant_states": ConversationParticipantStateSerializer(
+                states, many=True, context=context
+            ).data,
+        }
+
+    @database_sync_to_async
+    def _send_message(self, text: Any, client_id: str):
+        """
+        Validation ya MessageCreateSerializer + api.chat.send_message (kama
+        REST). Rudisha (payload, created, errors).
+        """
+        serializer = MessageCreateSerializer(
+            data={
+                "conversation": self.conversation_id,
+                "text": text,
+                "client_id": client_id,
+            }
         )
+        if not serializer.is_valid():
+            if "conversation" in serializer.errors:
+                raise Conversation.DoesNotExist
+            return None, False, serializer.errors
+
+        conversation = serializer.validated_data["conversation"]
+        try:
+            msg, created = chat.send_message(
+                conversation,
+                self.scope["user"],
+                serializer.validated_data["text"],
+                client_id=serializer.validated_data["client_id"],
+            )
+        except chat.ClientIdConflict as exc:
+            return None, False, {"client_id": [exc.detail]}
+        return chat.message_payload(msg, ScopeRequest(self.scope)), created, None
 
     @database_sync_to_async
     def _set_typing(self, user_id: int, conversation_id: int, is_typing: bool) -> None:
@@ -323,3 +528,75 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             if state.last_read_at
             else None,
         }
+
+
+class NotificationConsumer(QueuedSendMixin, AsyncJsonWebsocketConsumer):
+    """
+    WebSocket ya notifications za user (orders, chat, sellers aliowafavorite).
+
+    URL (frontend):
+      ws://<host>/ws/notifications/?token=<JWT_ACCESS_TOKEN>
+
+    - Kila user ana group yake: "notifications_<user_id>".
+    - api.notifications inapiga "notification.created" (row mpya) na
+      "notification.updated" (chat notification iliyokunjwa) hapa baada ya
+      commit.
+    - Socket hii ndiyo inayoonyesha user yuko online (api.presence);
+      { "type": "ping" } ni heartbeat.
+    - Kama ChatConsumer, frames zinapita kwenye foleni (api/outbound.py).
+    """
+
+    async def connect(self) -> None:
+        user = self.scope.get("user")
+        if not user or getattr(user, "is_anonymous", True):
+            await self.close(code=4401)  # Unauthorized
+            return
+
+        self.group_name = notifications.user_group(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        self.send_batches = batching_requested(self.scope)
+        await self.accept()
+        await database_sync_to_async(presence.connect)(user.id)
+        self.presence_user_id = user.id
+        self.push({"type": "connection", "user_id": user.id})
+
+    async def disconnect(self, close_code: int) -> None:
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        await self.stop_send_queue()
+        if hasattr(self, "presence_user_id"):
+            await database_sync_to_async(presence.disconnect)(self.presence_user_id)
+
+    async def receive_json(self, content: Dict[str, Any], **kwargs: Any) -> None:
+        if content.get("type") == "ping":
+            if hasattr(self, "presence_user_id"):
+                await database_sync_to_async(presence.heartbeat)(self.presence_user_id)
+            self.push({"type": "pong"}, droppable=True, key="pong")
+
+    async def notification_created(self, event: Dict[str, Any]) -> None:
+        """
+        { "type": "notification.created", "notification": {...} }
+        """
+        self.push(
+            {
+                "type": "notification.created",
+                "notification": event.get("notification"),
+            }
+        )
+
+    async def notification_updated(self, event: Dict[str, Any]) -> None:
+        """
+        Chat notification iliyokunjwa (count/body mpya, id ile ile):
+        { "type": "notification.updated", "notification": {...} }
+
+        Update mpya ya notification ile ile inachukua nafasi ya iliyokuwa
+        bado inasubiri kwenye foleni.
+        """
+        notification = event.get("notification") or {}
+        self.push(
+            {
+                "type": "notification.updated",
+                "notification": notification,
+            },
+            key=("notification", notification.get("id")),
+        )
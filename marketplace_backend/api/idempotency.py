@@ -0,0 +1,133 @@
+# api/idempotency.py
+"""
+`Idempotency-Key` kwa endpoints zinazotengeneza data (orders, messages).
+
+Client (mf. mobile kwenye mtandao dhaifu) anatuma header
+`Idempotency-Key: <uuid>` na kila request mpya, na key ile ile kwenye kila
+retry ya request hiyo. Kwa `@idempotent("orders.create")`:
+
+- mara ya kwanza: view inaendeshwa ndani ya transaction moja pamoja na
+  INSERT ya IdempotencyKey; response ya 2xx inahifadhiwa kwenye row hiyo.
+  Response isiyo 2xx => transaction inarudishwa (rollback), key haibaki na
+  client anaweza kujaribu tena.
+- retry (user + scope + key zile zile, ndani ya IDEMPOTENCY_KEY_TTL_HOURS):
+  response iliyohifadhiwa inarudishwa (header `Idempotent-Replayed: true`)
+  bila kuendesha view – hakuna order/message/notification mpya.
+- key ile ile na body tofauti => 422.
+- requests mbili zenye key moja kwa wakati mmoja: unique constraint
+  inamzuia wa pili (anasubiri commit ya wa kwanza kisha anapata replay).
+
+Bila header, view inaendeshwa kama kawaida. Rows zilizopita TTL zinafutwa
+na `python manage.py archive_old_data` (api.retention).
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+KEY_MAX_LENGTH = 255
+
+# kwa @extend_schema(parameters=[...]) ya endpoints zinazotumia @idempotent
+HEADER_PARAMETER = OpenApiParameter(
+    HEADER,
+    OpenApiTypes.STR,
+    location=OpenApiParameter.HEADER,
+    required=False,
+    description=(
+        "Key ya kipekee (mf. UUID) kwa request hii; retry yenye key ile ile "
+        "inarudisha response ya kwanza bila kurudia side effects."
+    ),
+)
+
+
+def fingerprint(data) -> str:
+    """
+    sha256 ya body (JSON yenye keys zilizopangwa).
+    """
+    raw = json.dumps(data, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def expired_before():
+    return timezone.now() - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+
+def _replay(record: IdempotencyKey, request_fingerprint: str) -> Response:
+    if record.fingerprint != request_fingerprint:
+        return Response(
+            {"detail": f"{HEADER} was already used with a different request body."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    response = Response(record.response, status=record.status_code)
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def idempotent(scope: str):
+    """
+    Decorator ya method ya viewset (create / action). `scope` inatenganisha
+    endpoints ili key moja isigongane kati ya orders na messages.
+    """
+
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if not key:
+                return view_method(self, request, *args, **kwargs)
+            if len(key) > KEY_MAX_LENGTH:
+                return Response(
+                    {"detail": f"{HEADER} must be at most {KEY_MAX_LENGTH} characters."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            request_fingerprint = fingerprint(request.data)
+            records = IdempotencyKey.objects.filter(user=request.user, scope=scope, key=key)
+            record = records.first()
+            if record is not None:
+                if record.created_at >= expired_before():
+                    return _replay(record, request_fingerprint)
+                record.delete()  # imepita TTL => request mpya
+
+            try:
+                with transaction.atomic():
+                    with transaction.atomic():
+                        record = IdempotencyKey.objects.create(
+                            user=request.user,
+                            scope=scope,
+                            key=key,
+                            fingerprint=request_fingerprint,
+                        )
+                    response = view_method(self, request, *args, **kwargs)
+                    if not status.is_success(response.status_code):
+                        transaction.set_rollback(True)
+                        return response
+                    record.status_code = response.status_code
+                    record.response = response.data
+                    record.save(update_fields=["status_code", "response"])
+            except IntegrityError:
+                # request nyingine yenye key hii ime-commit kwanza
+                record = records.first()
+                if record is None:
+                    raise
+                return _replay(record, request_fingerprint)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,245 @@
+# api/images.py
+"""
+Image derivatives (thumbnails) kwa picha zinazopakiwa.
+
+- Kila ImageField ya "original" ina field ya pili `<field>_thumb`.
+- Baada ya save (na transaction ku-commit) tunatengeneza thumbnail yenye
+  upana maalum (settings.IMAGE_THUMB_WIDTH) kwenye worker pool, kisha
+  tunaihifadhi pembeni ya original:
+
+      products/main/shoe.jpg  ->  products/main/thumbs/shoe.jpg_w320.webp
+      products/main/shoe.png  ->  products/main/thumbs/shoe.png_w320.webp
+
+  Extension ya original inabaki kwenye jina: originals mbili tofauti
+  hazipati thumbnail moja. Rows zinazoshiriki original moja zinashiriki
+  thumbnail yake pia, kwa hiyo file linafutwa tu kama hakuna row nyingine
+  inayolitumia (`thumbnail_in_use`).
+- WebP inatumika kama Pillow ina support yake, vinginevyo JPEG.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from .models import Product, ProductImage, SellerProfile, UserProfile
+
+logger = logging.getLogger("api.images")
+
+# model -> [(source field, thumb field), ...]
+THUMBNAIL_FIELDS: Dict[type, List[Tuple[str, str]]] = {
+    Product: [("image", "image_thumb")],
+    ProductImage: [("image", "image_thumb")],
+    SellerProfile: [("logo", "logo_thumb"), ("shop_image", "shop_image_thumb")],
+    UserProfile: [("avatar", "avatar_thumb")],
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_THUMB_WORKERS,
+                thread_name_prefix="thumbs",
+            )
+        return _executor
+
+
+def thumbnail_format() -> Tuple[str, str]:
+    """
+    Rudisha (PIL format, file extension) ya thumbnails.
+    """
+    if features.check("webp"):
+        return "WEBP", "webp"
+    return "JPEG", "jpg"
+
+
+def thumbnail_name(source_name: str, width: Optional[int] = None) -> str:
+    """
+    Jina la thumbnail kwa original fulani (deterministic, pembeni ya
+    original). Jina zima la original (pamoja na extension) linabaki, ili
+    `shoe.jpg` na `shoe.png` zisigongane.
+    """
+    width = width or settings.IMAGE_THUMB_WIDTH
+    _, ext = thumbnail_format()
+    directory, filename = os.path.split(source_name)
+    return f"{directory}/thumbs/{filename}_w{width}.{ext}".lstrip("/")
+
+
+def thumbnail_in_use(name: str, model: Optional[type] = None, pk: Optional[int] = None) -> bool:
+    """
+    Kuna row nyingine (yoyote kwenye THUMBNAIL_FIELDS, isipokuwa model/pk)
+    inayotumia file hili kama thumbnail?
+    """
+    for other, fields in THUMBNAIL_FIELDS.items():
+        queryset = other.objects.all()
+        if other is model and pk is not None:
+            queryset = queryset.exclude(pk=pk)
+        for _, thumb_field in fields:
+            if queryset.filter(**{thumb_field: name}).exists():
+                return True
+    return False
+
+
+def _delete_unused(storage, name: str, model: type, pk: int) -> None:
+    if name and storage.exists(name) and not thumbnail_in_use(name, model, pk):
+        storage.delete(name)
+
+
+def render_thumbnail(fp, width: int) -> bytes:
+    """
+    Punguza picha hadi upana `width` (aspect ratio inabaki, hatuongezi ukubwa).
+    """
+    pil_format, _ = thumbnail_format()
+
+    with Image.open(fp) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.LANCZOS)
+
+        if pil_format == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA", "L"):
+            img = img.convert("RGBA")
+
+        save_kwargs = {"quality": 80}
+        if pil_format == "WEBP":
+            save_kwargs["method"] = 4
+        else:
+            save_kwargs["optimize"] = True
+
+        out = BytesIO()
+        img.save(out, format=pil_format, **save_kwargs)
+        return out.getvalue()
+
+
+def generate_thumbnail(
+    model: type,
+    pk: int,
+    source_field: str,
+    thumb_field: str,
+    force: bool = False,
+) -> Optional[str]:
+    """
+    Tengeneza thumbnail moja na u-update row husika.
+
+    Inarudisha jina la thumbnail (au None kama hakuna original).
+    """
+    instance = model.objects.filter(pk=pk).only("pk", source_field, thumb_field).first()
+    if instance is None:
+        return None
+
+    source = getattr(instance, source_field)
+    current_thumb = getattr(instance, thumb_field)
+
+    if not source:
+        if current_thumb:
+            model.objects.filter(pk=pk).update(**{thumb_field: None})
+        return None
+
+    expected = thumbnail_name(source.name)
+    storage = current_thumb.storage
+    if (
+        not force
+        and current_thumb.name == expected
+        and storage.exists(expected)
+    ):
+        return expected
+
+    try:
+        with source.open("rb") as fp:
+            data = render_thumbnail(fp, settings.IMAGE_THUMB_WIDTH)
+    except (FileNotFoundError, UnidentifiedImageError, OSError) as exc:
+        logger.warning(
+            "Thumbnail failed for %s #%s.%s (%s): %s",
+            model.__name__,
+            pk,
+            source_field,
+            source.name,
+            exc,
+        )
+        return None
+
+    # `expected` inatokana na jina la original hii tu – kama lipo, ni
+    # thumbnail ya original ile ile (row nyingine au run iliyopita), kwa
+    # hiyo kuiandika upya ni salama hata kama rows nyingine zinaitumia
+    if storage.exists(expected):
+        storage.delete(expected)
+    saved_name = storage.save(expected, ContentFile(data))
+
+    # usi-overwrite kama original imebadilika wakati tunafanya kazi
+    updated = model.objects.filter(pk=pk, **{source_field: source.name}).update(
+        **{thumb_field: saved_name}
+    )
+    if not updated:
+        _delete_unused(storage, saved_name, model, pk)
+        return None
+
+    old_thumb = current_thumb.name
+    if old_thumb and old_thumb != saved_name:
+        _delete_unused(storage, old_thumb, model, pk)
+
+    return saved_name
+
+
+def _run_job(model, pk, source_field, thumb_field, force=False):
+    try:
+        return generate_thumbnail(model, pk, source_field, thumb_field, force=force)
+    except Exception:  # noqa: BLE001
+        logger.exception(
+            "Thumbnail job crashed for %s #%s.%s", model.__name__, pk, source_field
+        )
+        return None
+    finally:
+        # worker threads zina DB connections zao – tuzifunge
+        connections.close_all()
+
+
+def submit_thumbnail(model, pk, source_field, thumb_field, force=False):
+    """
+    Peleka job kwenye worker pool (inarudisha Future).
+    """
+    return _get_executor().submit(_run_job, model, pk, source_field, thumb_field, force)
+
+
+def schedule_thumbnails(instance) -> None:
+    """
+    Inaitwa na post_save: panga thumbnails kwa fields ambazo original
+    imebadilika (au thumbnail haipo bado).
+    """
+    model = type(instance)
+    for source_field, thumb_field in THUMBNAIL_FIELDS.get(model, []):
+        source = getattr(instance, source_field)
+        thumb = getattr(instance, thumb_field)
+
+        if source and thumb and thumb.name == thumbnail_name(source.name):
+            continue
+        if not source and not thumb:
+            continue
+
+        if settings.IMAGE_THUMB_ASYNC:
+            transaction.on_commit(
+                lambda f=source_field, t=thumb_field, pk=instance.pk: submit_thumbnail(
+                    model, pk, f, t
+                )
+            )
+        else:
+            transaction.on_commit(
+                lambda f=source_field, t=thumb_field, pk=instance.pk: generate_thumbnail(
+                    model, pk, f, t
+                )
+            )
@@ -0,0 +1,380 @@
+# api/instrumentation.py
+"""
+Vipimo vya kila request: idadi ya queries, muda wa DB, muda wa serializers,
+ukubwa wa response na muda wote.
+
+- RequestMetricsMiddleware ina-weka `Server-Timing` header (inaonekana
+  kwenye browser devtools) na kukusanya takwimu kwa kila endpoint
+  (view_name + method) – /api/stats/requests/ (admin tu).
+- Request yenye queries zaidi ya REQUEST_METRICS_QUERY_THRESHOLD inaandikwa
+  kwenye log ("api.instrumentation") – hapo ndipo N+1 za serializers
+  zinaonekana.
+- Muda wa serializers unapimwa ndani ya request tu: serializers za
+  `get_serializer()` (SerializerTimingMixin kwenye viewsets), JSON render
+  (TimedJSONRenderer) na rows za StreamingJSONResponse. Hakuna class ya
+  DRF inayobadilishwa – management commands, admin na schema generation
+  haziguswi.
+- Execute wrapper inaunganishwa kwenye connections kwa muda wa view tu.
+  StreamingJSONResponse inazalisha rows baada ya view kurudi; kila chunk
+  inapimwa peke yake (`measure_stream`) na kuhesabiwa kama `stream_*`.
+  Kati ya chunks hakuna wrapper – queries za requests nyingine kwenye
+  thread/connection ile ile (ASGI) hazihesabiwi kwa request hii.
+
+Takwimu ziko kwenye memory ya process hii tu (kila worker ana zake).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger("api.instrumentation")
+
+_current: ContextVar[Optional["RequestMetrics"]] = ContextVar(
+    "api_request_metrics", default=None
+)
+
+
+class RequestMetrics:
+    __slots__ = (
+        "started",
+        "queries",
+        "db_time",
+        "serializer_time",
+        "stream_queries",
+        "stream_db_time",
+        "stream_time",
+        "_serializer_depth",
+        "_streaming",
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.stream_queries = 0
+        self.stream_db_time = 0.0
+        self.stream_time = 0.0
+        self._serializer_depth = 0
+        self._streaming = False
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        connection.execute_wrapper – inahesabu kila query na muda wake.
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            if self._streaming:
+                self.stream_db_time += elapsed
+                self.stream_queries += 1
+            else:
+                self.db_time += elapsed
+                self.queries += 1
+
+    @contextmanager
+    def attached(self, streaming: bool = False):
+        """
+        Unganisha wrapper kwenye connections za thread hii (na `_current`)
+        kwa muda wa block tu.
+        """
+        wrapped = list(connections.all())
+        for conn in wrapped:
+            conn.execute_wrappers.append(self)
+        token = _current.set(self)
+        self._streaming = streaming
+        try:
+            yield
+        finally:
+            self._streaming = False
+            _current.reset(token)
+            for conn in wrapped:
+                conn.execute_wrappers.remove(self)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+@contextmanager
+def measure_serializer():
+    """
+    Ongeza muda wa block hii kwenye serializer_time ya request ya sasa.
+
+    Serializer ndani ya serializer (mf. SerializerMethodField inayoita
+    `.data` ya serializer nyingine) haihesabiwi mara mbili.
+    """
+    metrics = _current.get()
+    if metrics is None or metrics._serializer_depth:
+        yield
+        return
+
+    metrics._serializer_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_time += time.perf_counter() - start
+        metrics._serializer_depth -= 1
+
+
+def measure_stream(blocks: Iterator[bytes]) -> Iterator[bytes]:
+    """
+    Iterator ya streaming response iliyoundwa ndani ya view: kila chunk
+    inazalishwa wrapper ikiwa imeunganishwa (kwenye thread inayovuta chunk –
+    thread ya DB chini ya ASGI) na muda wake unaongezwa kwenye stream_time.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return blocks
+    return _measured_stream(metrics, blocks)
+
+
+def _measured_stream(metrics: RequestMetrics, blocks: Iterator[bytes]) -> Iterator[bytes]:
+    sentinel = object()
+    try:
+        while True:
+            start = time.perf_counter()
+            with metrics.attached(streaming=True):
+                block = next(blocks, sentinel)
+            metrics.stream_time += time.perf_counter() - start
+            if block is sentinel:
+                return
+            yield block
+    finally:
+        # client akikata mapema – cursor ya queryset ifungwe sasa, si kwa GC
+        close = getattr(blocks, "close", None)
+        if close is not None:
+            close()
+
+
+def _timed(fn):
+    def timed(*args, **kwargs):
+        with measure_serializer():
+            return fn(*args, **kwargs)
+
+    return timed
+
+
+class SerializerTimingMixin:
+    """
+    GenericAPIView/ViewSet: serializer inayorudishwa na get_serializer()
+    inapimwa (`.data` => to_representation) kama request hii ina metrics.
+    Ni kwa instance hii tu – class ya serializer haibadiliki.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if _current.get() is not None:
+            serializer.to_representation = _timed(serializer.to_representation)
+        return serializer
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer inayoongeza muda wa render kwenye serializer_time (views
+    zote, pamoja na @api_view zinazojenga serializers zenyewe).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with measure_serializer():
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+# =========================
+#  AGGREGATED STATS (per endpoint)
+# =========================
+
+class EndpointStats:
+    __slots__ = (
+        "requests",
+        "flagged",
+        "queries",
+        "max_queries",
+        "db_time",
+        "serializer_time",
+        "stream_queries",
+        "stream_db_time",
+        "stream_time",
+        "total_time",
+        "max_time",
+        "bytes",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.flagged = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.stream_queries = 0
+        self.stream_db_time = 0.0
+        self.stream_time = 0.0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.bytes = 0
+
+    def as_dict(self, endpoint: str) -> dict:
+        n = self.requests or 1
+        return {
+            "endpoint": endpoint,
+            "requests": self.requests,
+            "flagged": self.flagged,
+            "avg_queries": round(self.queries / n, 2),
+            "max_queries": self.max_queries,
+            "avg_db_ms": round(self.db_time * 1000 / n, 2),
+            "avg_serializer_ms": round(self.serializer_time * 1000 / n, 2),
+            "avg_stream_queries": round(self.stream_queries / n, 2),
+            "avg_stream_db_ms": round(self.stream_db_time * 1000 / n, 2),
+            "avg_stream_ms": round(self.stream_time * 1000 / n, 2),
+            "avg_total_ms": round(self.total_time * 1000 / n, 2),
+            "max_total_ms": round(self.max_time * 1000, 2),
+            "avg_bytes": int(self.bytes / n),
+        }
+
+
+_stats: Dict[str, EndpointStats] = {}
+_stats_lock = Lock()
+
+
+def _record(endpoint: str, metrics: RequestMetrics, total: float, size: int, flagged: bool):
+    with _stats_lock:
+        stats = _stats.get(endpoint)
+        if stats is None:
+            stats = _stats[endpoint] = EndpointStats()
+        stats.requests += 1
+        stats.flagged += int(flagged)
+        stats.queries += metrics.queries
+        stats.max_queries = max(stats.max_queries, metrics.queries)
+        stats.db_time += metrics.db_time
+        stats.serializer_time += metrics.serializer_time
+        stats.stream_queries += metrics.stream_queries
+        stats.stream_db_time += metrics.stream_db_time
+        stats.stream_time += metrics.stream_time
+        stats.total_time += total
+        stats.max_time = max(stats.max_time, total)
+        stats.bytes += size
+
+
+def snapshot(order_by: str = "avg_queries") -> List[dict]:
+    with _stats_lock:
+        rows = [stats.as_dict(endpoint) for endpoint, stats in _stats.items()]
+    rows.sort(key=lambda row: row.get(order_by, 0), reverse=True)
+    return rows
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+# =========================
+#  MIDDLEWARE
+# =========================
+
+def _endpoint_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return f"{request.method} <unresolved>"
+    return f"{request.method} {match.view_name or match.route}"
+
+
+def _server_timing(metrics: RequestMetrics, total: float) -> str:
+    return ", ".join(
+        [
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+            f"ser;dur={metrics.serializer_time * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        ]
+    )
+
+
+class RequestMetricsMiddleware:
+    """
+    Weka MAPEMA kwenye MIDDLEWARE (baada ya SecurityMiddleware) ili muda wote
+    wa request uhesabiwe.
+
+    Wrapper inaondolewa view ikirudi. StreamingHttpResponse: header ina
+    vipimo vya view tu; rows zinazo-stream (measure_stream) zinahesabiwa
+    kama stream_* na takwimu zinaandikwa response ikifungwa
+    (response.close()).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REQUEST_METRICS_ENABLED:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        try:
+            with metrics.attached():
+                response = self.get_response(request)
+        except Exception:
+            self._report(request, metrics, 0)
+            raise
+
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response["Server-Timing"] = _server_timing(metrics, metrics.elapsed())
+
+        if response.streaming:
+            # ukubwa wa stream haujulikani mapema – bytes hazihesabiwi
+            self._report_on_close(request, response, metrics)
+        else:
+            self._report(request, metrics, len(response.content))
+        return response
+
+    def _report_on_close(self, request, response, metrics: RequestMetrics) -> None:
+        close = response.close
+        reported = False
+
+        def close_and_report():
+            nonlocal reported
+            try:
+                close()
+            finally:
+                if not reported:
+                    reported = True
+                    self._report(request, metrics, 0)
+
+        response.close = close_and_report
+
+    def _report(self, request, metrics: RequestMetrics, size: int) -> None:
+        total = metrics.elapsed()
+        endpoint = _endpoint_name(request)
+        threshold = settings.REQUEST_METRICS_QUERY_THRESHOLD
+        queries = metrics.queries + metrics.stream_queries
+        flagged = bool(threshold) and queries > threshold
+
+        _record(endpoint, metrics, total, size, flagged)
+
+        if flagged:
+            logger.warning(
+                "%s %s: %d queries (threshold %d, %d streamed), db=%.1fms "
+                "serializer=%.1fms stream=%.1fms total=%.1fms",
+                endpoint,
+                request.get_full_path(),
+                queries,
+                threshold,
+                metrics.stream_queries,
+                (metrics.db_time + metrics.stream_db_time) * 1000,
+                metrics.serializer_time * 1000,
+                metrics.stream_time * 1000,
+                total * 1000,
+            )
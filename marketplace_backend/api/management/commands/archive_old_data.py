@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import retention
+
+
+class Command(BaseCommand):
+    """
+    Hamisha notifications zilizosomwa za zamani na messages za conversations
+    zilizofungwa kwenda archive (JSONL.gz), kwa batches (api/retention.py).
+    Idempotency keys zilizopita TTL zinafutwa pia.
+
+        python manage.py archive_old_data --dry-run
+        python manage.py archive_old_data
+        python manage.py archive_old_data --notification-days 30 --batch-size 500
+        python manage.py archive_old_data --interval 3600     # scheduler ndani ya process
+
+    Cron (kila usiku, 02:00):
+        0 2 * * * cd /srv/marketplace_backend && python manage.py archive_old_data
+    """
+
+    help = "Archive old read notifications and messages of idle conversations to JSONL.gz."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--notification-days",
+            type=int,
+            default=None,
+            help="Archive read notifications older than N days (default RETENTION_NOTIFICATION_DAYS, 0 = skip).",
+        )
+        parser.add_argument(
+            "--idle-days",
+            type=int,
+            default=None,
+            help="Archive messages of conversations idle for N days (default RETENTION_CONVERSATION_IDLE_DAYS, 0 = skip).",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--archive-dir", default=None)
+        parser.add_argument(
+            "--pause-ms",
+            type=int,
+            default=None,
+            help="Sleep between batches (default RETENTION_BATCH_PAUSE_MS).",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would move.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep running every N seconds (0 = run once and exit).",
+        )
+
+    def handle(self, *args, **options):
+        pause = options["pause_ms"] / 1000 if options["pause_ms"] is not None else None
+        while True:
+            started = time.perf_counter()
+            results = retention.run_retention(
+                notification_days=options["notification_days"],
+                idle_days=options["idle_days"],
+                batch_size=options["batch_size"],
+                archive_dir=options["archive_dir"],
+                pause=pause,
+                dry_run=options["dry_run"],
+            )
+            for result in results:
+                self.stdout.write(str(result))
+            self.stdout.write(f"Done in {time.perf_counter() - started:.1f}s")
+
+            if options["interval"] <= 0:
+                return
+            time.sleep(options["interval"])
@@ -0,0 +1,63 @@
+from concurrent.futures import wait
+
+from django.core.management.base import BaseCommand
+
+from api.images import THUMBNAIL_FIELDS, submit_thumbnail
+
+
+class Command(BaseCommand):
+    """
+    Tengeneza thumbnails kwa media iliyopo (uploads za zamani / fixtures).
+
+        python manage.py backfill_thumbnails
+        python manage.py backfill_thumbnails --model product --force
+    """
+
+    help = "Generate missing thumbnails for existing product, shop and avatar images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            choices=sorted(m.__name__.lower() for m in THUMBNAIL_FIELDS),
+            help="Limit to one model (can be repeated).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate thumbnails even if they already exist.",
+        )
+
+    def handle(self, *args, **options):
+        only = set(options["model"] or [])
+        force = options["force"]
+
+        futures = []
+        for model, pairs in THUMBNAIL_FIELDS.items():
+            if only and model.__name__.lower() not in only:
+                continue
+
+            for source_field, thumb_field in pairs:
+                pks = (
+                    model.objects.exclude(**{source_field: ""})
+                    .exclude(**{f"{source_field}__isnull": True})
+                    .values_list("pk", flat=True)
+                    .iterator()
+                )
+                for pk in pks:
+                    futures.append(
+                        (
+                            model.__name__,
+                            source_field,
+                            submit_thumbnail(model, pk, source_field, thumb_field, force),
+                        )
+                    )
+
+        wait([f for _, _, f in futures])
+
+        done = sum(1 for _, _, f in futures if f.result())
+        failed = len(futures) - done
+        self.stdout.write(
+            self.style.SUCCESS(f"Thumbnails ready: {done}")
+            + (self.style.WARNING(f" (failed/skipped: {failed})") if failed else "")
+        )
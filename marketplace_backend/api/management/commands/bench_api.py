@@ -0,0 +1,120 @@
+import random
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from api.benchmarks import report
+from api.benchmarks.scenarios import SCENARIOS
+from api.benchmarks.seed import SCALES, seed
+
+
+class Command(BaseCommand):
+    """
+    Load-test / benchmark suite ya API + WebSocket.
+
+    Ina-tengeneza test database ya muda (kama `manage.py test`), ina-seed data
+    (deterministic kwa --seed), inaendesha scenarios na kuripoti
+    p50/p95/p99 + queries kwa request. DB yako haiguswi.
+
+        python manage.py bench_api
+        python manage.py bench_api --scale medium --iterations 200
+        python manage.py bench_api --write-baseline api/benchmarks/baseline.json
+        python manage.py bench_api --baseline api/benchmarks/baseline.json --fail-on-regression
+    """
+
+    help = "Run the seeded API/WebSocket benchmark scenarios and report latency percentiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=sorted(SCENARIOS),
+            help="Scenario to run (repeatable). Default: all.",
+        )
+        parser.add_argument("--baseline", help="Baseline JSON to compare against.")
+        parser.add_argument("--write-baseline", help="Write results as a new baseline JSON.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Allowed p95 slowdown vs baseline (0.25 = 25%%).",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with status 1 if a regression is found against --baseline.",
+        )
+
+    def handle(self, *args, **options):
+        names = options["scenario"] or list(SCENARIOS)
+        scale = SCALES[options["scale"]]
+        baseline = None
+        if options["baseline"]:
+            try:
+                baseline = report.load_baseline(options["baseline"])
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read baseline: {exc}")
+
+        bench_settings = override_settings(
+            DEBUG=False,
+            REQUEST_METRICS_ENABLED=True,
+            REQUEST_METRICS_SERVER_TIMING=True,
+            REQUEST_METRICS_QUERY_THRESHOLD=0,
+            IMAGE_THUMB_ASYNC=False,
+            # test DB ni ya "default" tu – replica isisomwe
+            DATABASE_READ_REPLICA="",
+        )
+
+        with bench_settings:
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            try:
+                started = time.perf_counter()
+                dataset = seed(scale, options["seed"])
+                self.stdout.write(
+                    f"Seeded ({options['scale']}, seed={options['seed']}) in "
+                    f"{time.perf_counter() - started:.1f}s: "
+                    + ", ".join(f"{k}={v}" for k, v in dataset.counts.items())
+                )
+
+                results = []
+                for name in names:
+                    rng = random.Random(f"{options['seed']}:{name}")
+                    scenario = SCENARIOS[name](dataset, rng)
+                    results.append(scenario.run(options["iterations"], options["warmup"]))
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write("")
+        self.stdout.write(report.format_table(results))
+
+        if options["write_baseline"]:
+            meta = {
+                "scale": options["scale"],
+                "seed": options["seed"],
+                "iterations": options["iterations"],
+                "counts": dataset.counts,
+            }
+            report.write_baseline(options["write_baseline"], report.build_baseline(results, meta))
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['write_baseline']}"))
+
+        if baseline is not None:
+            self.stdout.write("")
+            self.stdout.write(report.format_comparison(results, baseline))
+            problems = report.compare(results, baseline, options["tolerance"])
+            if problems:
+                self.stdout.write(self.style.WARNING("Regressions:"))
+                for problem in problems:
+                    self.stdout.write(f"  - {problem}")
+                if options["fail_on_regression"]:
+                    sys.exit(1)
+            else:
+                self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
@@ -0,0 +1,130 @@
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from api.models import Location, Product, SellerProfile
+from api.serializers import ProductSerializer
+from api.streaming import iter_json_array
+from api.views import ProductViewSet
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    """
+    Memory benchmark ya /api/products/ (full catalog, bila pagination).
+
+    Inalinganisha (queryset ile ile ya view – with_stats):
+      - in-memory: ProductSerializer(list(qs), many=True) + JSONRenderer
+      - streaming: iter_json_array(qs.iterator(chunk_size=...))
+
+    Muda unapimwa kwenye run isiyo na tracemalloc; peak kwenye run ya pili.
+
+    Data ya benchmark ina-seed ndani ya transaction na kufutwa (rollback)
+    mwishoni, kwa hiyo DB yako haiguswi.
+
+        python manage.py bench_catalog_export --rows 1000 --rows 10000
+    """
+
+    help = "Compare peak memory of in-memory vs streaming product list rendering."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            action="append",
+            type=int,
+            help="Catalog size to benchmark (repeatable). Default: 1000, 5000.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        sizes = options["rows"] or [1000, 5000]
+        chunk_size = options["chunk_size"]
+
+        self.stdout.write(
+            f"{'rows':>8}  {'in-memory peak':>15}  {'streaming peak':>15}  "
+            f"{'in-memory s':>11}  {'streaming s':>11}"
+        )
+
+        for rows in sizes:
+            try:
+                # DEBUG=False: query log ya Django isijaze memory wakati wa kupima
+                with override_settings(DEBUG=False), transaction.atomic():
+                    self._seed(rows)
+                    result = self._measure(chunk_size)
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+            (mem_peak, mem_time), (stream_peak, stream_time) = result
+            self.stdout.write(
+                f"{rows:>8}  {mem_peak / 1e6:>12.1f} MB  {stream_peak / 1e6:>12.1f} MB  "
+                f"{mem_time:>11.2f}  {stream_time:>11.2f}"
+            )
+
+    def _seed(self, rows):
+        user = User.objects.create_user(username="bench_catalog_seller", password="x")
+        seller = SellerProfile.objects.create(user=user, business_name="Bench Shop")
+        Location.objects.create(
+            seller=seller,
+            address="Bench street",
+            city="Dar es Salaam",
+            country="Tanzania",
+            latitude=Decimal("-6.79235400"),
+            longitude=Decimal("39.20832800"),
+        )
+        Product.objects.bulk_create(
+            [
+                Product(
+                    seller=seller,
+                    name=f"Bench product {i}",
+                    description="Lorem ipsum dolor sit amet " * 8,
+                    price=Decimal("1000.00") + i,
+                    currency="TZS",
+                    stock_quantity=10,
+                )
+                for i in range(rows)
+            ],
+            batch_size=1000,
+        )
+
+    def _measure(self, chunk_size):
+        request = APIRequestFactory().get("/api/products/")
+        context = {"request": request}
+
+        def in_memory():
+            qs = ProductViewSet.queryset.with_stats()
+            data = ProductSerializer(list(qs), many=True, context=context).data
+            JSONRenderer().render(data)
+
+        def streaming():
+            qs = ProductViewSet.queryset.with_stats()
+            for _ in iter_json_array(qs, ProductSerializer, context, chunk_size):
+                pass
+
+        return self._trace(in_memory), self._trace(streaming)
+
+    @staticmethod
+    def _trace(fn):
+        # muda unapimwa bila tracemalloc: tracing inafanya kila allocation
+        # iwe ghali na ingeonyesha export polepole mara kadhaa kuliko ilivyo
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        try:
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak, elapsed
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from api.benchmarks import writers
+from api.benchmarks.seed import SCALES, seed
+
+# profile => (SQLITE_PRAGMAS_ENABLED, CONN_MAX_AGE au None = kama settings)
+PROFILES = {
+    "baseline": (False, 0),
+    "tuned": (True, None),
+}
+
+
+class Command(BaseCommand):
+    """
+    Throughput ya API chini ya writers wengi kwa wakati mmoja.
+
+    Kwa kila profile ina-tengeneza test database mpya (SQLite: file ya muda,
+    si memory, ili locking/WAL ipimwe kweli), ina-seed data na kuendesha
+    writers (messages + orders) na readers (inbox) kwenye threads.
+
+    - baseline: bila PRAGMAs, CONN_MAX_AGE=0 (connection mpya kila request)
+    - tuned:    PRAGMAs za SQLITE_* + CONN_MAX_AGE/health checks za settings
+
+        python manage.py bench_db_writers
+        python manage.py bench_db_writers --writers 16 --readers 4 --requests 100
+        DATABASE_URL=postgres://... python manage.py bench_db_writers --profile tuned
+    """
+
+    help = "Measure request throughput with concurrent writers for each DB profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8)
+        parser.add_argument("--readers", type=int, default=2)
+        parser.add_argument("--requests", type=int, default=40, help="Requests per writer.")
+        parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--profile",
+            action="append",
+            choices=sorted(PROFILES),
+            help="Profile to run (repeatable). Default: all.",
+        )
+
+    def handle(self, *args, **options):
+        names = options["profile"] or list(PROFILES)
+        db = connection.settings_dict
+        original_age = db["CONN_MAX_AGE"]
+        original_test_name = db["TEST"].get("NAME")
+
+        results = []
+        with tempfile.TemporaryDirectory() as tmp:
+            if connection.vendor == "sqlite":
+                db["TEST"]["NAME"] = os.path.join(tmp, "bench_writers.sqlite3")
+            try:
+                for name in names:
+                    pragmas, max_age = PROFILES[name]
+                    db["CONN_MAX_AGE"] = original_age if max_age is None else max_age
+                    with override_settings(
+                        DEBUG=False,
+                        SQLITE_PRAGMAS_ENABLED=pragmas,
+                        REQUEST_METRICS_ENABLED=False,
+                        IMAGE_THUMB_ASYNC=False,
+                        # test DB ni ya "default" tu – replica isisomwe
+                        DATABASE_READ_REPLICA="",
+                    ):
+                        results.append(self._run_profile(name, options))
+            finally:
+                db["CONN_MAX_AGE"] = original_age
+                db["TEST"]["NAME"] = original_test_name
+
+        self.stdout.write("")
+        self.stdout.write(writers.format_profiles(results))
+        error = writers.first_error(results)
+        if error:
+            self.stdout.write(self.style.WARNING(f"First error: {error}"))
+
+    def _run_profile(self, name, options):
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        try:
+            dataset = seed(SCALES[options["scale"]], options["seed"])
+            # threads zinafungua connections zao; ya main thread isishike lock
+            connection.close()
+            started = time.perf_counter()
+            result = writers.run_profile(
+                name,
+                dataset,
+                options["writers"],
+                options["readers"],
+                options["requests"],
+            )
+            self.stdout.write(
+                f"{name}: {options['writers']} writers x {options['requests']} requests, "
+                f"{options['readers']} readers in {time.perf_counter() - started:.1f}s "
+                f"({settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1]})"
+            )
+            return result
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
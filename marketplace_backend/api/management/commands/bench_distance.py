@@ -0,0 +1,102 @@
+import random
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from api import utils
+
+
+class Command(BaseCommand):
+    """
+    Benchmark ya hesabu ya umbali (haversine) kwa points nyingi – bila DB.
+
+    Inalinganisha:
+      - scalar:  haversine_distance() mara moja kwa kila point
+      - python:  loop ya haversine_many kwa lists ndogo (origin iliyohesabiwa)
+      - numpy:   haversine_many() vectorized
+      - add_distance (scalar / batch): add_distance_to_queryset kwa objects
+        zenye latitude/longitude za Decimal (kama Location) – pamoja na
+        Decimal ya kila `obj.distance`
+
+        python manage.py bench_distance
+        python manage.py bench_distance --points 10000 --points 100000 --repeat 5
+    """
+
+    help = "Compare scalar vs batched (NumPy) haversine distance computation."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--points",
+            action="append",
+            type=int,
+            help="Number of points (repeatable). Default: 10000, 100000.",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="Best of N runs.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        sizes = options["points"] or [10000, 100000]
+        repeat = max(options["repeat"], 1)
+        rng = random.Random(options["seed"])
+
+        origin = (-6.7924, 39.2083)  # Dar es Salaam
+        self.stdout.write(
+            f"{'points':>8}  {'scalar ms':>10}  {'python ms':>10}  {'numpy ms':>10}  "
+            f"{'speedup':>8}  {'add_distance scalar ms':>23}  {'add_distance batch ms':>22}"
+        )
+
+        for size in sizes:
+            latitudes = [rng.uniform(-11.7, -1.0) for _ in range(size)]
+            longitudes = [rng.uniform(29.3, 40.4) for _ in range(size)]
+            objects = [
+                SimpleNamespace(latitude=Decimal(f"{lat:.8f}"), longitude=Decimal(f"{lng:.8f}"))
+                for lat, lng in zip(latitudes, longitudes)
+            ]
+
+            scalar = self._best(
+                repeat,
+                lambda: [
+                    utils.haversine_distance(*origin, lat, lng)
+                    for lat, lng in zip(latitudes, longitudes)
+                ],
+            )
+            python = self._best(
+                repeat, lambda: utils._haversine_many_python(*origin, latitudes, longitudes)
+            )
+            numpy = self._best(
+                repeat, lambda: utils.haversine_many(*origin, latitudes, longitudes)
+            )
+            add_scalar = self._best(repeat, lambda: self._scalar_add_distance(objects, *origin))
+            add_batch = self._best(
+                repeat, lambda: utils.add_distance_to_queryset(objects, *origin)
+            )
+
+            self.stdout.write(
+                f"{size:>8}  {scalar * 1000:>10.1f}  {python * 1000:>10.1f}  {numpy * 1000:>10.1f}  "
+                f"{scalar / numpy:>7.1f}x  {add_scalar * 1000:>23.1f}  {add_batch * 1000:>22.1f}"
+            )
+
+    @staticmethod
+    def _best(repeat, fn) -> float:
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    @staticmethod
+    def _scalar_add_distance(objects, user_lat, user_lon):
+        """
+        add_distance_to_queryset ya zamani (haversine_distance kwa kila object).
+        """
+        results = []
+        for obj in objects:
+            lat, lon = utils._get_object_coordinates(obj)
+            distance = utils.haversine_distance(user_lat, user_lon, lat, lon)
+            obj.distance = Decimal(str(round(distance, 2)))
+            results.append(obj)
+        return results
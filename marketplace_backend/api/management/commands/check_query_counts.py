@@ -0,0 +1,104 @@
+import sys
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from api import categories
+from api.benchmarks import query_counts
+from api.benchmarks.seed import SCALES, seed
+
+
+class Command(BaseCommand):
+    """
+    Query-count regression check kwa kila action ya viewsets (products,
+    sellers, conversations, messages, orders, notifications, favorites,
+    product-likes).
+
+    Ina-tengeneza test database ya muda; kwa kila scale ina-flush, ina-seed
+    data na kuendesha cases zote za api/benchmarks/query_counts.py. Inashindwa
+    (exit 1) kama case imezidi max_queries yake au queries zimeongezeka
+    scale ikiongezeka – yaani N+1 mpya. DB yako haiguswi.
+
+        python manage.py check_query_counts
+        python manage.py check_query_counts --scale small --scale large
+        python manage.py check_query_counts --viewset conversations
+    """
+
+    help = "Assert per-action query upper bounds that do not grow with data size."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            action="append",
+            choices=sorted(SCALES),
+            help="Scale to seed (repeatable, smallest first). Default: small, medium.",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--viewset",
+            action="append",
+            choices=sorted({case.viewset for case in query_counts.CASES}),
+            help="Only run cases for this viewset (repeatable).",
+        )
+
+    def handle(self, *args, **options):
+        scales = options["scale"] or ["small", "medium"]
+        if len(set(scales)) != len(scales):
+            raise CommandError("Each --scale may only be given once.")
+
+        cases = query_counts.CASES
+        if options["viewset"]:
+            cases = [c for c in cases if c.viewset in options["viewset"]]
+
+        check_settings = override_settings(
+            DEBUG=False,
+            REQUEST_METRICS_ENABLED=True,
+            REQUEST_METRICS_QUERY_THRESHOLD=0,
+            IMAGE_THUMB_ASYNC=False,
+            # test DB ni ya "default" tu – replica isisomwe
+            DATABASE_READ_REPLICA="",
+        )
+
+        by_scale = {}
+        with check_settings:
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            try:
+                for scale_name in scales:
+                    call_command("flush", interactive=False, verbosity=0)
+                    categories.invalidate_tree()
+                    started = time.perf_counter()
+                    dataset = seed(SCALES[scale_name], options["seed"])
+                    fixtures = query_counts.build_fixtures(dataset)
+                    by_scale[scale_name] = query_counts.run_cases(cases, fixtures)
+                    self.stdout.write(
+                        f"{scale_name}: {len(cases)} cases in "
+                        f"{time.perf_counter() - started:.1f}s ("
+                        + ", ".join(f"{k}={v}" for k, v in dataset.counts.items())
+                        + ")"
+                    )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        self.stdout.write("")
+        self.stdout.write(query_counts.format_results(cases, by_scale))
+
+        problems = [
+            f"{result.case.name} [{scale_name}]: {error}"
+            for scale_name, results in by_scale.items()
+            for result in results
+            for error in result.errors
+        ]
+        problems += query_counts.find_growth(cases, by_scale)
+
+        self.stdout.write("")
+        if problems:
+            self.stdout.write(self.style.ERROR("Query-count regressions:"))
+            for problem in problems:
+                self.stdout.write(f"  - {problem}")
+            sys.exit(1)
+        self.stdout.write(self.style.SUCCESS("All query counts within bounds."))
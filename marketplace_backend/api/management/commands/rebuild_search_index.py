@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from api.search import fts_available, rebuild_index
+
+
+class Command(BaseCommand):
+    """
+    Jenga upya full-text index ya products (mf. baada ya loaddata).
+
+        python manage.py rebuild_search_index
+    """
+
+    help = "Rebuild the product full-text search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        if not fts_available(using):
+            self.stdout.write(
+                self.style.WARNING(
+                    "No FTS5 index on this database; ?search= uses the default SearchFilter."
+                )
+            )
+            return
+
+        count = rebuild_index(using)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} products."))
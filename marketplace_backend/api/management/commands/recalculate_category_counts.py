@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+
+from api.models import Category
+
+
+class Command(BaseCommand):
+    """
+    Hesabu upya Category.product_count (products active tu) kwa categories
+    zote – mf. baada ya loaddata au `Product.objects.update(...)` ambazo
+    hazipiti kwenye signals.
+
+        python manage.py recalculate_category_counts
+    """
+
+    help = "Recompute the cached active product count of every category."
+
+    def handle(self, *args, **options):
+        categories = list(
+            Category.objects.annotate(
+                active_count=Count("products", filter=Q(products__is_active=True))
+            )
+        )
+        changed = [c for c in categories if c.product_count != c.active_count]
+        for category in changed:
+            category.product_count = category.active_count
+        Category.objects.bulk_update(changed, ["product_count"], batch_size=500)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {len(categories)} categories, fixed {len(changed)}."
+            )
+        )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api import unread
+
+
+class Command(BaseCommand):
+    """
+    Hesabu upya unread counters (ConversationParticipantState.unread_count na
+    UnreadCounter) kutoka messages/notifications – mf. baada ya loaddata,
+    bulk imports au updates zisizopita kwenye api.unread.
+
+        python manage.py recalculate_unread_counts
+        python manage.py recalculate_unread_counts --user 12 --user 40
+    """
+
+    help = "Recompute stored unread counters from messages and notifications."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            help="Only recompute this user id (repeatable). Default: everyone.",
+        )
+
+    def handle(self, *args, **options):
+        updated = unread.recalculate(options["user"])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed unread counters for {updated} users."))
@@ -0,0 +1,96 @@
+import os
+import tempfile
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from api.benchmarks import stock
+from api.benchmarks.seed import SCALES, seed
+from api.models import Product, SellerProfile
+
+
+class Command(BaseCommand):
+    """
+    Concurrency stress test ya POST /api/orders/ (hakuna oversell).
+
+    Ina-tengeneza test database (SQLite: file ya muda ili locking ipimwe
+    kweli), product moja yenye stock `--stock`, kisha buyers `--threads`
+    wanaagiza wote kwa pamoja hadi stock iishe. Inatoka na code 1 kama
+    units zilizoagizwa != stock iliyopungua, stock < 0 au kuna errors.
+
+        python manage.py stress_orders
+        python manage.py stress_orders --threads 32 --stock 200 --quantity 3
+        DATABASE_URL=postgres://... python manage.py stress_orders --threads 64
+    """
+
+    help = "Hammer order creation from many threads and verify stock is never oversold."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--stock", type=int, default=50)
+        parser.add_argument("--quantity", type=int, default=1, help="Units per order.")
+        parser.add_argument(
+            "--attempts",
+            type=int,
+            default=None,
+            help="Max orders per thread (default: enough to exhaust the stock twice over).",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        attempts = options["attempts"] or max(
+            2 * options["stock"] // (threads * options["quantity"]) + 1, 1
+        )
+        db = connection.settings_dict
+        original_test_name = db["TEST"].get("NAME")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            if connection.vendor == "sqlite":
+                db["TEST"]["NAME"] = os.path.join(tmp, "stress_orders.sqlite3")
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            try:
+                with override_settings(
+                    DEBUG=False,
+                    REQUEST_METRICS_ENABLED=False,
+                    IMAGE_THUMB_ASYNC=False,
+                    DATABASE_READ_REPLICA="",
+                ):
+                    result = self._run(options, attempts)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                db["TEST"]["NAME"] = original_test_name
+
+        self.stdout.write(result.format())
+        problems = result.problems()
+        if problems:
+            raise CommandError("; ".join(problems))
+        self.stdout.write(self.style.SUCCESS("No oversell."))
+
+    def _run(self, options, attempts):
+        dataset = seed(SCALES["small"], options["seed"])
+        seller = SellerProfile.objects.get(user_id=dataset.seller_user_ids[0])
+        product = Product.objects.create(
+            seller=seller,
+            name="Stress test product",
+            description="stress_orders",
+            price=Decimal("10.00"),
+            stock_quantity=options["stock"],
+        )
+        # threads zinafungua connections zao; ya main thread isishike lock
+        connection.close()
+        self.stdout.write(
+            f"{options['threads']} buyers x {attempts} orders of {options['quantity']} "
+            f"against stock {options['stock']}"
+        )
+        return stock.run_stress(
+            product.pk,
+            dataset.buyer_ids,
+            options["threads"],
+            attempts,
+            options["quantity"],
+        )
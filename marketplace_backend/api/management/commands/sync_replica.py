@@ -0,0 +1,63 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    """
+    Nakili primary SQLite kwenda replica SQLite (local testing ya read-replica
+    routing). Inatumia sqlite3 online backup API – nakala ni consistent hata
+    server ikiwa inaandika.
+
+        DATABASE_REPLICA_URL=sqlite:////tmp/db.replica.sqlite3 python manage.py sync_replica
+        python manage.py sync_replica --interval 5     # endelea ku-sync kila 5s
+
+    Postgres/MySQL: tumia replication ya database yenyewe.
+    """
+
+    help = "Copy the primary SQLite database into the replica SQLite file."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep syncing every N seconds (0 = sync once and exit).",
+        )
+
+    def handle(self, *args, **options):
+        alias = settings.DATABASE_READ_REPLICA
+        if not alias:
+            raise CommandError("No replica configured (set DATABASE_REPLICA_URL).")
+
+        primary = connections["default"]
+        replica = settings.DATABASES[alias]
+        if primary.vendor != "sqlite" or "sqlite" not in replica["ENGINE"]:
+            raise CommandError(
+                "sync_replica only copies SQLite files; use the database's own replication."
+            )
+        if str(replica["NAME"]) == str(primary.settings_dict["NAME"]):
+            raise CommandError("Replica and primary point at the same file.")
+
+        interval = options["interval"]
+        while True:
+            started = time.perf_counter()
+            self._sync(primary, str(replica["NAME"]))
+            self.stdout.write(
+                f"Synced {primary.settings_dict['NAME']} -> {replica['NAME']} "
+                f"in {(time.perf_counter() - started) * 1000:.0f}ms"
+            )
+            if interval <= 0:
+                return
+            time.sleep(interval)
+
+    def _sync(self, primary, target: str) -> None:
+        primary.ensure_connection()
+        destination = sqlite3.connect(target)
+        try:
+            primary.connection.backup(destination)
+        finally:
+            destination.close()
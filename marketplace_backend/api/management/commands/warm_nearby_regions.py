@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import regions
+
+
+class Command(BaseCommand):
+    """
+    Jaza cache ya nearby regions (api/regions.py) kabla traffic haijafika –
+    kila region peke yake, mf. baada ya deploy au kwa miji yenye watumiaji
+    wengi:
+
+        python manage.py warm_nearby_regions
+        python manage.py warm_nearby_regions --city "Dar es Salaam" --city Mwanza
+        python manage.py warm_nearby_regions --region -7:39
+        python manage.py warm_nearby_regions --reassign   # baada ya bulk import
+    """
+
+    help = "Warm the per-region nearby-search cache (all regions, or by region/city)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--region",
+            action="append",
+            default=[],
+            help='Region key such as "-7:39" (repeatable).',
+        )
+        parser.add_argument(
+            "--city",
+            action="append",
+            default=[],
+            help="Warm every region that has sellers in this city (repeatable).",
+        )
+        parser.add_argument(
+            "--reassign",
+            action="store_true",
+            help="Recompute Location.region from coordinates first "
+            "(after bulk imports or a NEARBY_REGION_CELL_DEGREES change).",
+        )
+
+    def handle(self, *args, **options):
+        if options["reassign"]:
+            changed = regions.reassign()
+            self.stdout.write(f"Reassigned {changed} locations.")
+
+        selected = list(options["region"])
+        for city in options["city"]:
+            found = regions.regions_for_city(city)
+            if not found:
+                raise CommandError(f"No sellers found in city {city!r}.")
+            selected += found
+
+        warmed = regions.warm(selected or None)
+        for region, count in sorted(warmed.items()):
+            self.stdout.write(f"  {region}: {count} sellers")
+        self.stdout.write(self.style.SUCCESS(f"Warmed {len(warmed)} regions."))
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.26 on 2026-10-18 21:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_category_seller_alter_category_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='products/main/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='productimage',
+            name='image_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='products/gallery/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='sellerprofile',
+            name='logo_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='shops/logos/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='sellerprofile',
+            name='shop_image_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='shops/images/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar_thumb',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='avatars/thumbs/'),
+        ),
+    ]
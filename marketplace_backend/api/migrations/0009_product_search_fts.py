@@ -0,0 +1,46 @@
+# Full-text search index for products (SQLite FTS5).
+#
+# Kwenye databases zisizo SQLite migration hii haifanyi kitu – ProductSearchFilter
+# inarudi kwenye SearchFilter ya kawaida.
+
+from django.db import migrations
+
+
+# DDL iko hapa (si api.search) ili migration hii isibadilike code ya app
+# ikibadilika. Rows zinajazwa na post_migrate (api.search.fill_index_if_empty)
+# au `manage.py rebuild_search_index`.
+FTS_TABLE = "product_search"
+
+
+def create_fts_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "name, description, business_name, stems, "
+            "tokenize = 'unicode61 remove_diacritics 2', "
+            "prefix = '2 3 4')"
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_product_image_thumb_productimage_image_thumb_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
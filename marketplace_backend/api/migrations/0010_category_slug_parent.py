@@ -0,0 +1,35 @@
+# Generated by Django 4.2.26 on 2026-10-18 21:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils.text import slugify
+
+
+def fill_category_slugs(apps, schema_editor):
+    Category = apps.get_model("api", "Category")
+    db_alias = schema_editor.connection.alias
+    categories = list(Category.objects.using(db_alias).only("id", "name"))
+    for category in categories:
+        category.slug = slugify(category.name)[:120]
+    Category.objects.using(db_alias).bulk_update(categories, ["slug"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_product_search_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Global category this one belongs under (optional).', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='api.category'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=120),
+        ),
+        migrations.RunPython(fill_category_slugs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.26 on 2026-10-18 21:45
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_product_counts(apps, schema_editor):
+    Category = apps.get_model("api", "Category")
+    db_alias = schema_editor.connection.alias
+    categories = list(
+        Category.objects.using(db_alias).annotate(
+            active_count=Count("products", filter=Q(products__is_active=True))
+        )
+    )
+    for category in categories:
+        category.product_count = category.active_count
+    Category.objects.using(db_alias).bulk_update(categories, ["product_count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_category_slug_parent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_product_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.26 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_category_product_count'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.CheckConstraint(check=models.Q(('stock_quantity__gte', 0)), name='product_stock_quantity_non_negative'),
+        ),
+    ]
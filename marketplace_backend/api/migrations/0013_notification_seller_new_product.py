@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-18 22:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_product_stock_non_negative'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='notif_type',
+            field=models.CharField(choices=[('order_new', 'New order'), ('order_status', 'Order status update'), ('chat_message', 'Chat message'), ('order_created', 'Order created'), ('seller_new_product', 'New product from a favorite seller')], max_length=50),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.26 on 2026-10-18 22:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def collapse_unread_chat(apps, schema_editor):
+    """
+    Jaza conversation kutoka data["conversation_id"], kisha kwa kila
+    (user, conversation) bakiza chat notification moja isiyosomwa (ya mwisho)
+    yenye count = idadi ya zilizokuwa – unique constraint iweze kuongezwa.
+    """
+    Notification = apps.get_model("api", "Notification")
+    Conversation = apps.get_model("api", "Conversation")
+    db_alias = schema_editor.connection.alias
+    notifications = Notification.objects.using(db_alias)
+    existing = set(Conversation.objects.using(db_alias).values_list("id", flat=True))
+
+    read = {}
+    unread = {}
+    rows = notifications.filter(notif_type="chat_message").order_by("created_at", "id")
+    for pk, user_id, data, is_read in rows.values_list("id", "user_id", "data", "is_read").iterator():
+        conversation_id = (data or {}).get("conversation_id")
+        if conversation_id not in existing:
+            continue
+        if is_read:
+            read.setdefault(conversation_id, []).append(pk)
+        else:
+            unread.setdefault((user_id, conversation_id), []).append(pk)
+
+    for conversation_id, ids in read.items():
+        notifications.filter(pk__in=ids).update(conversation_id=conversation_id)
+
+    for (user_id, conversation_id), ids in unread.items():
+        latest = ids[-1]
+        notifications.filter(pk__in=ids[:-1]).delete()
+        notifications.filter(pk=latest).update(conversation_id=conversation_id, count=len(ids))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_notification_seller_new_product'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='conversation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='api.conversation'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='count',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(collapse_unread_chat, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_read', False), ('notif_type', 'chat_message')), fields=('user', 'conversation'), name='unique_unread_chat_notification'),
+        ),
+    ]
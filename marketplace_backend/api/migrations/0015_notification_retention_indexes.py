@@ -0,0 +1,21 @@
+# Generated by Django 4.2.26 on 2026-10-18 22:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_collapse_chat_notifications'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read'], name='notificatio_user_id_a4dd5c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['is_read', 'created_at'], name='notificatio_is_read_9b69ad_idx'),
+        ),
+    ]
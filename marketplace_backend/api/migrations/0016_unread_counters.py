@@ -0,0 +1,97 @@
+# Generated by Django 4.2.26 on 2026-10-18 22:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_unread_counts(apps, schema_editor):
+    """
+    unread_count ya kila participant + UnreadCounter ya kila user kutoka
+    messages/notifications zilizopo.
+    """
+    Conversation = apps.get_model("api", "Conversation")
+    State = apps.get_model("api", "ConversationParticipantState")
+    Message = apps.get_model("api", "Message")
+    Notification = apps.get_model("api", "Notification")
+    UnreadCounter = apps.get_model("api", "UnreadCounter")
+    db_alias = schema_editor.connection.alias
+
+    per_state = {}
+    senders = Message.objects.using(db_alias).filter(is_read=False).values_list(
+        "conversation_id", "sender_id"
+    )
+    participants = {
+        pk: (buyer_id, seller_user_id)
+        for pk, buyer_id, seller_user_id in Conversation.objects.using(db_alias).values_list(
+            "id", "buyer_id", "seller__user_id"
+        )
+    }
+    for conversation_id, sender_id in senders.iterator():
+        for user_id in participants.get(conversation_id, ()):
+            if user_id != sender_id:
+                key = (conversation_id, user_id)
+                per_state[key] = per_state.get(key, 0) + 1
+
+    states = {
+        (s.conversation_id, s.user_id): s
+        for s in State.objects.using(db_alias).filter(
+            conversation_id__in={conv for conv, _ in per_state}
+        )
+    }
+    new_states, changed = [], []
+    for (conversation_id, user_id), count in per_state.items():
+        state = states.get((conversation_id, user_id))
+        if state is None:
+            new_states.append(
+                State(conversation_id=conversation_id, user_id=user_id, unread_count=count)
+            )
+        else:
+            state.unread_count = count
+            changed.append(state)
+    State.objects.using(db_alias).bulk_create(new_states, batch_size=1000)
+    State.objects.using(db_alias).bulk_update(changed, ["unread_count"], batch_size=1000)
+
+    totals = {}
+    for (_, user_id), count in per_state.items():
+        totals.setdefault(user_id, [0, 0])[1] += count
+    for user_id in Notification.objects.using(db_alias).filter(is_read=False).values_list(
+        "user_id", flat=True
+    ).iterator():
+        totals.setdefault(user_id, [0, 0])[0] += 1
+    UnreadCounter.objects.using(db_alias).bulk_create(
+        [
+            UnreadCounter(user_id=user_id, notifications=notifs, messages=msgs)
+            for user_id, (notifs, msgs) in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('api', '0015_notification_retention_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('notifications', models.PositiveIntegerField(default=0)),
+                ('messages', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'unread_counters',
+            },
+        ),
+        migrations.AddField(
+            model_name='conversationparticipantstate',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_unread_counts, migrations.RunPython.noop),
+    ]
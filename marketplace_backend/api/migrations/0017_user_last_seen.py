@@ -0,0 +1,18 @@
+# Generated by Django 4.2.26 on 2026-10-18 22:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_unread_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='last_seen_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.26 on 2026-10-18 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_user_last_seen'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='client_id',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='message',
+            constraint=models.UniqueConstraint(condition=models.Q(('client_id__isnull', False)), fields=('sender', 'client_id'), name='unique_message_client_id'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.26 on 2026-10-18 23:05
+
+import math
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_regions(apps, schema_editor):
+    """
+    region ya kila Location iliyopo (logic ile ile ya api.regions.region_key).
+    """
+    Location = apps.get_model("api", "Location")
+    db_alias = schema_editor.connection.alias
+    cell = settings.NEARBY_REGION_CELL_DEGREES
+
+    changed = []
+    for location in Location.objects.using(db_alias).only("id", "latitude", "longitude"):
+        location.region = (
+            f"{math.floor(float(location.latitude) / cell)}:"
+            f"{math.floor(float(location.longitude) / cell)}"
+        )
+        changed.append(location)
+    Location.objects.using(db_alias).bulk_update(changed, ["region"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='region',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['region'], name='locations_region_c9db38_idx'),
+        ),
+        migrations.RunPython(fill_regions, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,23 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models import Avg, Count, Sum
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    Exists,
+    F,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.text import slugify
 
 
 # =========================
@@ -16,6 +32,8 @@ class UserProfile(models.Model):
     - preferred_language: 'en' / 'sw'
     - theme: 'light' / 'dark' / 'system'
     - avatar: profile picture (mtumiaji binafsi)
+    - last_seen_at: mara ya mwisho alikuwa online (api.presence inaiandika
+      kwa batches, si kila event)
     """
     THEME_CHOICES = [
         ("light", "Light"),
@@ -48,6 +66,14 @@ class UserProfile(models.Model):
         blank=True,
         null=True,
     )
+    # thumbnail ya avatar (inatengenezwa na api.images baada ya upload)
+    avatar_thumb = models.ImageField(
+        upload_to="avatars/thumbs/",
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    last_seen_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -110,6 +136,20 @@ class SellerProfile(models.Model):
         null=True,
     )
 
+    # THUMBNAILS (zinatengenezwa na api.images baada ya upload)
+    logo_thumb = models.ImageField(
+        upload_to="shops/logos/thumbs/",
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    shop_image_thumb = models.ImageField(
+        upload_to="shops/images/thumbs/",
+        blank=True,
+        null=True,
+        editable=False,
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -184,6 +224,9 @@ class SellerProfile(models.Model):
 class Location(models.Model):
     """
     Location model to store geographic coordinates for sellers
+
+    - region: cell ya grid kutoka coordinates (api/regions.py) – nearby
+      search inasoma sellers wa regions zinazogusa radius tu
     """
     seller = models.OneToOneField(
         SellerProfile,
@@ -198,6 +241,7 @@ class Location(models.Model):
     latitude = models.DecimalField(max_digits=10, decimal_places=8)
     longitude = models.DecimalField(max_digits=11, decimal_places=8)
     mapbox_place_id = models.CharField(max_length=255, blank=True)
+    region = models.CharField(max_length=32, blank=True, default="", editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -206,11 +250,23 @@ class Location(models.Model):
         indexes = [
             models.Index(fields=["latitude", "longitude"]),
             models.Index(fields=["city"]),
+            models.Index(fields=["region"]),
         ]
 
     def __str__(self):
         return f"{self.seller.business_name} - {self.city}"
 
+    def save(self, *args, **kwargs):
+        from .regions import region_key
+
+        # region ya zamani – signal inafuta cache ya zote mbili
+        self._previous_region = self.region
+        self.region = region_key(self.latitude, self.longitude)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "region" not in update_fields:
+            kwargs["update_fields"] = list(update_fields) + ["region"]
+        super().save(*args, **kwargs)
+
 
 class Category(models.Model):
     """
@@ -218,6 +274,12 @@ class Category(models.Model):
 
     Ikiwa `seller` ni NULL => ni global category (common kwa shops zote, kama unataka).
     Ikiwa `seller` imejazwa => category hii ni ya duka hilo tu.
+
+    - slug: jina lililo-normalize (slugify) – `?category=<slug>` inatumia hii.
+    - parent: category ya duka inaweza kukaa chini ya global category; filter
+      ya global category inajumuisha descendants wake (api/categories.py).
+    - product_count: idadi ya products ACTIVE (denormalized) – inasasishwa na
+      signals kila product ikiongezwa/badilishwa/futwa.
     """
     seller = models.ForeignKey(
         SellerProfile,
@@ -228,8 +290,18 @@ class Category(models.Model):
         help_text="If set, this category belongs only to this seller/shop.",
     )
     name = models.CharField(max_length=100)  
+    slug = models.SlugField(max_length=120, blank=True, db_index=True)
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        related_name="children",
+        null=True,
+        blank=True,
+        help_text="Global category this one belongs under (optional).",
+    )
     description = models.TextField(blank=True)
     icon = models.CharField(max_length=50, blank=True)
+    product_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -247,6 +319,133 @@ class Category(models.Model):
         owner = self.seller.business_name if self.seller else "GLOBAL"
         return f"{self.name} ({owner})"
 
+    def save(self, *args, **kwargs):
+        self.slug = slugify(self.name)[:120]
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "slug"}
+        super().save(*args, **kwargs)
+
+    # ---------- PRODUCT COUNT ----------
+    def recalculate_product_count(self, commit: bool = True):
+        """
+        Hesabu upya product_count (products active tu) – kwa kurekebisha
+        drift baada ya bulk updates zisizopita kwenye signals.
+        """
+        self.product_count = self.products.filter(is_active=True).count()
+
+        if commit:
+            Category.objects.filter(pk=self.pk).update(product_count=self.product_count)
+
+        return self.product_count
+
+    @classmethod
+    def adjust_product_count(cls, category_id, delta: int, using: str = "default"):
+        """
+        product_count += delta kwa UPDATE moja (bila kusoma row kwanza).
+        """
+        if not category_id or not delta:
+            return
+        cls.objects.using(using).filter(pk=category_id).update(
+            product_count=Greatest(F("product_count") + delta, 0)
+        )
+
+def _count_subquery(queryset, fk: str, aggregate=None):
+    """
+    Correlated subquery ya COUNT/SUM kwa kila row (badala ya query moja kwa
+    kila object kwenye serializer). Coalesce => 0 kama hakuna rows.
+    """
+    aggregate = aggregate or Count("pk")
+    inner = (
+        queryset.filter(**{fk: OuterRef("pk")})
+        .order_by()
+        .values(fk)
+        .annotate(total=aggregate)
+        .values("total")
+    )
+    return Coalesce(Subquery(inner), Value(0))
+
+
+class ProductQuerySet(models.QuerySet):
+    def with_stats(self, user=None):
+        """
+        Ongeza likes/sales/units (+ is_liked kwa user huyu) kama annotations
+        – ProductSerializer / ProductMiniSerializer zinazisoma badala ya
+        kupiga query kwa kila product.
+
+        Majina ni `annotated_*` kwa sababu likes_count, sales_count na
+        units_sold tayari ni properties za model.
+        """
+        completed = Order.objects.filter(status=Order.STATUS_COMPLETED)
+        qs = self.annotate(
+            annotated_likes_count=_count_subquery(ProductLike.objects.all(), "product"),
+            annotated_sales_count=_count_subquery(completed, "product"),
+            annotated_units_sold=_count_subquery(completed, "product", Sum("quantity")),
+        )
+        if user is not None and user.is_authenticated:
+            qs = qs.annotate(
+                annotated_is_liked=Exists(
+                    ProductLike.objects.filter(user=user, product=OuterRef("pk"))
+                )
+            )
+        else:
+            qs = qs.annotate(annotated_is_liked=Value(False))
+        return qs
+
+    def reserve_stock(self, product_id, quantity):
+        """
+        Punguza stock kwa `quantity` kama ipo ya kutosha – conditional UPDATE
+        moja (`... WHERE stock_quantity >= quantity`), bila SELECT FOR UPDATE.
+
+        Database ndiyo inaamua: requests mbili zikishindania kipande cha
+        mwisho, moja tu inapata row 1, nyingine 0. Rudisha True kama
+        imefanikiwa. Itumike ndani ya transaction pamoja na Order.
+        """
+        updated = self.filter(
+            pk=product_id,
+            is_active=True,
+            stock_quantity__gte=quantity,
+        ).update(
+            stock_quantity=F("stock_quantity") - quantity,
+            updated_at=timezone.now(),
+        )
+        return updated == 1
+
+    def reserve_stock_many(self, quantities):
+        """
+        Kama reserve_stock lakini kwa products nyingi ({product_id: qty})
+        kwa UPDATE moja: `SET stock_quantity = stock_quantity - CASE id ...
+        WHERE stock_quantity >= CASE id ...`.
+
+        Rudisha True tu kama kila product ilipunguzwa. Ikirudisha False,
+        baadhi ya rows zimeshapunguzwa – caller arudishe transaction nyuma.
+        """
+        if not quantities:
+            return True
+        wanted = Case(
+            *[When(pk=pk, then=Value(qty)) for pk, qty in quantities.items()],
+            output_field=models.IntegerField(),
+        )
+        updated = self.filter(
+            pk__in=list(quantities),
+            is_active=True,
+            stock_quantity__gte=wanted,
+        ).update(
+            stock_quantity=F("stock_quantity") - wanted,
+            updated_at=timezone.now(),
+        )
+        return updated == len(quantities)
+
+    def release_stock(self, product_id, quantity):
+        """
+        Rudisha stock iliyoshikiliwa na order (cancelled/rejected/deleted).
+        """
+        self.filter(pk=product_id).update(
+            stock_quantity=F("stock_quantity") + quantity,
+            updated_at=timezone.now(),
+        )
+
+
 class Product(models.Model):
     """
     Products listed by sellers
@@ -282,10 +481,19 @@ class Product(models.Model):
         blank=True,
         null=True,
     )
+    # thumbnail ya main image (inatengenezwa na api.images baada ya upload)
+    image_thumb = models.ImageField(
+        upload_to="products/main/thumbs/",
+        blank=True,
+        null=True,
+        editable=False,
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         db_table = "products"
         ordering = ["-created_at"]
@@ -294,6 +502,13 @@ class Product(models.Model):
             models.Index(fields=["category"]),
             models.Index(fields=["price"]),
         ]
+        constraints = [
+            # kinga ya mwisho dhidi ya oversell (reserve_stock)
+            models.CheckConstraint(
+                check=models.Q(stock_quantity__gte=0),
+                name="product_stock_quantity_non_negative",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.seller.business_name}"
@@ -351,6 +566,12 @@ class ProductImage(models.Model):
     image = models.ImageField(
         upload_to="products/gallery/",
     )
+    image_thumb = models.ImageField(
+        upload_to="products/gallery/thumbs/",
+        blank=True,
+        null=True,
+        editable=False,
+    )
 
     is_primary = models.BooleanField(default=False)
     order = models.IntegerField(default=0)
@@ -474,6 +695,25 @@ class Order(models.Model):
         (STATUS_COMPLETED, "Completed"),
     ]
 
+    # orders hizi bado zinashikilia stock (Product.objects.reserve_stock)
+    STOCK_HOLDING_STATUSES = (STATUS_PENDING, STATUS_ACCEPTED)
+    # stock ya orders hizi imesharudishwa (completed => imeuzwa, hairudi)
+    STOCK_RETURNED_STATUSES = (STATUS_CANCELLED, STATUS_REJECTED)
+
+    # status mpya ambazo buyer / seller wanaruhusiwa kuweka, kwa status ya sasa
+    # (POST /orders/{id}/status/). Kufungua upya cancelled/rejected => stock
+    # inahifadhiwa tena.
+    BUYER_TRANSITIONS = {
+        STATUS_PENDING: (STATUS_CANCELLED,),
+        STATUS_ACCEPTED: (STATUS_CANCELLED,),
+        STATUS_CANCELLED: (STATUS_PENDING,),
+    }
+    SELLER_TRANSITIONS = {
+        STATUS_PENDING: (STATUS_ACCEPTED, STATUS_REJECTED),
+        STATUS_ACCEPTED: (STATUS_COMPLETED, STATUS_REJECTED),
+        STATUS_REJECTED: (STATUS_PENDING, STATUS_ACCEPTED),
+    }
+
     buyer = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -531,6 +771,44 @@ class Order(models.Model):
 #  CHAT & NOTIFICATIONS
 # =========================
 
+class ConversationQuerySet(models.QuerySet):
+    def with_inbox_state(self, user):
+        """
+        Inbox bila N+1: unread_count na is_typing_other_side kama annotations,
+        last message moja kwa kila conversation kupitia Prefetch
+        (`prefetched_last_message`), product pamoja na stats zake.
+
+        unread_count inasomwa kutoka ConversationParticipantState.unread_count
+        (counter inayotunzwa na api.unread), si COUNT ya messages.
+        """
+        unread = ConversationParticipantState.objects.filter(
+            conversation=OuterRef("pk"),
+            user=user,
+        ).values("unread_count")[:1]
+        typing_other = ConversationParticipantState.objects.filter(
+            conversation=OuterRef("pk"),
+            is_typing=True,
+        ).exclude(user=user)
+        latest_id = (
+            Message.objects.filter(conversation=OuterRef("conversation_id"))
+            .order_by("-created_at", "-id")
+            .values("id")[:1]
+        )
+        return self.annotate(
+            annotated_unread_count=Coalesce(Subquery(unread), 0),
+            annotated_is_typing_other_side=Exists(typing_other),
+        ).prefetch_related(
+            Prefetch("product", queryset=Product.objects.with_stats()),
+            Prefetch(
+                "messages",
+                queryset=Message.objects.filter(id=Subquery(latest_id)).select_related(
+                    "sender__profile"
+                ),
+                to_attr="prefetched_last_message",
+            ),
+        )
+
+
 class Conversation(models.Model):
     """
     Chat conversation between buyer and seller, optionally per product
@@ -559,6 +837,8 @@ class Conversation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     last_message_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ConversationQuerySet.as_manager()
+
     class Meta:
         db_table = "conversations"
         unique_together = ["buyer", "seller", "product"]
@@ -581,6 +861,8 @@ class ConversationParticipantState(models.Model):
     - last_typing_at: alionekana akitype mara ya mwisho lini
     - last_seen_at: mara ya mwisho ku-open chat
     - last_read_at: mara ya mwisho kusoma messages (kwa unread count)
+    - unread_count: messages za upande mwingine ambazo user hajasoma
+      (inatunzwa na api.unread, si kuhesabiwa kila request)
     """
     conversation = models.ForeignKey(
         Conversation,
@@ -596,6 +878,7 @@ class ConversationParticipantState(models.Model):
     last_typing_at = models.DateTimeField(null=True, blank=True)
     last_seen_at = models.DateTimeField(null=True, blank=True)
     last_read_at = models.DateTimeField(null=True, blank=True)
+    unread_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         db_table = "conversation_participant_states"
@@ -609,6 +892,9 @@ class ConversationParticipantState(models.Model):
 class Message(models.Model):
     """
     A single chat message
+
+    - client_id: id iliyotengenezwa na client (mf. UUID) – ujumbe ule ule
+      ukitumwa tena (retry / reconnect) haurudiwi; unique kwa kila sender
     """
     STATUS_SENT = "sent"
     STATUS_DELIVERED = "delivered"
@@ -639,6 +925,7 @@ class Message(models.Model):
         default=STATUS_SENT,
     )
     is_read = models.BooleanField(default=False)  # kwa compatibility na logic za zamani
+    client_id = models.CharField(max_length=64, null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -646,6 +933,13 @@ class Message(models.Model):
     class Meta:
         db_table = "messages"
         ordering = ["created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["sender", "client_id"],
+                condition=models.Q(client_id__isnull=False),
+                name="unique_message_client_id",
+            ),
+        ]
 
     def __str__(self):
         return f"Message by {self.sender.username} in #{self.conversation_id}"
@@ -657,6 +951,9 @@ class Notification(models.Model):
     - new order
     - order status change
     - new chat message
+    - product mpya ya seller uliyemfavorite
+
+    Zinaandikwa kupitia api.notifications (bulk_create + WebSocket push).
 
     Tutaweka payload ndani ya data:
     {
@@ -672,6 +969,7 @@ class Notification(models.Model):
         ("order_status", "Order status update"),
         ("chat_message", "Chat message"),
         ("order_created", "Order created"),
+        ("seller_new_product", "New product from a favorite seller"),
     ]
 
     user = models.ForeignKey(
@@ -687,12 +985,99 @@ class Notification(models.Model):
     body = models.TextField(blank=True)
     # generic data payload (order_id, conversation_id, etc.)
     data = models.JSONField(blank=True, null=True)
+    # chat_message: row moja isiyosomwa kwa (user, conversation); kila
+    # message mpya inaongeza `count` na kubadili body/data (api.notifications)
+    conversation = models.ForeignKey(
+        "Conversation",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="notifications",
+    )
+    count = models.PositiveIntegerField(default=1)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = "notifications"
         ordering = ["-created_at"]
+        indexes = [
+            # list ya user (+ mark_all_read ya unread tu)
+            models.Index(fields=["user", "is_read"]),
+            # retention: zilizosomwa za zamani (api/retention.py)
+            models.Index(fields=["is_read", "created_at"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "conversation"],
+                condition=models.Q(notif_type="chat_message", is_read=False),
+                name="unique_unread_chat_notification",
+            ),
+        ]
 
     def __str__(self):
         return f"Notif {self.notif_type} for {self.user.username}"
+
+
+class UnreadCounter(models.Model):
+    """
+    Jumla ya unread kwa user mmoja (badges za frontend):
+
+    - notifications: notifications ambazo hajasoma
+    - messages: jumla ya ConversationParticipantState.unread_count zake
+
+    Inaongezwa/kupunguzwa na api.unread pale is_read inapobadilika;
+    `python manage.py recalculate_unread_counts` inarekebisha drift.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="unread_counter",
+    )
+    notifications = models.PositiveIntegerField(default=0)
+    messages = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "unread_counters"
+
+    def __str__(self):
+        return f"Unread for {self.user_id}: {self.notifications} notifs, {self.messages} msgs"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Response ya request yenye `Idempotency-Key` header (api.idempotency).
+
+    Request ile ile ikirudiwa (retry ya mobile) ndani ya
+    IDEMPOTENCY_KEY_TTL_HOURS, response iliyohifadhiwa inarudishwa bila
+    kurudia side effects (order/message mpya, stock, notifications).
+
+    - scope: endpoint, mf. "orders.create"
+    - fingerprint: sha256 ya body – key ile ile na body tofauti => 422
+    - status_code / response: response ya kwanza (2xx tu zinahifadhiwa)
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = "idempotency_keys"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "scope", "key"],
+                name="unique_idempotency_key",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key} (user {self.user_id})"
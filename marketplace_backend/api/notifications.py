@@ -0,0 +1,281 @@
+# api/notifications.py
+"""
+Notification service: kuandika notifications kwa batches na kuzi-push kwa
+sockets za wapokeaji.
+
+- `notify(notifications)`: list ya `Notification` (hazijahifadhiwa) =>
+  INSERT moja (bulk_create). Baada ya commit, zote zinapigwa kwa
+  WebSocket kwa pamoja (event loop moja, group_send zote kwa gather).
+- `notify_users(user_ids, ...)`: notification ile ile kwa watumiaji wengi
+  (mf. wote waliofavorite seller).
+- `notify_chat_message(message, recipient_ids)`: chat notifications
+  zinakunjwa – row moja isiyosomwa kwa (user, conversation). Message mpya
+  inaongeza `count` na kuweka snippet ya mwisho (UPDATE moja); rows mpya ni
+  za wapokeaji wasio na row isiyosomwa tu. Table inakua kwa idadi ya
+  conversations, si ya messages.
+- `merge_into_unread(notification)`: chat notification iliyosomwa
+  ikirudishwa kuwa haijasomwa wakati tayari kuna row isiyosomwa ya
+  conversation ile ile => zinaunganishwa (count zinajumlishwa).
+
+Row moja isiyosomwa kwa (user, conversation) inalindwa na partial unique
+constraint. MySQL haina partial indexes (Django inaruka constraint hiyo),
+kwa hiyo huko `lock_chat_conversation` inafunga row ya Conversation ili
+check + INSERT/merge za conversation moja zipite moja baada ya nyingine.
+
+Notifications mpya ambazo hazijasomwa zinaongezwa kwenye UnreadCounter ya
+mpokeaji (api.unread) – chat notification iliyokunjwa haiongezi.
+
+Kila user ana group yake ya WebSocket: `notifications_<user_id>`
+(api.consumers.NotificationConsumer, ws://<host>/ws/notifications/).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from marketplace_backend.db import bulk_create_with_pks
+
+from . import unread
+from .models import Conversation, Notification
+
+logger = logging.getLogger(__name__)
+
+CHAT_MESSAGE = "chat_message"
+
+
+def user_group(user_id: int) -> str:
+    return f"notifications_{user_id}"
+
+
+def notify(notifications: Iterable[Notification], push: bool = True) -> List[Notification]:
+    """
+    Hifadhi notifications zote kwa bulk_create moja; push baada ya commit
+    (rollback => hakuna kinachotumwa).
+    """
+    notifications = list(notifications)
+    if not notifications:
+        return []
+    created = bulk_create_with_pks(Notification, notifications)
+    _count_unread(created)
+    if push:
+        events = [(n.user_id, "notification.created", serialize(n)) for n in created]
+        transaction.on_commit(lambda: push_events(events))
+    return created
+
+
+def notify_users(
+    user_ids: Iterable[int],
+    notif_type: str,
+    title: str,
+    body: str = "",
+    data: Optional[Dict[str, Any]] = None,
+) -> List[Notification]:
+    """
+    Notification moja kwa kila user (fan-out) – INSERT moja bila kujali idadi.
+    """
+    return notify(
+        Notification(user_id=user_id, notif_type=notif_type, title=title, body=body, data=data)
+        for user_id in dict.fromkeys(user_ids)
+    )
+
+
+def notify_chat_message(message, recipient_ids: Iterable[int]) -> List[Notification]:
+    """
+    Chat notification iliyokunjwa kwa wapokeaji wa `message`:
+    - wenye row isiyosomwa ya conversation hii => count + 1, body/data za
+      message hii, created_at = sasa (inapanda juu kwenye list)
+    - wengine => row mpya (bulk_create moja)
+
+    Unique constraint (user, conversation) WHERE unread inahakikisha row moja
+    hata messages mbili zikifika pamoja: INSERT ikigongana, tunarudia kama
+    UPDATE. Rudisha rows mpya tu.
+    """
+    recipient_ids = list(dict.fromkeys(recipient_ids))
+    if not recipient_ids:
+        return []
+    lock_chat_conversation(message.conversation_id)
+
+    now = timezone.now()
+    fields = {
+        "title": "New message",
+        "body": message.text[:120],
+        "data": {
+            "conversation_id": message.conversation_id,
+            "message_id": message.id,
+        },
+    }
+    unread = Notification.objects.filter(
+        notif_type=CHAT_MESSAGE,
+        is_read=False,
+        conversation_id=message.conversation_id,
+    )
+
+    events = []
+    existing = list(unread.filter(user_id__in=recipient_ids).values_list("id", "user_id", "count"))
+    if existing:
+        events += _collapse(unread.filter(pk__in=[row[0] for row in existing]), existing, fields, now)
+
+    seen = {row[1] for row in existing}
+    missing = [user_id for user_id in recipient_ids if user_id not in seen]
+    created = []
+    if missing:
+        def build(user_id):
+            return Notification(
+                user_id=user_id,
+                notif_type=CHAT_MESSAGE,
+                conversation_id=message.conversation_id,
+                **fields,
+            )
+
+        try:
+            with transaction.atomic():
+                created = bulk_create_with_pks(Notification, [build(user_id) for user_id in missing])
+        except IntegrityError:
+            # message nyingine ya conversation hii imetangulia kuingiza row ya
+            # baadhi ya wapokeaji, na bulk_create yote imerudishwa nyuma.
+            # Rudia kwa kila mpokeaji peke yake: aliyegongana anakunjwa,
+            # wengine wanapata row yao.
+            for user_id in missing:
+                notification = build(user_id)
+                try:
+                    with transaction.atomic():
+                        notification.save()
+                except IntegrityError:
+                    raced = unread.filter(user_id=user_id)
+                    rows = list(raced.values_list("id", "user_id", "count"))
+                    events += _collapse(raced, rows, fields, now)
+                else:
+                    created.append(notification)
+        _count_unread(created)
+        events += [(n.user_id, "notification.created", serialize(n)) for n in created]
+
+    if events:
+        transaction.on_commit(lambda: push_events(events))
+    return created
+
+
+def merge_into_unread(notification: Notification) -> Optional[Notification]:
+    """
+    Chat notification iliyosomwa inarudishwa kuwa haijasomwa, lakini tayari
+    kuna row isiyosomwa ya conversation ile ile (message mpya ilifika baada
+    ya hii kusomwa). Row moja tu isiyosomwa inaruhusiwa kwa (user,
+    conversation): count ya hii inaongezwa kwenye iliyopo na hii inafutwa.
+
+    Rudisha row inayobaki; None => hakuna cha kuunganisha (update ya kawaida).
+    Itumike ndani ya transaction.
+    """
+    if notification.notif_type != CHAT_MESSAGE or not notification.conversation_id:
+        return None
+    lock_chat_conversation(notification.conversation_id)
+    target = (
+        Notification.objects.select_for_update()
+        .filter(
+            user_id=notification.user_id,
+            notif_type=CHAT_MESSAGE,
+            conversation_id=notification.conversation_id,
+            is_read=False,
+        )
+        .exclude(pk=notification.pk)
+        .first()
+    )
+    if target is None:
+        return None
+    Notification.objects.filter(pk=target.pk).update(count=F("count") + notification.count)
+    Notification.objects.filter(pk=notification.pk).delete()
+    target.refresh_from_db()
+    return target
+
+
+def lock_chat_conversation(conversation_id: int) -> None:
+    """
+    Fallback ya unique constraint ya chat notifications isiyosomwa kwenye
+    backends zisizo na partial indexes (MySQL): SELECT ... FOR UPDATE kwenye
+    row ya Conversation. Backends nyingine => hakuna query. Itumike ndani
+    ya transaction.
+    """
+    if connections[router.db_for_write(Notification)].features.supports_partial_indexes:
+        return
+    list(Conversation.objects.select_for_update().filter(pk=conversation_id).order_by().values_list("pk"))
+
+
+def _collapse(queryset, rows, fields, now) -> List[tuple]:
+    """
+    UPDATE moja kwa rows zilizopo; rudisha events za "notification.updated".
+    """
+    queryset.update(count=F("count") + 1, created_at=now, **fields)
+    return [
+        (
+            user_id,
+            "notification.updated",
+            {
+                "id": pk,
+                "notif_type": CHAT_MESSAGE,
+                **fields,
+                "conversation": fields["data"]["conversation_id"],
+                "count": count + 1,
+                "is_read": False,
+                "created_at": now.isoformat(),
+            },
+        )
+        for pk, user_id, count in rows
+    ]
+
+
+def _count_unread(created: List[Notification]) -> None:
+    counts: Dict[int, int] = {}
+    for notification in created:
+        if not notification.is_read:
+            counts[notification.user_id] = counts.get(notification.user_id, 0) + 1
+    unread.notifications_created(counts)
+
+
+def serialize(notification: Notification) -> Dict[str, Any]:
+    """
+    Payload ya socket – fields za row tu (bila user/profile) ili push isipige
+    query kwa kila notification.
+    """
+    return {
+        "id": notification.id,
+        "notif_type": notification.notif_type,
+        "title": notification.title,
+        "body": notification.body,
+        "data": notification.data,
+        "conversation": notification.conversation_id,
+        "count": notification.count,
+        "is_read": notification.is_read,
+        "created_at": notification.created_at.isoformat() if notification.created_at else None,
+    }
+
+
+def push_events(events: List[tuple]) -> None:
+    """
+    [(user_id, event_type, payload)] => group ya kila user, zote ndani ya
+    async_to_sync moja.
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not events:
+        return
+    try:
+        async_to_sync(_send_all)(channel_layer, events)
+    except Exception:  # socket push isiharibu request iliyofanikiwa
+        logger.exception("notification push failed (%d events)", len(events))
+
+
+async def _send_all(channel_layer, events: List[tuple]) -> None:
+    await asyncio.gather(
+        *(
+            channel_layer.group_send(
+                user_group(user_id),
+                {"type": event_type, "notification": payload},
+            )
+            for user_id, event_type, payload in events
+        )
+    )
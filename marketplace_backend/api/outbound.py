@@ -0,0 +1,279 @@
+# api/outbound.py
+"""
+Foleni ya kutuma (outbound) kwa kila WebSocket connection.
+
+Bila foleni, handler ya group event (mf. `chat_message`) inasubiri
+`send_json` kabla consumer haijachukua event inayofuata kutoka channel
+layer. Client wa polepole (mobile kwenye mtandao dhaifu) anajaza channel
+yake kwenye layer na events za group zinaanza kupotea au kuchelewesha
+wengine. Hapa handler inaweka event kwenye `SendQueue` (sync, bila await)
+na task moja ya connection hiyo inaandika kwenye socket:
+
+- foleni ina ukomo (`WS_SEND_QUEUE_MAX_EVENTS`).
+- `key=`: event mpya yenye key ile ile inachukua nafasi ya iliyokuwa
+  inasubiri (typing ya user yule yule, notification.updated ya id ile ile)
+  – client anapata hali ya mwisho tu.
+- `droppable=True` (typing, pong): foleni ikijaa, hizi ndizo zinatupwa
+  kwanza.
+- events zisizotupika (messages, acks, notifications) hazitupwi kamwe:
+  foleni ikijaa nazo, connection inafungwa (code 4429) na client anarudi
+  (reconnect + REST) badala ya kupoteza message kimya kimya.
+- batching ni opt-in: client aliyeunganisha na `?batch=1`
+  (`batching_requested`) anapata events nyingi zinazosubiri kama frame
+  moja {"type": "batch", "events": [...]} (hadi `WS_SEND_BATCH_MAX_EVENTS`).
+  Clients wengine (ChatPage ya sasa haifungui "batch") => event moja kwa
+  kila frame.
+
+`snapshot()` => takwimu za process hii (connections, queue depth, frames,
+dropped, overflow) – /api/stats/websocket/ (admin tu).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import weakref
+from collections import deque
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from urllib.parse import parse_qs
+
+from django.conf import settings
+
+logger = logging.getLogger("chat.ws")
+
+OVERFLOW_CLOSE_CODE = 4429  # client hasomi haraka vya kutosha
+
+_COUNTERS = (
+    "enqueued",
+    "coalesced",
+    "dropped",
+    "frames_sent",
+    "events_sent",
+    "batched_frames",
+    "overflow_closes",
+    "send_errors",
+)
+
+_lock = Lock()
+_stats: Dict[str, int] = dict.fromkeys(_COUNTERS, 0)
+_stats["peak_queue_depth"] = 0
+_queues: "weakref.WeakSet[SendQueue]" = weakref.WeakSet()
+
+
+def _count(**deltas: int) -> None:
+    with _lock:
+        for name, delta in deltas.items():
+            _stats[name] += delta
+
+
+class _Entry:
+    __slots__ = ("event", "droppable", "key")
+
+    def __init__(self, event: Dict[str, Any], droppable: bool, key: Optional[Hashable]):
+        self.event = event
+        self.droppable = droppable
+        self.key = key
+
+
+class SendQueue:
+    """
+    Foleni ya connection moja. `put()` inaitwa ndani ya event loop ya
+    consumer; task ya `_run()` ndiyo pekee inayoandika kwenye socket.
+    """
+
+    def __init__(
+        self,
+        send_json: Callable[[Dict[str, Any]], Awaitable[None]],
+        close: Callable[..., Awaitable[None]],
+        max_events: Optional[int] = None,
+        max_batch: Optional[int] = None,
+    ):
+        self._send_json = send_json
+        self._close = close
+        self.max_events = max_events or settings.WS_SEND_QUEUE_MAX_EVENTS
+        self.max_batch = max(max_batch or settings.WS_SEND_BATCH_MAX_EVENTS, 1)
+        self._entries: deque = deque()
+        self._keys: Dict[Hashable, _Entry] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+        with _lock:
+            _queues.add(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(
+        self,
+        event: Dict[str, Any],
+        droppable: bool = False,
+        key: Optional[Hashable] = None,
+    ) -> bool:
+        """
+        Weka event kwenye foleni. Rudisha False kama imetupwa (au connection
+        inafungwa kwa overflow).
+        """
+        if self.closed:
+            return False
+
+        if key is not None:
+            pending = self._keys.get(key)
+            if pending is not None:
+                pending.event = event  # hali ya mwisho inashinda, nafasi ile ile
+                pending.droppable = pending.droppable and droppable
+                _count(coalesced=1)
+                return True
+
+        if len(self._entries) >= self.max_events and not self._drop_oldest():
+            if droppable:
+                _count(dropped=1)
+                return False
+            self._overflow()
+            return False
+
+        entry = _Entry(event, droppable, key)
+        self._entries.append(entry)
+        if key is not None:
+            self._keys[key] = entry
+        with _lock:
+            _stats["enqueued"] += 1
+            if len(self._entries) > _stats["peak_queue_depth"]:
+                _stats["peak_queue_depth"] = len(self._entries)
+
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        self._wakeup.set()
+        return True
+
+    def _drop_oldest(self) -> bool:
+        for entry in self._entries:
+            if entry.droppable:
+                self._entries.remove(entry)
+                if entry.key is not None:
+                    self._keys.pop(entry.key, None)
+                _count(dropped=1)
+                return True
+        return False
+
+    def _overflow(self) -> None:
+        logger.warning(
+            "send queue full (%d events) – closing slow websocket", len(self._entries)
+        )
+        _count(overflow_closes=1, dropped=len(self._entries) + 1)
+        self.closed = True
+        self._entries.clear()
+        self._keys.clear()
+        asyncio.ensure_future(self._close(code=OVERFLOW_CLOSE_CODE))
+
+    def _take_batch(self) -> list:
+        events = []
+        while self._entries and len(events) < self.max_batch:
+            entry = self._entries.popleft()
+            if entry.key is not None:
+                self._keys.pop(entry.key, None)
+            events.append(entry.event)
+        return events
+
+    async def _run(self) -> None:
+        while not self.closed:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._entries and not self.closed:
+                events = self._take_batch()
+                if len(events) == 1:
+                    frame = events[0]
+                else:
+                    frame = {"type": "batch", "events": events}
+                try:
+                    await self._send_json(frame)
+                except Exception:
+                    # socket imekufa; disconnect() itasimamisha foleni
+                    logger.exception("websocket send failed")
+                    _count(send_errors=1)
+                    self.closed = True
+                    return
+                _count(
+                    frames_sent=1,
+                    events_sent=len(events),
+                    batched_frames=int(len(events) > 1),
+                )
+
+    async def stop(self) -> None:
+        """
+        Connection imefungwa: events zilizobaki hazitumwi tena.
+        """
+        self.closed = True
+        self._entries.clear()
+        self._keys.clear()
+        with _lock:
+            _queues.discard(self)
+        task, self._task = self._task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+def batching_requested(scope) -> bool:
+    """
+    ?batch=1 kwenye URL ya socket => client anafungua frames za "batch".
+    """
+    values = parse_qs(scope.get("query_string", b"").decode()).get("batch")
+    return bool(values) and values[0].lower() in ("1", "true")
+
+
+class QueuedSendMixin:
+    """
+    Kwa AsyncJsonWebsocketConsumer: `self.push(event)` badala ya
+    `await self.send_json(event)` baada ya accept().
+
+    `send_batches` iwekwe kwenye connect() (batching_requested) kabla ya
+    push ya kwanza; False => event moja kwa kila frame.
+    """
+
+    send_queue: Optional[SendQueue] = None
+    send_batches: bool = False
+
+    def push(
+        self,
+        event: Dict[str, Any],
+        droppable: bool = False,
+        key: Optional[Hashable] = None,
+    ) -> bool:
+        if self.send_queue is None:
+            self.send_queue = SendQueue(
+                self.send_json,
+                self.close,
+                max_batch=None if self.send_batches else 1,
+            )
+        return self.send_queue.put(event, droppable=droppable, key=key)
+
+    async def stop_send_queue(self) -> None:
+        if self.send_queue is not None:
+            await self.send_queue.stop()
+
+
+# =========================
+#  METRICS
+# =========================
+
+def snapshot() -> Dict[str, int]:
+    with _lock:
+        data = dict(_stats)
+        queues = [queue for queue in _queues if not queue.closed]
+    depths = [len(queue) for queue in queues]
+    data.update(
+        connections=len(queues),
+        queued_events=sum(depths),
+        max_queue_depth=max(depths, default=0),
+    )
+    return data
+
+
+def reset_stats() -> None:
+    with _lock:
+        for name in _stats:
+            _stats[name] = 0
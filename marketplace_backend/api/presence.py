@@ -0,0 +1,306 @@
+# api/presence.py
+"""
+Presence (online / last seen) bila kuandika DB kwa kila event.
+
+- Hali ya sasa iko kwenye Django cache: `presence:<user_id>` =>
+  (timestamp ya heartbeat ya mwisho, online). WebSocket connect / ping /
+  message / mark_seen => `heartbeat()`; socket ya mwisho ya user ndani ya
+  process hii ikifungwa => `disconnect()` (online=False). Heartbeat ya zamani
+  kuliko `PRESENCE_ONLINE_SECONDS` => offline hata kama process ilikufa bila
+  disconnect.
+- last_seen_at inakusanywa kwenye buffer ya process (ya mwisho tu kwa kila
+  user / conversation) na thread ya nyuma inaiandika kila
+  `PRESENCE_FLUSH_SECONDS`: UPDATE moja kwa UserProfile.last_seen_at na
+  bulk_update ya ConversationParticipantState (last_seen_at / last_read_at),
+  bila kujali idadi ya events. `PRESENCE_FLUSH_SECONDS=0` => andika mara moja.
+- `bulk(user_ids)`: presence ya users wengi kwa `cache.get_many` moja (inbox,
+  /api/presence/). Wasiokuwepo kwenye cache => last_seen_at ya DB.
+
+Presence iko kwenye cache ya default – production yenye workers wengi
+inahitaji cache ya pamoja (`CACHE_URL`, system check api.E001) ili presence
+ionekane kote.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import Case, DateTimeField, Value, When
+
+from .models import Conversation, ConversationParticipantState, UserProfile
+
+logger = logging.getLogger("api.presence")
+
+_lock = threading.Lock()
+# user_id -> idadi ya sockets zilizo wazi kwenye process hii
+_sockets: Dict[int, int] = {}
+# buffers zinazosubiri flush
+_users_seen: Dict[int, datetime] = {}
+# (conversation_id, user_id) -> [last_seen_at, last_read_at au None]
+_states_seen: Dict[Tuple[int, int], list] = {}
+_flusher: Optional[threading.Thread] = None
+
+
+def cache_key(user_id: int) -> str:
+    return f"presence:{user_id}"
+
+
+def _now() -> datetime:
+    return datetime.now(dt_timezone.utc)
+
+
+# =========================
+#  EVENTS
+# =========================
+
+def connect(user_id: int, conversation_id: Optional[int] = None, read: bool = False) -> None:
+    """
+    Socket mpya ya user (chat au notifications).
+    """
+    with _lock:
+        _sockets[user_id] = _sockets.get(user_id, 0) + 1
+    heartbeat(user_id, conversation_id, read=read)
+
+
+def disconnect(user_id: int, conversation_id: Optional[int] = None) -> None:
+    """
+    Socket imefungwa; user anakuwa offline kama hana socket nyingine hapa.
+    """
+    with _lock:
+        remaining = _sockets.get(user_id, 0) - 1
+        if remaining > 0:
+            _sockets[user_id] = remaining
+        else:
+            _sockets.pop(user_id, None)
+    _record(user_id, conversation_id, online=remaining > 0)
+
+
+def heartbeat(user_id: int, conversation_id: Optional[int] = None, read: bool = False) -> None:
+    """
+    User yuko hai sasa. `conversation_id` => last_seen_at ya conversation
+    hiyo pia; `read=True` => na last_read_at (amesoma messages zake).
+    """
+    _record(user_id, conversation_id, online=True, read=read)
+
+
+def _record(user_id: int, conversation_id: Optional[int], online: bool, read: bool = False) -> None:
+    now = _now()
+    cache.set(
+        cache_key(user_id),
+        (now.timestamp(), online),
+        settings.PRESENCE_CACHE_SECONDS,
+    )
+    with _lock:
+        _users_seen[user_id] = now
+        if conversation_id is not None:
+            entry = _states_seen.setdefault((conversation_id, user_id), [now, None])
+            entry[0] = now
+            if read:
+                entry[1] = now
+
+    if settings.PRESENCE_FLUSH_SECONDS <= 0:
+        flush()
+    else:
+        _ensure_flusher()
+
+
+# =========================
+#  QUERY
+# =========================
+
+def bulk(
+    user_ids: Iterable[int],
+    stored: Optional[Dict[int, Optional[datetime]]] = None,
+) -> Dict[int, dict]:
+    """
+    {user_id: {"online": bool, "last_seen_at": datetime | None}} kwa cache
+    read moja. `stored`: last_seen_at za DB (mf. profile zilizokwisha
+    select_related) kwa users wasio kwenye cache.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    stored = stored or {}
+    found = cache.get_many([cache_key(user_id) for user_id in user_ids])
+    cutoff = time.time() - settings.PRESENCE_ONLINE_SECONDS
+
+    result = {}
+    for user_id in user_ids:
+        entry = found.get(cache_key(user_id))
+        if entry is None:
+            result[user_id] = {"online": False, "last_seen_at": stored.get(user_id)}
+            continue
+        timestamp, online = entry
+        result[user_id] = {
+            "online": online and timestamp >= cutoff,
+            "last_seen_at": datetime.fromtimestamp(timestamp, dt_timezone.utc),
+        }
+    return result
+
+
+def other_party(conversation, user):
+    """
+    User wa upande mwingine wa conversation (buyer <-> seller.user).
+    """
+    if conversation.buyer_id == user.id:
+        return conversation.seller.user
+    return conversation.buyer
+
+
+def for_conversations(conversations: Iterable, user) -> Dict[int, dict]:
+    """
+    Presence ya upande mwingine wa kila conversation (inbox). Profiles
+    zikiwa zimekwisha select_related, hakuna query ya DB – cache read moja.
+    """
+    stored = {}
+    for conversation in conversations:
+        other = other_party(conversation, user)
+        try:
+            stored[other.id] = other.profile.last_seen_at
+        except UserProfile.DoesNotExist:
+            stored[other.id] = None
+    return bulk(stored, stored)
+
+
+def stored_last_seen(user_ids: Iterable[int]) -> Dict[int, Optional[datetime]]:
+    """
+    last_seen_at zilizohifadhiwa kwenye DB (query moja).
+    """
+    return dict(
+        UserProfile.objects.filter(user_id__in=list(user_ids)).values_list(
+            "user_id", "last_seen_at"
+        )
+    )
+
+
+# =========================
+#  FLUSH (buffer -> DB)
+# =========================
+
+def pending() -> Tuple[int, int]:
+    """
+    (users, conversation states) wanaosubiri flush.
+    """
+    with _lock:
+        return len(_users_seen), len(_states_seen)
+
+
+def flush() -> Tuple[int, int]:
+    """
+    Andika buffer yote kwenye DB. Rudisha (users, states) zilizoandikwa.
+    Ikishindikana, buffer inarudishwa ili flush inayofuata ijaribu tena.
+    """
+    global _users_seen, _states_seen
+    with _lock:
+        users, states = _users_seen, _states_seen
+        _users_seen, _states_seen = {}, {}
+    if not users and not states:
+        return 0, 0
+
+    try:
+        with transaction.atomic():
+            _write_users(users)
+            _write_states(states)
+    except Exception:
+        logger.exception(
+            "presence flush failed (%d users, %d states)", len(users), len(states)
+        )
+        _requeue(users, states)
+        return 0, 0
+    return len(users), len(states)
+
+
+def _write_users(users: Dict[int, datetime]) -> None:
+    if not users:
+        return
+    UserProfile.objects.filter(user_id__in=list(users)).update(
+        last_seen_at=Case(
+            *(When(user_id=user_id, then=Value(seen)) for user_id, seen in users.items()),
+            output_field=DateTimeField(),
+        )
+    )
+
+
+def _write_states(states: Dict[Tuple[int, int], list]) -> None:
+    if not states:
+        return
+    conversation_ids = {conversation_id for conversation_id, _ in states}
+    user_ids = {user_id for _, user_id in states}
+    existing = {
+        (row.conversation_id, row.user_id): row
+        for row in ConversationParticipantState.objects.filter(
+            conversation_id__in=conversation_ids, user_id__in=user_ids
+        ).only("id", "conversation_id", "user_id")
+    }
+
+    seen_only, seen_and_read, missing = [], [], []
+    for key, (seen, read) in states.items():
+        row = existing.get(key)
+        if row is None:
+            missing.append(
+                ConversationParticipantState(
+                    conversation_id=key[0], user_id=key[1], last_seen_at=seen, last_read_at=read
+                )
+            )
+            continue
+        row.last_seen_at = seen
+        if read is None:
+            seen_only.append(row)
+        else:
+            row.last_read_at = read
+            seen_and_read.append(row)
+
+    if seen_only:
+        ConversationParticipantState.objects.bulk_update(seen_only, ["last_seen_at"])
+    if seen_and_read:
+        ConversationParticipantState.objects.bulk_update(
+            seen_and_read, ["last_seen_at", "last_read_at"]
+        )
+    if missing:
+        # conversation iliyofutwa kabla ya flush haipati state
+        alive = set(
+            Conversation.objects.filter(
+                id__in={row.conversation_id for row in missing}
+            ).values_list("id", flat=True)
+        )
+        ConversationParticipantState.objects.bulk_create(
+            [row for row in missing if row.conversation_id in alive],
+            ignore_conflicts=True,
+        )
+
+
+def _requeue(users, states) -> None:
+    with _lock:
+        for user_id, seen in users.items():
+            if user_id not in _users_seen:
+                _users_seen[user_id] = seen
+        for key, entry in states.items():
+            _states_seen.setdefault(key, entry)
+
+
+def _ensure_flusher() -> None:
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _lock:
+        if _flusher is not None and _flusher.is_alive():
+            return
+        _flusher = threading.Thread(target=_flush_loop, name="presence-flush", daemon=True)
+        _flusher.start()
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(max(settings.PRESENCE_FLUSH_SECONDS, 1))
+        flush()
+        # thread hii ina connection yake; isibaki wazi kati ya flushes
+        connections.close_all()
+
+
+atexit.register(flush)
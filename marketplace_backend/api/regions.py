@@ -0,0 +1,221 @@
+# api/regions.py
+"""
+Nearby search kwa regions (geographic partitions) badala ya kupitia sellers
+wote wa nchi nzima.
+
+- Kila Location ina `region`: cell ya grid ya `NEARBY_REGION_CELL_DEGREES`
+  (default 1° ≈ 111 km) iliyotokana na coordinates, mf. "-7:39" (Dar es
+  Salaam), "-7:35" (Dodoma), "-3:32" (Mwanza). Inahesabiwa kwenye
+  Location.save(); bulk_create / update() => `warm_nearby_regions --reassign`.
+- Cache ya kila region (Django cache): [(seller_id, lat, lng), ...] –
+  tuples ndogo, si model instances. Region moja ikibadilika (Location
+  save/delete) ni cache yake tu inayofutwa (api/signals.py).
+- `sellers_within(lat, lng, radius)`: cells zinazogusa mduara wa radius =>
+  `cache.get_many` moja; cells zisizo kwenye cache => query MOJA
+  (`region__in`) kisha zinahifadhiwa. Haversine inapigwa kwa sellers wa
+  regions hizo tu.
+- `warm(...)`: jaza cache ya regions fulani (au zote) mapema –
+  `python manage.py warm_nearby_regions --city "Dar es Salaam"`.
+
+Radius kubwa sana (cells > NEARBY_REGION_MAX_CELLS) au karibu na ncha za
+dunia => None, na caller anarudi kwenye scan ya kawaida.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .utils import haversine_many
+
+CACHE_PREFIX = "api:nearby-region:v1"
+GENERATION_KEY = f"{CACHE_PREFIX}:generation"
+KM_PER_DEGREE = 111.32
+
+Entry = Tuple[int, float, float]  # (seller_id, latitude, longitude)
+
+
+# =========================
+#  REGION KEYS
+# =========================
+
+def _cell(value: float) -> int:
+    return math.floor(float(value) / settings.NEARBY_REGION_CELL_DEGREES)
+
+
+def region_key(latitude, longitude) -> str:
+    """
+    Region (cell ya grid) ya coordinates hizi.
+    """
+    return f"{_cell(latitude)}:{_cell(longitude)}"
+
+
+def regions_within(latitude: float, longitude: float, radius_km: float) -> Optional[List[str]]:
+    """
+    Regions zote zinazogusa bounding box ya mduara wa `radius_km`. None =>
+    ni nyingi mno (tumia scan ya kawaida).
+    """
+    lat_delta = radius_km / KM_PER_DEGREE
+    cos_lat = math.cos(math.radians(min(abs(latitude) + lat_delta, 90.0)))
+    if cos_lat < 0.01:
+        return None
+    lng_delta = radius_km / (KM_PER_DEGREE * cos_lat)
+
+    lat_cells = range(_cell(latitude - lat_delta), _cell(latitude + lat_delta) + 1)
+    lng_cells = range(_cell(longitude - lng_delta), _cell(longitude + lng_delta) + 1)
+    if len(lat_cells) * len(lng_cells) > settings.NEARBY_REGION_MAX_CELLS:
+        return None
+    return [f"{lat}:{lng}" for lat in lat_cells for lng in lng_cells]
+
+
+def regions_for_city(city: str) -> List[str]:
+    """
+    Regions zenye sellers wa mji huu (kwa warm ya mji mmoja).
+    """
+    from .models import Location
+
+    return sorted(
+        set(
+            Location.objects.filter(city__iexact=city.strip())
+            .exclude(region="")
+            .values_list("region", flat=True)
+        )
+    )
+
+
+# =========================
+#  CACHE
+# =========================
+
+def _generation() -> int:
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, 1, None)
+        generation = cache.get(GENERATION_KEY, 1)
+    return generation
+
+
+def cache_key(region: str, generation: Optional[int] = None) -> str:
+    return f"{CACHE_PREFIX}:{generation or _generation()}:{region}"
+
+
+def _fetch(regions: Iterable[str]) -> Dict[str, List[Entry]]:
+    """
+    Sellers wa regions hizi kutoka DB – query moja.
+    """
+    from .models import Location
+
+    found: Dict[str, List[Entry]] = {region: [] for region in regions}
+    rows = Location.objects.filter(region__in=list(found)).values_list(
+        "region", "seller_id", "latitude", "longitude"
+    )
+    for region, seller_id, lat, lng in rows:
+        found[region].append((seller_id, float(lat), float(lng)))
+    return found
+
+
+def load(regions: Iterable[str]) -> Dict[str, List[Entry]]:
+    """
+    {region: [(seller_id, lat, lng), ...]} – cache kwanza, DB kwa
+    zinazokosekana tu (zinahifadhiwa, hata kama hazina sellers).
+    """
+    regions = list(dict.fromkeys(regions))
+    generation = _generation()
+    keys = {cache_key(region, generation): region for region in regions}
+    cached = cache.get_many(list(keys))
+    result = {keys[key]: entries for key, entries in cached.items()}
+
+    missing = [region for region in regions if region not in result]
+    if missing:
+        fetched = _fetch(missing)
+        cache.set_many(
+            {cache_key(region, generation): entries for region, entries in fetched.items()},
+            settings.NEARBY_REGION_CACHE_SECONDS,
+        )
+        result.update(fetched)
+    return result
+
+
+def warm(regions: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    Jaza upya cache ya regions hizi (None => regions zote zenye sellers).
+    Rudisha {region: idadi ya sellers}.
+    """
+    from .models import Location
+
+    if regions is None:
+        regions = Location.objects.exclude(region="").values_list("region", flat=True).distinct()
+    fetched = _fetch(regions)
+    generation = _generation()
+    cache.set_many(
+        {cache_key(region, generation): entries for region, entries in fetched.items()},
+        settings.NEARBY_REGION_CACHE_SECONDS,
+    )
+    return {region: len(entries) for region, entries in fetched.items()}
+
+
+def invalidate(*regions: str) -> None:
+    """
+    Futa cache ya regions hizi tu (Location imebadilika).
+    """
+    generation = _generation()
+    cache.delete_many([cache_key(region, generation) for region in regions if region])
+
+
+def invalidate_all() -> None:
+    """
+    Regions zote (mf. baada ya --reassign au DB mpya): generation mpya.
+    """
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 2, None)
+
+
+def reassign() -> int:
+    """
+    Hesabu upya Location.region kutoka coordinates (baada ya bulk import,
+    update() ya coordinates au kubadilisha NEARBY_REGION_CELL_DEGREES).
+    Rudisha idadi ya rows zilizobadilika.
+    """
+    from .models import Location
+
+    changed = []
+    for location in Location.objects.only("id", "latitude", "longitude", "region").iterator():
+        region = region_key(location.latitude, location.longitude)
+        if location.region != region:
+            location.region = region
+            changed.append(location)
+    Location.objects.bulk_update(changed, ["region"], batch_size=1000)
+    invalidate_all()
+    return len(changed)
+
+
+# =========================
+#  NEARBY
+# =========================
+
+def sellers_within(latitude: float, longitude: float, radius_km: float) -> Optional[Dict[int, float]]:
+    """
+    {seller_id: distance_km} ya sellers walio ndani ya radius, kwa kupitia
+    regions husika tu. None => radius inagusa regions nyingi mno.
+    """
+    regions = regions_within(latitude, longitude, radius_km)
+    if regions is None:
+        return None
+
+    entries = [entry for found in load(regions).values() for entry in found]
+    distances = haversine_many(
+        latitude,
+        longitude,
+        [lat for _, lat, _ in entries],
+        [lng for _, _, lng in entries],
+    )
+    return {
+        seller_id: distance
+        for (seller_id, _, _), distance in zip(entries, distances)
+        if distance <= radius_km
+    }
@@ -0,0 +1,241 @@
+# api/retention.py
+"""
+Retention ya notifications na messages: rows za zamani zinahamishwa kwenda
+JSONL iliyobanwa (gzip) na kufutwa kwenye tables za kila siku.
+
+- notifications: zilizosomwa na zenye umri zaidi ya
+  `RETENTION_NOTIFICATION_DAYS`.
+- messages: za conversations "zilizofungwa" – hakuna message mpya kwa
+  `RETENTION_CONVERSATION_IDLE_DAYS`. Message ya mwisho ya kila conversation
+  inabaki ili inbox iendelee kuonyesha preview.
+
+Kazi inafanywa kwa batches (`RETENTION_BATCH_SIZE`): SELECT batch kwa pk,
+andika kwenye archive (flush), kisha DELETE ya batch hiyo kwenye transaction
+yake fupi. Writers hawasubiri lock kubwa, na tables + indexes zinabaki ndogo.
+Ikikatika katikati, batch iliyoandikwa lakini haikufutwa itaandikwa tena
+(archive ni at-least-once; `id` inatambulisha duplicates).
+
+Idempotency keys (api.idempotency) zilizopita IDEMPOTENCY_KEY_TTL_HOURS
+zinafutwa tu (bila archive) kwa batches zile zile.
+
+Messages zilizohamishwa zinaweza kuwa hazijasomwa, kwa hiyo unread counters
+(api.unread) zinahesabiwa upya baada ya messages kuhamishwa.
+
+Inaendeshwa na `python manage.py archive_old_data` (cron / scheduler),
+au `run_retention()` moja kwa moja.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import List, Optional, Sequence
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from . import idempotency, unread
+from .models import IdempotencyKey, Message, Notification
+
+NOTIFICATION_FIELDS = (
+    "id",
+    "user_id",
+    "notif_type",
+    "title",
+    "body",
+    "data",
+    "conversation_id",
+    "count",
+    "is_read",
+    "created_at",
+)
+MESSAGE_FIELDS = (
+    "id",
+    "conversation_id",
+    "sender_id",
+    "text",
+    "status",
+    "is_read",
+    "created_at",
+    "updated_at",
+)
+
+
+@dataclass
+class ArchiveResult:
+    table: str
+    rows: int = 0
+    batches: int = 0
+    path: Optional[str] = None
+    dry_run: bool = False
+    action: str = "archive"
+
+    def __str__(self) -> str:
+        verb = f"would {self.action}" if self.dry_run else f"{self.action}d"
+        where = f" -> {self.path}" if self.path else ""
+        return f"{self.table}: {verb} {self.rows} rows in {self.batches} batches{where}"
+
+
+def expired_notifications(days: int):
+    cutoff = timezone.now() - timedelta(days=days)
+    return Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+
+
+def closed_conversation_messages(idle_days: int):
+    """
+    Messages za conversations zisizo na message mpya kwa `idle_days`, bila
+    message ya mwisho ya kila conversation.
+    """
+    cutoff = timezone.now() - timedelta(days=idle_days)
+    latest = (
+        Message.objects.filter(conversation=OuterRef("conversation"))
+        .order_by("-created_at", "-id")
+        .values("id")[:1]
+    )
+    return Message.objects.filter(conversation__last_message_at__lt=cutoff).exclude(
+        id=Subquery(latest)
+    )
+
+
+def archive_queryset(
+    queryset,
+    table: str,
+    fields: Sequence[str],
+    archive_dir: str,
+    batch_size: int,
+    pause: float = 0.0,
+    dry_run: bool = False,
+) -> ArchiveResult:
+    """
+    Hamisha rows zote za `queryset` kwenda `<archive_dir>/<table>-<timestamp>.jsonl.gz`
+    kwa batches za `batch_size`, ukipumzika `pause` sekunde kati ya batches.
+    """
+    result = ArchiveResult(table, dry_run=dry_run)
+    if dry_run:
+        result.rows = queryset.count()
+        result.batches = -(-result.rows // batch_size)
+        return result
+
+    model = queryset.model
+    last_pk = 0
+    fh = None
+    try:
+        while True:
+            rows = list(
+                queryset.filter(pk__gt=last_pk).order_by("pk").values(*fields)[:batch_size]
+            )
+            if not rows:
+                break
+            if fh is None:
+                os.makedirs(archive_dir, exist_ok=True)
+                stamp = timezone.now().strftime("%Y%m%dT%H%M%S")
+                result.path = os.path.join(archive_dir, f"{table}-{stamp}.jsonl.gz")
+                fh = gzip.open(result.path, "at", encoding="utf-8")
+
+            fh.writelines(json.dumps(row, cls=DjangoJSONEncoder) + "\n" for row in rows)
+            fh.flush()
+
+            ids = [row["id"] for row in rows]
+            with transaction.atomic():
+                model._base_manager.filter(pk__in=ids).delete()
+
+            last_pk = ids[-1]
+            result.rows += len(ids)
+            result.batches += 1
+            if pause:
+                time.sleep(pause)
+    finally:
+        if fh is not None:
+            fh.close()
+    return result
+
+
+def purge_queryset(
+    queryset,
+    table: str,
+    batch_size: int,
+    pause: float = 0.0,
+    dry_run: bool = False,
+) -> ArchiveResult:
+    """
+    Futa rows zote za `queryset` kwa batches (bila archive).
+    """
+    result = ArchiveResult(table, dry_run=dry_run, action="delete")
+    if dry_run:
+        result.rows = queryset.count()
+        result.batches = -(-result.rows // batch_size)
+        return result
+
+    model = queryset.model
+    while True:
+        ids = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            model._base_manager.filter(pk__in=ids).delete()
+        result.rows += len(ids)
+        result.batches += 1
+        if pause:
+            time.sleep(pause)
+    return result
+
+
+def run_retention(
+    notification_days: Optional[int] = None,
+    idle_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    pause: Optional[float] = None,
+    dry_run: bool = False,
+) -> List[ArchiveResult]:
+    """
+    Endesha retention yote kwa settings (au thamani zilizotolewa). Siku 0
+    => sehemu hiyo inarukwa.
+    """
+    notification_days = (
+        settings.RETENTION_NOTIFICATION_DAYS if notification_days is None else notification_days
+    )
+    idle_days = settings.RETENTION_CONVERSATION_IDLE_DAYS if idle_days is None else idle_days
+    options = {
+        "archive_dir": archive_dir or settings.RETENTION_ARCHIVE_DIR,
+        "batch_size": batch_size or settings.RETENTION_BATCH_SIZE,
+        "pause": settings.RETENTION_BATCH_PAUSE_MS / 1000 if pause is None else pause,
+        "dry_run": dry_run,
+    }
+
+    results = [
+        purge_queryset(
+            IdempotencyKey.objects.filter(created_at__lt=idempotency.expired_before()),
+            "idempotency_keys",
+            batch_size=options["batch_size"],
+            pause=options["pause"],
+            dry_run=dry_run,
+        )
+    ]
+    if notification_days > 0:
+        results.append(
+            archive_queryset(
+                expired_notifications(notification_days),
+                "notifications",
+                NOTIFICATION_FIELDS,
+                **options,
+            )
+        )
+    if idle_days > 0:
+        result = archive_queryset(
+            closed_conversation_messages(idle_days),
+            "messages",
+            MESSAGE_FIELDS,
+            **options,
+        )
+        results.append(result)
+        if result.rows and not dry_run:
+            unread.recalculate()
+    return results
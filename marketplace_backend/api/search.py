@@ -0,0 +1,322 @@
+# api/search.py
+"""
+Full-text search ya products (SQLite FTS5).
+
+- Index: virtual table `product_search` (rowid = product.id) yenye columns
+  name, description, business_name na `stems` (stems za English + Swahili).
+- Inasasishwa na signals (api/signals.py) kila product / seller anapobadilika;
+  `manage.py rebuild_search_index` ina-jenga upya yote.
+- ProductSearchFilter inachukua nafasi ya DRF SearchFilter kwenye
+  ProductViewSet: MATCH + bm25 ranking, prefix matching kwa type-ahead.
+  Table ya FTS inaunganishwa (join) ndani ya queryset yenyewe, kwa hiyo
+  filters za view (is_active, category, price, mji) zinatumika pamoja na
+  MATCH, na PRODUCT_SEARCH_MAX_RESULTS inakata matokeo yaliyokwisha
+  chujwa – si index nzima.
+- Migration 0009 inatengeneza table tupu tu; `fill_index_if_empty` (post_migrate)
+  inaijaza kwa code ya sasa.
+- Database isiyo na FTS5 (Postgres/MySQL n.k.) → tunarudi kwenye
+  SearchFilter ya kawaida (icontains).
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, IntegerField, When
+from rest_framework import filters
+
+FTS_TABLE = "product_search"
+
+# uzito wa columns kwenye bm25 (name, description, business_name, stems)
+BM25_WEIGHTS = (10.0, 1.0, 4.0, 2.0)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_fts_cache = {}
+
+
+# =========================
+#  STEMMING (light, deterministic)
+# =========================
+
+_EN_SUFFIXES = ("ies", "es", "s", "ing", "ed")
+_SW_SUFFIXES = (
+    "ishwa",
+    "eshwa",
+    "ishia",
+    "eshea",
+    "isha",
+    "esha",
+    "iwa",
+    "ewa",
+    "ika",
+    "eka",
+    "ana",
+)
+
+
+def _en_stem(word: str) -> str:
+    """
+    English stemmer ndogo (plural + -ing/-ed). Si Porter kamili, lakini
+    index na query zinatumia function hii hii kwa hiyo zinalingana.
+    """
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("es") and word[-3] in "sxz":
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            stem = word[: -len(suffix)]
+            if len(stem) > 3 and stem[-1] == stem[-2] and stem[-1] not in "lsz":
+                stem = stem[:-1]
+            return stem
+    return word
+
+
+def _sw_stem(word: str) -> str:
+    """
+    Swahili stemmer ndogo:
+    - ngeli ya KI-VI: viatu -> kiatu, vitabu -> kitabu
+    - viambishi vya mnyambuliko: pikisha -> pik, uzwa -> uz n.k.
+    """
+    if len(word) >= 5 and word.startswith("vi"):
+        word = "ki" + word[2:]
+    for suffix in _SW_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD_RE.findall((text or "").lower())
+
+
+def stems_for(text: str) -> str:
+    """
+    Stems zote (English + Swahili) za text, zikiwa zimeunganishwa kwa space.
+    """
+    out = []
+    seen = set()
+    for word in tokenize(text):
+        for stem in (_en_stem(word), _sw_stem(word)):
+            if stem not in seen:
+                seen.add(stem)
+                out.append(stem)
+    return " ".join(out)
+
+
+# =========================
+#  INDEX MAINTENANCE
+# =========================
+
+def fts_available(using: str = "default") -> bool:
+    """
+    True kama DB ni SQLite na table ya FTS5 ipo (migration imepita).
+    """
+    if using in _fts_cache:
+        return _fts_cache[using]
+
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        _fts_cache[using] = False
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE],
+        )
+        available = cursor.fetchone() is not None
+
+    # tuna-cache "True" tu; "False" inaweza kubadilika baada ya migrate
+    if available:
+        _fts_cache[using] = True
+    return available
+
+
+def _row_params(product, business_name: Optional[str] = None):
+    if business_name is None:
+        business_name = product.seller.business_name if product.seller_id else ""
+    name = product.name or ""
+    description = product.description or ""
+    return [
+        product.pk,
+        name,
+        description,
+        business_name,
+        stems_for(f"{name} {business_name} {description}"),
+    ]
+
+
+def index_products(products: Iterable, using: str = "default") -> None:
+    """
+    Upsert rows za products kwenye index.
+    """
+    if not fts_available(using):
+        return
+
+    rows = [_row_params(p) for p in products]
+    if not rows:
+        return
+
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s",
+            [[row[0]] for row in rows],
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description, business_name, stems) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def unindex_products(product_ids: Iterable[int], using: str = "default") -> None:
+    if not fts_available(using):
+        return
+
+    ids = [[pk] for pk in product_ids]
+    if not ids:
+        return
+
+    with connections[using].cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", ids)
+
+
+def fill_index_if_empty(using: str = "default") -> int:
+    """
+    Jaza index kama ni tupu lakini products zipo (baada ya migrate kwenye DB
+    yenye data). Rudisha idadi ya rows zilizoingizwa.
+    """
+    from .models import Product
+
+    # migrate inaweza kuwa imeitoa table (rollback) – usitegemee cache
+    _fts_cache.pop(using, None)
+    if not fts_available(using):
+        return 0
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"SELECT 1 FROM {FTS_TABLE} LIMIT 1")
+        if cursor.fetchone() is not None:
+            return 0
+    if not Product.objects.using(using).exists():
+        return 0
+    return rebuild_index(using)
+
+
+def rebuild_index(using: str = "default", batch_size: int = 1000) -> int:
+    """
+    Futa index yote na uijenge upya kutoka Product table.
+    """
+    from .models import Product
+
+    if not fts_available(using):
+        return 0
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+    count = 0
+    batch = []
+    qs = Product.objects.using(using).select_related("seller").only(
+        "id", "name", "description", "seller__business_name"
+    )
+    for product in qs.iterator(chunk_size=batch_size):
+        batch.append(product)
+        if len(batch) >= batch_size:
+            index_products(batch, using)
+            count += len(batch)
+            batch = []
+    if batch:
+        index_products(batch, using)
+        count += len(batch)
+    return count
+
+
+# =========================
+#  QUERYING
+# =========================
+
+def _quote(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def build_match_query(terms: Iterable[str]) -> Optional[str]:
+    """
+    Geuza maneno ya user kuwa FTS5 MATCH expression.
+
+    Kila neno t => ("t"* OR stems : "stem(t)")  (maneno yote lazima yawepo)
+    - "t"*  -> prefix match kwa type-ahead ("lapt" -> laptop)
+    - stems -> "viatu" inapata "kiatu", "phones" inapata "phone" n.k.
+    """
+    clauses = []
+    for raw in terms:
+        for word in tokenize(raw):
+            alternatives = [f"{_quote(word)}*"]
+            for stem in {_en_stem(word), _sw_stem(word)}:
+                alternatives.append(f"stems : {_quote(stem)}")
+            clauses.append("(" + " OR ".join(alternatives) + ")")
+
+    if not clauses:
+        return None
+    return " AND ".join(clauses)
+
+
+def search_product_ids(queryset, terms: Iterable[str], limit: Optional[int] = None) -> List[int]:
+    """
+    Ids za products za `queryset` zinazolingana na terms, zimepangwa kwa
+    rank (bora kwanza), zisizozidi `limit` (PRODUCT_SEARCH_MAX_RESULTS).
+
+    Table ya FTS inaunganishwa (join) ndani ya query ya queryset yenyewe,
+    kwa hiyo limit inakata matokeo baada ya filters zake zote (is_active,
+    category, price ...), si index nzima.
+    """
+    match = build_match_query(terms)
+    if match is None:
+        return []
+
+    limit = limit or settings.PRODUCT_SEARCH_MAX_RESULTS
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    opts = queryset.model._meta
+    matched = queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f"{FTS_TABLE}.rowid = {opts.db_table}.{opts.pk.column}",
+            f"{FTS_TABLE} MATCH %s",
+        ],
+        params=[match],
+        select={"search_rank": f"bm25({FTS_TABLE}, {weights})"},
+    )
+    return list(matched.order_by("search_rank").values_list("pk", flat=True)[:limit])
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    Search backend ya ProductViewSet (?search=...).
+
+    Inatumia FTS5 index kama ipo; vinginevyo inafanya kama SearchFilter
+    ya kawaida (view.search_fields + icontains).
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        if not fts_available(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+
+        ids = search_product_ids(queryset, terms)
+        if not ids:
+            return queryset.none()
+
+        rank = Case(
+            *[When(pk=pk, then=pos) for pos, pk in enumerate(ids)],
+            output_field=IntegerField(),
+        )
+        return queryset.filter(pk__in=ids).order_by(rank)
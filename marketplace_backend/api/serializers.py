@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.contrib.auth.models import User
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 
+from . import presence
+
 from .models import (
     UserProfile,
     SellerProfile,
@@ -36,6 +39,18 @@ def _build_absolute_uri(request, file_field):
     return request.build_absolute_uri(url)
 
 
+def _annotated(obj, name, fallback):
+    """
+    Helper: soma annotation (Product.objects.with_stats(),
+    Conversation.objects.with_inbox_state()) kama ipo; vinginevyo piga
+    `fallback()` (query moja – object moja nje ya viewsets).
+    """
+    value = getattr(obj, name, None)
+    if value is None:
+        return fallback()
+    return value
+
+
 # =========================
 #  USER & PROFILE
 # =========================
@@ -47,8 +62,10 @@ class UserProfileSerializer(serializers.ModelSerializer):
     - preferred_language: 'en' / 'sw'
     - theme: 'light' / 'dark' / 'system'
     - avatar: profile picture
+    - avatar_thumb_url: thumbnail ya avatar (ikishatengenezwa)
     """
     avatar_url = serializers.SerializerMethodField()
+    avatar_thumb_url = serializers.SerializerMethodField()
 
     class Meta:
         model = UserProfile
@@ -58,6 +75,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
             "theme",
             "avatar",
             "avatar_url",
+            "avatar_thumb_url",
             "created_at",
             "updated_at",
         ]
@@ -68,6 +86,11 @@ class UserProfileSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         return _build_absolute_uri(request, obj.avatar)
 
+    @extend_schema_field(serializers.CharField(allow_null=True))
+    def get_avatar_thumb_url(self, obj):
+        request = self.context.get("request")
+        return _build_absolute_uri(request, obj.avatar_thumb)
+
 
 class UserSerializer(serializers.ModelSerializer):
     """
@@ -130,6 +153,7 @@ class UserMiniSerializer(serializers.ModelSerializer):
     User mdogo kwa ajili ya chat, seller info, n.k.
     """
     avatar_url = serializers.SerializerMethodField()
+    avatar_thumb_url = serializers.SerializerMethodField()
     is_seller = serializers.SerializerMethodField()
 
     class Meta:
@@ -141,6 +165,7 @@ class UserMiniSerializer(serializers.ModelSerializer):
             "last_name",
             "email",
             "avatar_url",
+            "avatar_thumb_url",
             "is_seller",
         ]
 
@@ -152,6 +177,14 @@ class UserMiniSerializer(serializers.ModelSerializer):
             return _build_absolute_uri(request, profile.avatar)
         return None
 
+    @extend_schema_field(serializers.CharField(allow_null=True))
+    def get_avatar_thumb_url(self, obj):
+        request = self.context.get("request")
+        profile = getattr(obj, "profile", None)
+        if profile and profile.avatar_thumb:
+            return _build_absolute_uri(request, profile.avatar_thumb)
+        return None
+
     @extend_schema_field(serializers.BooleanField())
     def get_is_seller(self, obj):
         profile = getattr(obj, "profile", None)
@@ -312,6 +345,7 @@ class SellerProfileSerializer(serializers.ModelSerializer):
     - user: full UserSerializer (ina profile info)
     - location: LocationSerializer (ina distance kama umehesabiwa)
     - logo_url: absolute URL
+    - logo_thumb_url / shop_image_thumb_url: thumbnails (ikishatengenezwa)
     - rating, rating_count
     - total_sales, items_sold
     - distance: kwa seller (ikiwekwa na haversine kwenye view)
@@ -328,8 +362,10 @@ class SellerProfileSerializer(serializers.ModelSerializer):
     )
 
     logo_url = serializers.SerializerMethodField()
+    logo_thumb_url = serializers.SerializerMethodField()
 
     shop_image_url = serializers.SerializerMethodField()
+    shop_image_thumb_url = serializers.SerializerMethodField()
 
     class Meta:
         model = SellerProfile
@@ -346,8 +382,10 @@ class SellerProfileSerializer(serializers.ModelSerializer):
             "items_sold",
             "logo",
             "logo_url",
+            "logo_thumb_url",
             "shop_image",
             "shop_image_url",
+            "shop_image_thumb_url",
             "location",
             "distance",
             "created_at",
@@ -370,17 +408,28 @@ class SellerProfileSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         return _build_absolute_uri(request, obj.logo)
     
+    @extend_schema_field(serializers.CharField(allow_null=True))
+    def get_logo_thumb_url(self, obj):
+        request = self.context.get("request")
+        return _build_absolute_uri(request, obj.logo_thumb)
+
     @extend_schema_field(serializers.CharField(allow_null=True))
     def get_shop_image_url(self, obj):
         request = self.context.get("request")
         return _build_absolute_uri(request, obj.shop_image)
 
+    @extend_schema_field(serializers.CharField(allow_null=True))
+    def get_shop_image_thumb_url(self, obj):
+        request = self.context.get("request")
+        return _build_absolute_uri(request, obj.shop_image_thumb)
+
 
 class SellerMiniSerializer(serializers.ModelSerializer):
     """
     Seller kwa matumizi ya ndani ya product / conversation headers.
     """
     logo_url = serializers.SerializerMethodField()
+    logo_thumb_url = serializers.SerializerMethodField()
     user = UserMiniSerializer(read_only=True)
 
     class Meta:
@@ -394,6 +443,7 @@ class SellerMiniSerializer(serializers.ModelSerializer):
             "total_sales",
             "items_sold",
             "logo_url",
+            "logo_thumb_url",
             "user",
         ]
 
@@ -402,6 +452,11 @@ class SellerMiniSerializer(serializers.ModelSerializer):
         request = self.context.get("request")
         return _build_absolute_uri(request, obj.logo)
 
+    @extend_schema_field(serializers.CharField(allow_null=True))
+    def get_logo_thumb_url(self, obj):
+        request = self.context.get("request")
+        return _build_absolute_uri(request, obj.logo_thumb)
+
 
 class SellerProfileCreateSerializer(serializers.ModelSerializer):
     """
@@ -430,7 +485,6 @@ class CategorySerializer(serializers.ModelSerializer):
     Serializer for Category model
     """
 
-    product_count = serializers.IntegerField(read_only=True, required=False)
     seller_id = serializers.IntegerField(
         source="seller.id",
         read_only=True,
@@ -446,6 +500,8 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = [
             "id",
             "name",
+            "slug",
+            "parent",
             "description",
             "icon",
             "seller_id",
@@ -453,7 +509,26 @@ class CategorySerializer(serializers.ModelSerializer):
             "product_count",
             "created_at",
         ]
-        read_only_fields = ["id", "created_at", "seller_id", "seller_name", "product_count"]
+        read_only_fields = [
+            "id",
+            "slug",
+            "created_at",
+            "seller_id",
+            "seller_name",
+            "product_count",
+        ]
+
+    def validate_parent(self, value):
+        """
+        Parent lazima iwe global category (seller = NULL), si category yenyewe.
+        """
+        if value is None:
+            return value
+        if value.seller_id is not None:
+            raise serializers.ValidationError("Parent must be a global category.")
+        if self.instance is not None and value.pk == self.instance.pk:
+            raise serializers.ValidationError("A category cannot be its own parent.")
+        return value
 
 
 # =========================
@@ -466,15 +541,25 @@ class ProductImageSerializer(serializers.ModelSerializer):
 
     - Accepts uploaded file via `image`.
     - Exposes `image_url` as absolute URL for frontend.
+    - Exposes `image_thumb_url` (thumbnail) once it has been generated.
     """
 
     image = serializers.ImageField(required=True)
     image_url = serializers.SerializerMethodField()
+    image_thumb_url = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductImage
-        fields = ["id", "image", "image_url", "is_primary", "order", "created_at"]
-        read_only_fields = ["id", "created_at", "image_url"]
+        fields = [
+            "id",
+            "image",
+            "image_url",
+            "image_thumb_url",
+            "is_primary",
+            "order",
+            "created_at",
+        ]
+        read_only_fields = ["id", "created_at", "image_url", "image_thumb_url"]
 
     @extend_schema_field(serializers.CharField(allow_null=True))
     def get_image_url(self, obj):
@@ -486,6 +571,11 @@ class ProductImageSerializer(serializers.ModelSerializer):
             return url
         return None
 
+    @extend_schema_field(serializers.CharField(allow_null=True))
+    def get_image_thumb_url(self, obj):
+        request = self.context.get("request")
+        return _build_absolute_uri(request, obj.image_thumb)
+
 
 # =========================
 #  PRODUCT + LIKES
@@ -520,15 +610,15 @@ class ProductMiniSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(serializers.IntegerField())
     def get_likes_count(self, obj):
-        return getattr(obj, "likes_count", obj.likes.count())
+        return _annotated(obj, "annotated_likes_count", lambda: obj.likes_count)
 
     @extend_schema_field(serializers.IntegerField())
     def get_sales_count(self, obj):
-        return getattr(obj, "sales_count", obj.sales_count)
+        return _annotated(obj, "annotated_sales_count", lambda: obj.sales_count)
 
     @extend_schema_field(serializers.IntegerField())
     def get_units_sold(self, obj):
-        return getattr(obj, "units_sold", obj.units_sold)
+        return _annotated(obj, "annotated_units_sold", lambda: obj.units_sold)
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -537,6 +627,7 @@ class ProductSerializer(serializers.ModelSerializer):
 
     - `image` main image
     - `image_url` absolute URL
+    - `image_thumb_url` thumbnail (ikishatengenezwa)
     - seller: SellerProfileSerializer (ina rating, total_sales, location, distance)
     - distance_km from haversine (source="distance" attribute on queryset)
     - likes_count & is_liked
@@ -550,6 +641,7 @@ class ProductSerializer(serializers.ModelSerializer):
 
     image = serializers.ImageField(required=False, allow_null=True, write_only=True)
     image_url = serializers.SerializerMethodField()
+    image_thumb_url = serializers.SerializerMethodField()
 
     in_stock = serializers.BooleanField(read_only=True)
     is_available = serializers.BooleanField(source="in_stock", read_only=True)
@@ -591,6 +683,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "is_active",
             "image",
             "image_url",
+            "image_thumb_url",
             "images",
             "in_stock",
             "is_available",
@@ -611,6 +704,7 @@ class ProductSerializer(serializers.ModelSerializer):
             "seller",
             "created_at",
             "updated_at",
+            "image_thumb_url",
             "in_stock",
             "is_available",
             "distance_km",
@@ -634,6 +728,11 @@ class ProductSerializer(serializers.ModelSerializer):
             return url
         return None
 
+    @extend_schema_field(serializers.CharField(allow_null=True))
+    def get_image_thumb_url(self, obj):
+        request = self.context.get("request")
+        return _build_absolute_uri(request, obj.image_thumb)
+
     @extend_schema_field(serializers.CharField(allow_null=True))
     def get_latitude(self, obj):
         location = getattr(obj.seller, "location", None)
@@ -650,7 +749,7 @@ class ProductSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(serializers.IntegerField())
     def get_likes_count(self, obj):
-        return getattr(obj, "likes_count", obj.likes.count())
+        return _annotated(obj, "annotated_likes_count", lambda: obj.likes_count)
 
     @extend_schema_field(serializers.BooleanField())
     def get_is_liked(self, obj):
@@ -658,15 +757,19 @@ class ProductSerializer(serializers.ModelSerializer):
         user = getattr(request, "user", None)
         if not user or not user.is_authenticated:
             return False
-        return ProductLike.objects.filter(user=user, product=obj).exists()
+        return _annotated(
+            obj,
+            "annotated_is_liked",
+            lambda: ProductLike.objects.filter(user=user, product=obj).exists(),
+        )
 
     @extend_schema_field(serializers.IntegerField())
     def get_sales_count(self, obj):
-        return getattr(obj, "sales_count", obj.sales_count)
+        return _annotated(obj, "annotated_sales_count", lambda: obj.sales_count)
 
     @extend_schema_field(serializers.IntegerField())
     def get_units_sold(self, obj):
-        return getattr(obj, "units_sold", obj.units_sold)
+        return _annotated(obj, "annotated_units_sold", lambda: obj.units_sold)
 
 
 class ProductCreateSerializer(serializers.ModelSerializer):
@@ -806,7 +909,16 @@ class NearbySearchSerializer(serializers.Serializer):
     latitude = serializers.DecimalField(max_digits=10, decimal_places=8, required=True)
     longitude = serializers.DecimalField(max_digits=11, decimal_places=8, required=True)
     radius = serializers.IntegerField(default=10, min_value=1, max_value=100)
-    category = serializers.CharField(required=False, allow_blank=True)
+    category = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        help_text="Slug (au jina) ya global category",
+    )
+    category_id = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        help_text="Id ya category yoyote (global au ya duka)",
+    )
     min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
     max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
     sort_by = serializers.ChoiceField(
@@ -873,13 +985,37 @@ class OrderSerializer(serializers.ModelSerializer):
             "product",
             "buyer",
             "seller",
+            "quantity",  # stock imeshahifadhiwa kwa quantity hii
             "unit_price",
             "total_price",
-            "status",
+            "status",  # badilisha kwa POST /orders/{id}/status/
             "created_at",
             "updated_at",
         ]
 
+    LOCKED_FIELDS = {
+        "status": "Change the status with POST /api/orders/{id}/status/.",
+        "quantity": (
+            "Quantity cannot change after the order is placed. Cancel it with "
+            "POST /api/orders/{id}/status/ and place a new order."
+        ),
+    }
+
+    def validate(self, data):
+        """
+        status/quantity ni read-only – update yenye fields hizi inakataliwa
+        (400) badala ya kuzipuuza kimya kimya.
+        """
+        initial = getattr(self, "initial_data", None) or {}
+        errors = {
+            field: message
+            for field, message in self.LOCKED_FIELDS.items()
+            if field in initial
+        }
+        if errors:
+            raise serializers.ValidationError(errors)
+        return data
+
 
 class OrderCreateSerializer(serializers.ModelSerializer):
     """
@@ -896,6 +1032,68 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         return value
 
 
+class OrderStatusSerializer(serializers.Serializer):
+    """
+    Badilisha status ya order (POST /orders/{id}/status/)
+    """
+
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+
+
+class CheckoutItemSerializer(serializers.Serializer):
+    """
+    Item moja ya cart: product + quantity
+    """
+
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """
+    Checkout ya cart nzima (POST /api/orders/checkout/).
+
+    Body:
+    {
+        "items": [{"product": 12, "quantity": 2}, {"product": 40, "quantity": 1}],
+        "delivery_address": "...",
+        "contact_phone": "...",
+        "note": "..."
+    }
+
+    Products zinachukuliwa kwa query moja; validated_data["lines"] ni
+    [(product, quantity)] – product ile ile ikirudiwa, quantities zinajumlishwa.
+    """
+
+    items = CheckoutItemSerializer(many=True, allow_empty=False)
+    delivery_address = serializers.CharField(required=False, allow_blank=True, default="")
+    contact_phone = serializers.CharField(
+        required=False, allow_blank=True, max_length=20, default=""
+    )
+    note = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def validate(self, data):
+        quantities = {}
+        for item in data["items"]:
+            quantities[item["product"]] = quantities.get(item["product"], 0) + item["quantity"]
+
+        limit = settings.ORDER_CHECKOUT_MAX_ITEMS
+        if len(quantities) > limit:
+            raise serializers.ValidationError(
+                {"items": f"A cart can hold at most {limit} products."}
+            )
+
+        products = Product.objects.select_related("seller").in_bulk(list(quantities))
+        missing = [pk for pk in quantities if pk not in products or not products[pk].is_active]
+        if missing:
+            raise serializers.ValidationError(
+                {"items": f"Products not available: {', '.join(map(str, missing))}"}
+            )
+
+        data["lines"] = [(products[pk], qty) for pk, qty in quantities.items()]
+        return data
+
+
 # =========================
 #  CHATTING (CONVERSATION, TYPING, MESSAGE)
 # =========================
@@ -917,6 +1115,7 @@ class MessageSerializer(serializers.ModelSerializer):
             "text",
             "status",
             "is_read",
+            "client_id",
             "created_at",
             "updated_at",
         ]
@@ -926,6 +1125,7 @@ class MessageSerializer(serializers.ModelSerializer):
             "sender",
             "status",
             "is_read",
+            "client_id",
             "created_at",
             "updated_at",
         ]
@@ -938,13 +1138,14 @@ class MessageCreateSerializer(serializers.ModelSerializer):
     Body:
     {
         "conversation": 1,   # id ya conversation
-        "text": "Habari, hii bidhaa bado ipo?"
+        "text": "Habari, hii bidhaa bado ipo?",
+        "client_id": "7f3c..."   # optional – retry yenye id ile ile haileti duplicate
     }
     """
 
     class Meta:
         model = Message
-        fields = ["conversation", "text"]
+        fields = ["conversation", "text", "client_id"]
 
     def validate_conversation(self, conversation):
         """
@@ -984,6 +1185,16 @@ class ConversationParticipantStateSerializer(serializers.ModelSerializer):
         ]
 
 
+class PresenceSerializer(serializers.Serializer):
+    """
+    Online / last seen ya user mmoja (api.presence)
+    """
+
+    user = serializers.IntegerField()
+    online = serializers.BooleanField()
+    last_seen_at = serializers.DateTimeField(allow_null=True)
+
+
 class ConversationSerializer(serializers.ModelSerializer):
     """
     Conversation LIST (chat list view)
@@ -995,6 +1206,8 @@ class ConversationSerializer(serializers.ModelSerializer):
     - last_message (MessageSerializer)
     - unread_count (kwa current user)
     - is_typing_other_side (typing indicator)
+    - other_presence (online / last seen ya upande mwingine; kwenye list
+      inasomwa kwa pamoja – context["presence"])
     """
 
     buyer = UserMiniSerializer(read_only=True)
@@ -1004,6 +1217,7 @@ class ConversationSerializer(serializers.ModelSerializer):
     last_message = serializers.SerializerMethodField()
     unread_count = serializers.SerializerMethodField()
     is_typing_other_side = serializers.SerializerMethodField()
+    other_presence = serializers.SerializerMethodField()
 
     class Meta:
         model = Conversation
@@ -1017,12 +1231,17 @@ class ConversationSerializer(serializers.ModelSerializer):
             "last_message",
             "unread_count",
             "is_typing_other_side",
+            "other_presence",
         ]
         read_only_fields = fields
 
     @extend_schema_field(MessageSerializer)
     def get_last_message(self, obj):
-        last_msg = obj.messages.order_by("-created_at").first()
+        prefetched = getattr(obj, "prefetched_last_message", None)
+        if prefetched is not None:
+            last_msg = prefetched[0] if prefetched else None
+        else:
+            last_msg = obj.messages.order_by("-created_at").first()
         if not last_msg:
             return None
         return MessageSerializer(last_msg, context=self.context).data
@@ -1033,7 +1252,11 @@ class ConversationSerializer(serializers.ModelSerializer):
         if request is None or not request.user.is_authenticated:
             return 0
         user = request.user
-        return obj.messages.filter(is_read=False).exclude(sender=user).count()
+        return _annotated(
+            obj,
+            "annotated_unread_count",
+            lambda: obj.messages.filter(is_read=False).exclude(sender=user).count(),
+        )
 
     @extend_schema_field(serializers.BooleanField())
     def get_is_typing_other_side(self, obj):
@@ -1041,8 +1264,22 @@ class ConversationSerializer(serializers.ModelSerializer):
         if request is None or not request.user.is_authenticated:
             return False
         user = request.user
-        states = obj.participant_states.exclude(user=user)
-        return states.filter(is_typing=True).exists()
+        return _annotated(
+            obj,
+            "annotated_is_typing_other_side",
+            lambda: obj.participant_states.exclude(user=user).filter(is_typing=True).exists(),
+        )
+
+    @extend_schema_field(PresenceSerializer(allow_null=True))
+    def get_other_presence(self, obj):
+        request = self.context.get("request")
+        if request is None or not request.user.is_authenticated:
+            return None
+        found = self.context.get("presence")
+        if found is None:
+            found = presence.for_conversations([obj], request.user)
+        other_id = presence.other_party(obj, request.user).id
+        return PresenceSerializer({"user": other_id, **found[other_id]}).data
 
 
 class ConversationDetailSerializer(ConversationSerializer):
@@ -1096,10 +1333,13 @@ class NotificationSerializer(serializers.ModelSerializer):
             "title",
             "body",
             "data",
+            "conversation",
+            "count",
             "is_read",
             "created_at",
         ]
-        read_only_fields = ["id", "user", "created_at"]
+        # conversation/count: chat notifications zilizokunjwa (api.notifications)
+        read_only_fields = ["id", "user", "conversation", "count", "created_at"]
 
 # =========================
 #  EXTRA SERIALIZERS FOR AUTH (JWT) & UTIL ENDPOINTS
@@ -1158,3 +1398,80 @@ class DistanceResponseSerializer(serializers.Serializer):
 
     distance_km = serializers.FloatField()
     distance_miles = serializers.FloatField()
+
+
+class SuggestionSerializer(serializers.Serializer):
+    """
+    Suggestion moja ya autocomplete
+    """
+
+    text = serializers.CharField()
+    type = serializers.ChoiceField(choices=["category", "city", "seller", "product"])
+    id = serializers.IntegerField(allow_null=True)
+
+
+class SuggestResponseSerializer(serializers.Serializer):
+    """
+    Response ya /api/search/suggest/
+    """
+
+    query = serializers.CharField(allow_blank=True)
+    results = SuggestionSerializer(many=True)
+
+
+class ConversationBadgeSerializer(serializers.Serializer):
+    """
+    Unread ya conversation moja
+    """
+
+    conversation = serializers.IntegerField()
+    unread = serializers.IntegerField()
+
+
+class BadgesSerializer(serializers.Serializer):
+    """
+    Response ya /api/badges/ – counters zilizohifadhiwa (api.unread)
+    """
+
+    notifications = serializers.IntegerField()
+    messages = serializers.IntegerField()
+    conversations = ConversationBadgeSerializer(many=True)
+
+
+class EndpointStatsSerializer(serializers.Serializer):
+    """
+    Takwimu za endpoint moja (RequestMetricsMiddleware)
+    """
+
+    endpoint = serializers.CharField()
+    requests = serializers.IntegerField()
+    flagged = serializers.IntegerField()
+    avg_queries = serializers.FloatField()
+    max_queries = serializers.IntegerField()
+    avg_db_ms = serializers.FloatField()
+    avg_serializer_ms = serializers.FloatField()
+    avg_stream_queries = serializers.FloatField()
+    avg_stream_db_ms = serializers.FloatField()
+    avg_stream_ms = serializers.FloatField()
+    avg_total_ms = serializers.FloatField()
+    max_total_ms = serializers.FloatField()
+    avg_bytes = serializers.IntegerField()
+
+
+class WebSocketStatsSerializer(serializers.Serializer):
+    """
+    Takwimu za foleni za WebSocket za process hii (api/outbound.py)
+    """
+
+    connections = serializers.IntegerField()
+    queued_events = serializers.IntegerField()
+    max_queue_depth = serializers.IntegerField()
+    peak_queue_depth = serializers.IntegerField()
+    enqueued = serializers.IntegerField()
+    coalesced = serializers.IntegerField()
+    dropped = serializers.IntegerField()
+    frames_sent = serializers.IntegerField()
+    events_sent = serializers.IntegerField()
+    batched_frames = serializers.IntegerField()
+    overflow_closes = serializers.IntegerField()
+    send_errors = serializers.IntegerField()
@@ -0,0 +1,237 @@
+# api/signals.py
+"""
+Model signal handlers za app ya `api`.
+
+Zina-connect kwenye ApiConfig.ready().
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from . import categories, regions, search, suggest
+from .images import THUMBNAIL_FIELDS, schedule_thumbnails
+from .models import (
+    Category,
+    Location,
+    Product,
+    ProductImage,
+    SellerProfile,
+    UserProfile,
+)
+
+SEARCH_PRODUCT_FIELDS = {"name", "description", "seller", "seller_id"}
+PRODUCT_COUNT_FIELDS = {"category", "category_id", "is_active"}
+
+
+# =========================
+#  IMAGE THUMBNAILS
+# =========================
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=SellerProfile)
+@receiver(post_save, sender=UserProfile)
+def image_thumbnails_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Panga thumbnails baada ya upload (au original kubadilishwa).
+    """
+    if raw:
+        # loaddata (fixtures) – tumia `manage.py backfill_thumbnails`
+        return
+
+    if update_fields is not None:
+        source_fields = {src for src, _ in THUMBNAIL_FIELDS[sender]}
+        if not source_fields.intersection(update_fields):
+            return
+
+    schedule_thumbnails(instance)
+
+
+# =========================
+#  FULL-TEXT SEARCH INDEX
+# =========================
+
+@receiver(post_migrate)
+def search_index_after_migrate(sender, using="default", **kwargs):
+    """
+    Migration 0009 inatengeneza table tupu – ijaze kama DB tayari ina products.
+    """
+    if sender.name == "api":
+        search.fill_index_if_empty(using)
+
+
+@receiver(post_save, sender=Product)
+def search_index_product_on_save(
+    sender, instance, raw=False, update_fields=None, using="default", **kwargs
+):
+    if raw:
+        # loaddata – tumia `manage.py rebuild_search_index`
+        return
+    if update_fields is not None and not SEARCH_PRODUCT_FIELDS.intersection(update_fields):
+        return
+    search.index_products([instance], using)
+
+
+@receiver(post_delete, sender=Product)
+def search_index_product_on_delete(sender, instance, using="default", **kwargs):
+    search.unindex_products([instance.pk], using)
+
+
+@receiver(post_save, sender=SellerProfile)
+def search_index_seller_on_save(
+    sender, instance, created=False, raw=False, update_fields=None, using="default", **kwargs
+):
+    """
+    business_name ipo kwenye index ya kila product ya duka hili.
+    """
+    if raw or created:
+        return
+    if update_fields is not None and "business_name" not in update_fields:
+        return
+
+    products = list(
+        Product.objects.using(using)
+        .filter(seller=instance)
+        .only("id", "name", "description", "seller_id")
+    )
+    for product in products:
+        product.seller = instance
+    search.index_products(products, using)
+
+
+# =========================
+#  AUTOCOMPLETE (PREFIX INDEX)
+# =========================
+# index iko kwenye memory – tunaisasisha baada ya commit tu ili rollback
+# isiache entries ambazo hazipo kwenye DB.
+
+@receiver(post_save, sender=Product)
+def suggest_product_on_save(sender, instance, raw=False, using="default", **kwargs):
+    if not raw:
+        transaction.on_commit(partial(suggest.on_product_saved, instance), using=using)
+
+
+@receiver(post_delete, sender=Product)
+def suggest_product_on_delete(sender, instance, using="default", **kwargs):
+    transaction.on_commit(partial(suggest.on_product_deleted, instance.pk), using=using)
+
+
+@receiver(post_save, sender=SellerProfile)
+def suggest_seller_on_save(
+    sender, instance, raw=False, update_fields=None, using="default", **kwargs
+):
+    if raw:
+        return
+    if update_fields is not None and "business_name" not in update_fields:
+        return
+    transaction.on_commit(partial(suggest.on_seller_saved, instance), using=using)
+
+
+@receiver(post_delete, sender=SellerProfile)
+def suggest_seller_on_delete(sender, instance, using="default", **kwargs):
+    transaction.on_commit(partial(suggest.on_seller_deleted, instance.pk), using=using)
+
+
+@receiver(post_save, sender=Location)
+def suggest_location_on_save(sender, instance, raw=False, using="default", **kwargs):
+    if not raw:
+        transaction.on_commit(partial(suggest.on_location_saved, instance), using=using)
+
+
+@receiver(post_delete, sender=Location)
+def suggest_location_on_delete(sender, instance, using="default", **kwargs):
+    transaction.on_commit(partial(suggest.on_location_deleted, instance.pk), using=using)
+
+
+@receiver(post_save, sender=Category)
+def suggest_category_on_save(sender, instance, raw=False, using="default", **kwargs):
+    if not raw:
+        transaction.on_commit(partial(suggest.on_category_saved, instance), using=using)
+
+
+@receiver(post_delete, sender=Category)
+def suggest_category_on_delete(sender, instance, using="default", **kwargs):
+    transaction.on_commit(partial(suggest.on_category_deleted, instance.pk), using=using)
+
+
+# =========================
+#  CATEGORY TREE (slug / descendants cache)
+# =========================
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_tree_invalidate(sender, using="default", **kwargs):
+    transaction.on_commit(categories.invalidate_tree, using=using)
+
+
+# =========================
+#  NEARBY REGIONS (cache ya kila region)
+# =========================
+
+@receiver(post_save, sender=Location)
+def nearby_region_on_save(sender, instance, raw=False, using="default", **kwargs):
+    if raw:
+        return
+    changed = {instance.region, getattr(instance, "_previous_region", "")}
+    transaction.on_commit(partial(regions.invalidate, *changed), using=using)
+
+
+@receiver(post_delete, sender=Location)
+def nearby_region_on_delete(sender, instance, using="default", **kwargs):
+    transaction.on_commit(partial(regions.invalidate, instance.region), using=using)
+
+
+# =========================
+#  CATEGORY PRODUCT COUNTS (products active tu)
+# =========================
+
+def _counted_category(category_id, is_active):
+    return category_id if is_active else None
+
+
+@receiver(pre_save, sender=Product)
+def product_count_remember_old(
+    sender, instance, raw=False, update_fields=None, using="default", **kwargs
+):
+    """
+    Kumbuka category/is_active za zamani ili post_save ijue delta.
+    """
+    instance._counted_category_old = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not PRODUCT_COUNT_FIELDS.intersection(update_fields):
+        instance._counted_category_old = _counted_category(
+            instance.category_id, instance.is_active
+        )
+        return
+
+    old = (
+        Product.objects.using(using)
+        .filter(pk=instance.pk)
+        .values_list("category_id", "is_active")
+        .first()
+    )
+    if old is not None:
+        instance._counted_category_old = _counted_category(*old)
+
+
+@receiver(post_save, sender=Product)
+def product_count_on_save(sender, instance, raw=False, using="default", **kwargs):
+    if raw:
+        return
+    old = getattr(instance, "_counted_category_old", None)
+    new = _counted_category(instance.category_id, instance.is_active)
+    if old == new:
+        return
+    Category.adjust_product_count(old, -1, using)
+    Category.adjust_product_count(new, +1, using)
+
+
+@receiver(post_delete, sender=Product)
+def product_count_on_delete(sender, instance, using="default", **kwargs):
+    Category.adjust_product_count(
+        _counted_category(instance.category_id, instance.is_active), -1, using
+    )
@@ -0,0 +1,136 @@
+# api/streaming.py
+"""
+Streaming JSON kwa list kubwa (full-catalog exports).
+
+Badala ya kujenga list nzima ya dicts kwenye memory kisha ku-render,
+tunapitia queryset kwa `.iterator(chunk_size=...)`, tuna-serialize row moja
+moja na kuandika JSON array kidogo kidogo kupitia StreamingHttpResponse.
+Peak memory ni sehemu ndogo ya list nzima (bench_catalog_export).
+
+Model instances zina reference cycles (FieldFile <-> instance, prefetched
+QuerySet <-> instance, related caches), kwa hiyo bila msaada zingesubiri
+cyclic GC - na full collection inakuja mara chache kadri heap inavyokua,
+peak ikapanda na idadi ya rows. Kila block ikishatoka tunavunja cycles za
+rows zake (_release) ili refcounting iziachilie papo hapo; hakuna
+gc.collect().
+"""
+
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Type
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.serializers import BaseSerializer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .instrumentation import measure_serializer, measure_stream
+
+
+def iter_json_array(
+    queryset,
+    serializer_class: Type[BaseSerializer],
+    context: Optional[Dict[str, Any]] = None,
+    chunk_size: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    Generator ya bytes za JSON array: `[`, rows..., `]`.
+
+    Inatoa block moja kwa kila `chunk_size` rows (si kwa kila row) ili
+    kupunguza idadi ya writes kwenye socket.
+    """
+    chunk_size = chunk_size or settings.PRODUCT_STREAM_CHUNK_SIZE
+    encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    # serializer moja kwa rows zote (fields zina-build mara moja tu)
+    serializer = serializer_class(context=context)
+
+    yield b"["
+    first = True
+    buffer = []
+    rows = []
+
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        with measure_serializer():
+            row = serializer.to_representation(obj)
+        buffer.append(encoder.encode(row))
+        rows.append(obj)
+
+        if len(buffer) >= chunk_size:
+            block = ",".join(buffer)
+            yield (block if first else "," + block).encode("utf-8")
+            first = False
+            buffer = []
+            # block = chunk moja ya iterator, kwa hiyo hakuna row inayofuata
+            # inayoshiriki prefetched instances na hizi
+            for obj in rows:
+                _release(obj)
+            rows = []
+
+    if buffer:
+        block = ",".join(buffer)
+        yield (block if first else "," + block).encode("utf-8")
+
+    yield b"]"
+
+
+def _release(instance) -> None:
+    """
+    Vunja reference cycles za model instance iliyokwisha serialize-iwa:
+    related objects (select_related), prefetched rows na FieldFile caches
+    zote zinashikiliwa kwenye __dict__ ya instance.
+    """
+    state = instance.__dict__
+    model_state = state.get("_state")
+    if model_state is None:
+        return  # tayari imeachiliwa (instance inayoshirikiwa)
+
+    related = list(model_state.fields_cache.values())
+    prefetched = list(state.get("_prefetched_objects_cache", {}).values())
+    state.clear()
+
+    for obj in related:
+        if obj is not None:
+            _release(obj)
+    for queryset in prefetched:
+        for obj in queryset._result_cache or ():
+            _release(obj)
+
+
+async def _aiter_blocks(blocks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Async wrapper kwa ASGI: kila block inavutwa kwenye thread ile ile ya DB
+    (thread_sensitive) – server-side cursor haiwezi kuhama thread.
+    """
+    sentinel = object()
+    pull = sync_to_async(next, thread_sensitive=True)
+    while True:
+        block = await pull(blocks, sentinel)
+        if block is sentinel:
+            break
+        yield block
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """
+    StreamingHttpResponse ya JSON array ya queryset.
+
+    Chini ya ASGI tunatumia async iterator; bila hivyo Django ingelazimika
+    ku-consume iterator yote kwenye memory kabla ya kutuma.
+    """
+
+    def __init__(self, request, queryset, serializer_class, context=None, chunk_size=None, **kwargs):
+        # queries za rows zinapimwa kwa kila chunk (stream_* za RequestMetrics)
+        blocks = measure_stream(iter_json_array(queryset, serializer_class, context, chunk_size))
+
+        django_request = getattr(request, "_request", request)
+        if isinstance(django_request, ASGIRequest):
+            content = _aiter_blocks(blocks)
+        else:
+            content = blocks
+
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content, **kwargs)
+
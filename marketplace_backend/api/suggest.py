@@ -0,0 +1,540 @@
+# api/suggest.py
+"""
+Autocomplete (type-ahead) kwa search box – in-process prefix trie.
+
+- Inajengwa kwenye background thread (`warm_index()`) kutoka DB: majina ya
+  products (active), business_name za maduka, miji (Location.city) na
+  categories. Request ya kwanza ya kila process inaanzisha build
+  (SUGGEST_WARM_ON_STARTUP, api/apps.py) – haisubiri. Hadi build imalizike,
+  `suggest()` inarudisha [] badala ya kushikilia request.
+- Index ni list iliyopangwa ya terms (si trie): build inakusanya terms
+  zote kisha inapanga mara moja; prefix ni range ya bisect.
+- Signals (api/signals.py) zina-update index moja moja (incremental) bila
+  ku-rebuild. Zikifika wakati build inaendelea, zinawekwa kwenye foleni na
+  kurudiwa (kwa mpangilio) mara index inapokuwa tayari.
+- top-K ya kila prefix iliyoulizwa inahifadhiwa (cache) – lookup inayofuata
+  ni dict lookup moja; add() inaisasisha bila kuifuta.
+- Memory ina mipaka: SUGGEST_MAX_ENTRIES, maneno machache kwa entry na
+  urefu wa term umekatwa.
+
+Kila process (worker) ina index yake; signals za process nyingine
+hazionekani hadi process hii i-rebuild (restart / `reset_index()`).
+"""
+
+from __future__ import annotations
+
+import functools
+import heapq
+import logging
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from operator import itemgetter
+from threading import RLock
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("api.suggest")
+
+KIND_PRODUCT = "product"
+KIND_SELLER = "seller"
+KIND_CITY = "city"
+KIND_CATEGORY = "category"
+
+# uzito wa msingi kwa aina (juu = inaonekana kwanza)
+KIND_WEIGHTS = {
+    KIND_CATEGORY: 4.0,
+    KIND_CITY: 3.0,
+    KIND_SELLER: 2.0,
+    KIND_PRODUCT: 1.0,
+}
+
+MAX_WORDS_PER_ENTRY = 6
+MAX_TERM_LENGTH = 32
+# top-K zilizohifadhiwa (prefixes zilizoulizwa); zikizidi cache inaanza upya
+MAX_CACHED_PREFIXES = 50000
+# mpaka wa juu wa range ya prefix: prefix + _MAX_CHAR > term yoyote yenye prefix hiyo
+_MAX_CHAR = "\U0010ffff"
+
+_NON_WORD_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """
+    lowercase + bila accents + punctuation -> space.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD_RE.sub(" ", text.lower()).strip()
+
+
+class _Entry:
+    __slots__ = ("key", "text", "kind", "ref_id", "weight", "terms", "refs")
+
+    def __init__(self, key, text, kind, ref_id, weight, terms):
+        self.key = key
+        self.text = text
+        self.kind = kind
+        self.ref_id = ref_id
+        self.weight = weight
+        self.terms = terms
+        self.refs = 1
+
+
+class PrefixIndex:
+    """
+    Prefix index juu ya list iliyopangwa (sorted) ya terms.
+
+    - `_terms` (str) na `_term_keys` (key ya entry) ni lists mbili sambamba,
+      zimepangwa kwa term: terms zote zinazoanza na prefix ni range moja
+      (bisect mbili).
+    - top-K ya prefix inahesabiwa kwa range hiyo mara ya kwanza inapoulizwa
+      na kuhifadhiwa (`_top`). add() inaisasisha pale pale; discard()
+      inafuta tu prefixes ambazo top-K yake ilikuwa na key hiyo.
+
+    Entry ina `key` ya kipekee (mf. ("product", 12) au ("city", "dodoma")).
+    Entries zenye key moja zina refcount (mf. maduka 30 kwenye mji mmoja
+    => entry moja ya mji yenye uzito mkubwa zaidi).
+    """
+
+    def __init__(self, max_entries: int, top_k: int = 10):
+        self.max_entries = max_entries
+        self.top_k = top_k
+        self._terms: List[str] = []
+        self._term_keys: List[Hashable] = []
+        self._top: Dict[str, List[Hashable]] = {}
+        self._entries: Dict[Hashable, _Entry] = {}
+        # (kind, row id) -> jina, kwa entries zenye refcount (miji, categories)
+        self.named_refs: Dict[Tuple[str, int], str] = {}
+        self._lock = RLock()
+        self._full_warned = False
+        # ndani ya bulk(): (term, key) zinakusanywa hapa, zinapangwa mwishoni
+        self._pending_terms: Optional[List[Tuple[str, Hashable]]] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---------- helpers ----------
+
+    @staticmethod
+    def _terms_for(text: str) -> List[str]:
+        """
+        Kila neno linaanza term: "hp elitebook 840" =>
+        ["hp elitebook 840", "elitebook 840", "840"]
+        """
+        words = normalize(text).split()[:MAX_WORDS_PER_ENTRY]
+        terms = []
+        for i in range(len(words)):
+            term = " ".join(words[i:])[:MAX_TERM_LENGTH]
+            if term and term not in terms:
+                terms.append(term)
+        return terms
+
+    @staticmethod
+    def _prefixes(term: str):
+        return (term[:end] for end in range(1, len(term) + 1))
+
+    def _score(self, key) -> Tuple[float, str]:
+        entry = self._entries[key]
+        return (entry.weight * entry.refs, entry.text)
+
+    def _push_top(self, top: List[Hashable], key) -> None:
+        if key in top:
+            top.sort(key=self._score, reverse=True)
+            return
+        if len(top) >= self.top_k and self._score(key) <= self._score(top[-1]):
+            return
+        top.append(key)
+        top.sort(key=self._score, reverse=True)
+        del top[self.top_k:]
+
+    def _touch(self, term: str, key) -> None:
+        """
+        Uzito wa `key` umeongezeka / ni mpya: sasisha top-K zilizohifadhiwa.
+        """
+        for prefix in self._prefixes(term):
+            top = self._top.get(prefix)
+            if top is not None:
+                self._push_top(top, key)
+
+    def _forget(self, term: str, key) -> None:
+        """
+        Uzito wa `key` umepungua / imeondolewa: top-K zenye key hii
+        zinahesabiwa upya zikiulizwa tena.
+        """
+        for prefix in self._prefixes(term):
+            top = self._top.get(prefix)
+            if top is not None and key in top:
+                del self._top[prefix]
+
+    def _top_for(self, prefix: str) -> List[Hashable]:
+        top = self._top.get(prefix)
+        if top is None:
+            lo = bisect_left(self._terms, prefix)
+            hi = bisect_left(self._terms, prefix + _MAX_CHAR, lo)
+            top = heapq.nlargest(self.top_k, set(self._term_keys[lo:hi]), key=self._score)
+            if len(self._top) >= MAX_CACHED_PREFIXES:
+                self._top.clear()
+            self._top[prefix] = top
+        return top
+
+    # ---------- mutations ----------
+
+    @contextmanager
+    def bulk(self):
+        """
+        Kwa build: add() ndani ya block hii inakusanya (term, key) kwenye
+        list moja bila kupanga; mwisho wa block list inapangwa mara moja
+        (sort moja badala ya insert moja moja).
+        """
+        with self._lock:
+            self._pending_terms = []
+            try:
+                yield self
+            finally:
+                pairs, self._pending_terms = self._pending_terms, None
+                pairs.extend(zip(self._terms, self._term_keys))
+                pairs.sort(key=itemgetter(0))
+                self._terms = [term for term, _ in pairs]
+                self._term_keys = [key for _, key in pairs]
+                self._top.clear()
+
+    def add(self, key, text: str, kind: str, ref_id=None, weight: float = 1.0) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.refs += 1
+                if self._pending_terms is None:
+                    for term in entry.terms:
+                        self._touch(term, key)
+                return
+
+            if len(self._entries) >= self.max_entries:
+                if not self._full_warned:
+                    logger.warning(
+                        "Suggest index full (%s entries); new terms are skipped.",
+                        self.max_entries,
+                    )
+                    self._full_warned = True
+                return
+
+            terms = self._terms_for(text)
+            if not terms:
+                return
+
+            self._entries[key] = _Entry(key, text, kind, ref_id, weight, terms)
+            if self._pending_terms is not None:
+                self._pending_terms.extend((term, key) for term in terms)
+                return
+            for term in terms:
+                at = bisect_right(self._terms, term)
+                self._terms.insert(at, term)
+                self._term_keys.insert(at, key)
+                self._touch(term, key)
+
+    def discard(self, key, all_refs: bool = False) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+
+            entry.refs -= 1
+            if entry.refs > 0 and not all_refs:
+                # uzito umepungua – top-K zenye key hii zinahitaji kupangwa upya
+                for term in entry.terms:
+                    self._forget(term, key)
+                return
+
+            del self._entries[key]
+            for term in entry.terms:
+                at = bisect_left(self._terms, term)
+                while at < len(self._terms) and self._terms[at] == term:
+                    if self._term_keys[at] == key:
+                        del self._terms[at]
+                        del self._term_keys[at]
+                        break
+                    at += 1
+                self._forget(term, key)
+
+    def replace(self, key, text: str, kind: str, ref_id=None, weight: float = 1.0) -> None:
+        with self._lock:
+            self.discard(key, all_refs=True)
+            self.add(key, text, kind, ref_id, weight)
+
+    # ---------- lookup ----------
+
+    def lookup(self, prefix: str, limit: int = 10) -> List[dict]:
+        prefix = normalize(prefix)[:MAX_TERM_LENGTH]
+        if not prefix:
+            return []
+
+        with self._lock:
+            keys = self._top_for(prefix)[:limit]
+            return [
+                {
+                    "text": self._entries[k].text,
+                    "type": self._entries[k].kind,
+                    "id": self._entries[k].ref_id,
+                }
+                for k in keys
+            ]
+
+
+# =========================
+#  PROCESS-WIDE INDEX
+# =========================
+
+_index: Optional[PrefixIndex] = None
+_index_lock = RLock()
+_building: Optional[threading.Thread] = None
+# updates za signals zilizofika wakati build inaendelea
+_pending: List[Tuple[Callable, tuple]] = []
+
+
+def _category_key(name: str):
+    return (KIND_CATEGORY, normalize(name))
+
+
+def _city_key(city: str):
+    return (KIND_CITY, normalize(city))
+
+
+def build_index() -> PrefixIndex:
+    index = PrefixIndex(
+        max_entries=settings.SUGGEST_MAX_ENTRIES,
+        top_k=settings.SUGGEST_TOP_K,
+    )
+    with index.bulk():
+        _load(index)
+    return index
+
+
+def _load(index: PrefixIndex) -> None:
+    from .models import Category, Location, Product, SellerProfile
+
+    products = Product.objects.filter(is_active=True).values_list("id", "name")
+    for pk, name in products.iterator():
+        index.add((KIND_PRODUCT, pk), name, KIND_PRODUCT, pk, KIND_WEIGHTS[KIND_PRODUCT])
+
+    for pk, name in SellerProfile.objects.values_list("id", "business_name").iterator():
+        index.add((KIND_SELLER, pk), name, KIND_SELLER, pk, KIND_WEIGHTS[KIND_SELLER])
+
+    for pk, city in Location.objects.values_list("id", "city").iterator():
+        if city:
+            index.add(_city_key(city), city.strip(), KIND_CITY, None, KIND_WEIGHTS[KIND_CITY])
+            index.named_refs[(KIND_CITY, pk)] = city
+
+    for pk, name in Category.objects.values_list("id", "name").iterator():
+        if name:
+            index.add(
+                _category_key(name),
+                name.strip(),
+                KIND_CATEGORY,
+                None,
+                KIND_WEIGHTS[KIND_CATEGORY],
+            )
+            index.named_refs[(KIND_CATEGORY, pk)] = name
+
+
+def warm_index(wait: bool = False) -> None:
+    """
+    Anza kujenga index kwenye background thread (kama haipo na haijengwi).
+    wait=True => subiri imalizike (scripts, shell).
+    """
+    global _building
+    with _index_lock:
+        if _index is None and _building is None:
+            _building = threading.Thread(
+                target=_build_in_background,
+                name="suggest-index",
+                daemon=True,
+            )
+            _building.start()
+        thread = _building
+    if wait and thread is not None:
+        thread.join()
+
+
+def _build_in_background() -> None:
+    global _index, _building
+    try:
+        index = build_index()
+    except Exception:  # noqa: BLE001
+        logger.exception("Suggest index build failed")
+        with _index_lock:
+            _building = None
+            _pending.clear()
+        return
+    finally:
+        connections.close_all()
+
+    # publish + replay ya foleni chini ya lock moja: update mpya inasubiri
+    # hadi za zamani zimerudiwa (mpangilio unabaki)
+    with _index_lock:
+        _index = index
+        _building = None
+        pending = list(_pending)
+        _pending.clear()
+        for func, args in pending:
+            func(*args)
+
+
+def warm_on_first_request(sender=None, **kwargs) -> None:
+    """
+    request_started (mara moja kwa process): anza build bila kusubiri.
+    """
+    from django.core.signals import request_started
+
+    request_started.disconnect(dispatch_uid="suggest_warm_index")
+    warm_index()
+
+
+def get_index() -> PrefixIndex:
+    """
+    Index ya process hii – inajengwa sasa hivi kama haipo (inasubiri).
+    """
+    warm_index(wait=True)
+    return _index
+
+
+def peek_index() -> Optional[PrefixIndex]:
+    """
+    Index kama imeshajengwa (signals hazijengi index – zina-update tu).
+    """
+    return _index
+
+
+def reset_index() -> None:
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def suggest(prefix: str, limit: Optional[int] = None) -> List[dict]:
+    """
+    Index ikiwa bado haijajengwa => [] (build inaanzishwa kwenye background).
+    """
+    limit = min(limit or settings.SUGGEST_TOP_K, settings.SUGGEST_TOP_K)
+    index = peek_index()
+    if index is None:
+        warm_index()
+        return []
+    return index.lookup(prefix, limit)
+
+
+def _incremental(func):
+    """
+    Updates za signals: build ikiwa inaendelea, update inawekwa kwenye
+    foleni na inarudiwa baada ya build (replace/discard ni idempotent).
+    """
+    @functools.wraps(func)
+    def wrapper(*args):
+        with _index_lock:
+            if _index is None and _building is not None:
+                _pending.append((func, args))
+                return
+        func(*args)
+
+    return wrapper
+
+
+# =========================
+#  INCREMENTAL UPDATES (zinaitwa na signals)
+# =========================
+
+@_incremental
+def on_product_saved(product) -> None:
+    index = peek_index()
+    if index is None:
+        return
+    key = (KIND_PRODUCT, product.pk)
+    if product.is_active:
+        index.replace(key, product.name, KIND_PRODUCT, product.pk, KIND_WEIGHTS[KIND_PRODUCT])
+    else:
+        index.discard(key, all_refs=True)
+
+
+@_incremental
+def on_product_deleted(product_id) -> None:
+    index = peek_index()
+    if index is not None:
+        index.discard((KIND_PRODUCT, product_id), all_refs=True)
+
+
+@_incremental
+def on_seller_saved(seller) -> None:
+    index = peek_index()
+    if index is not None:
+        index.replace(
+            (KIND_SELLER, seller.pk),
+            seller.business_name,
+            KIND_SELLER,
+            seller.pk,
+            KIND_WEIGHTS[KIND_SELLER],
+        )
+
+
+@_incremental
+def on_seller_deleted(seller_id) -> None:
+    index = peek_index()
+    if index is not None:
+        index.discard((KIND_SELLER, seller_id), all_refs=True)
+
+
+def _on_named_ref_saved(kind: str, obj_id: int, name: Optional[str]) -> None:
+    """
+    Miji na categories zina refcount kwa jina (normalized); index inakumbuka
+    jina la zamani la kila row ili kupunguza refcount yake likibadilika.
+    """
+    index = peek_index()
+    if index is None:
+        return
+
+    key_for = _city_key if kind == KIND_CITY else _category_key
+    with index._lock:
+        old_name = index.named_refs.get((kind, obj_id))
+        if old_name is not None and normalize(old_name) == normalize(name or ""):
+            return
+        if old_name:
+            index.discard(key_for(old_name))
+        if name:
+            index.add(key_for(name), name.strip(), kind, None, KIND_WEIGHTS[kind])
+            index.named_refs[(kind, obj_id)] = name
+        else:
+            index.named_refs.pop((kind, obj_id), None)
+
+
+def _on_named_ref_deleted(kind: str, obj_id: int) -> None:
+    index = peek_index()
+    if index is None:
+        return
+
+    key_for = _city_key if kind == KIND_CITY else _category_key
+    with index._lock:
+        old_name = index.named_refs.pop((kind, obj_id), None)
+        if old_name:
+            index.discard(key_for(old_name))
+
+
+@_incremental
+def on_location_saved(location) -> None:
+    _on_named_ref_saved(KIND_CITY, location.pk, location.city)
+
+
+@_incremental
+def on_location_deleted(location_id) -> None:
+    _on_named_ref_deleted(KIND_CITY, location_id)
+
+
+@_incremental
+def on_category_saved(category) -> None:
+    _on_named_ref_saved(KIND_CATEGORY, category.pk, category.name)
+
+
+@_incremental
+def on_category_deleted(category_id) -> None:
+    _on_named_ref_deleted(KIND_CATEGORY, category_id)
@@ -0,0 +1,227 @@
+# api/unread.py
+"""
+Unread counters zilizohifadhiwa badala ya kuhesabiwa kila request.
+
+- ConversationParticipantState.unread_count: kwa (conversation, user)
+- UnreadCounter(user): jumla ya notifications + messages ambazo hajasoma
+
+Kanuni: counter inabadilika pale tu `is_read` ya row halisi inapobadilika
+(message mpya / notification mpya => +, mark_seen / mark_read /
+mark_all_read => -). Kila badiliko ni UPDATE moja yenye F(); row ikikosekana
+inatengenezwa. Decrements zinatumia Greatest(..., 0) ili drift isilete
+namba hasi; `recalculate()` (na `python manage.py recalculate_unread_counts`)
+inarudisha counters kwenye ukweli wa tables.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import (
+    Conversation,
+    ConversationParticipantState,
+    Message,
+    Notification,
+    UnreadCounter,
+)
+
+
+def _delta(field: str, delta: int):
+    if delta >= 0:
+        return F(field) + delta
+    return Greatest(F(field) + delta, 0)
+
+
+def bump_users(user_ids: Iterable[int], notifications: int = 0, messages: int = 0) -> None:
+    """
+    Ongeza (au punguza, delta hasi) counters za users wote kwa kiasi kile
+    kile – UPDATE moja; rows zinazokosekana zinatengenezwa kwanza.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids or not (notifications or messages):
+        return
+    changes = {}
+    if notifications:
+        changes["notifications"] = _delta("notifications", notifications)
+    if messages:
+        changes["messages"] = _delta("messages", messages)
+
+    counters = UnreadCounter.objects.filter(user_id__in=user_ids)
+    if counters.update(**changes) == len(user_ids):
+        return
+    # users wapya: INSERT ... ON CONFLICT DO NOTHING, kisha UPDATE yao tu
+    existing = set(counters.values_list("user_id", flat=True))
+    missing = [pk for pk in user_ids if pk not in existing]
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(user_id=pk) for pk in missing], ignore_conflicts=True
+    )
+    UnreadCounter.objects.filter(user_id__in=missing).update(**changes)
+
+
+def subtract(deltas: Dict[int, Tuple[int, int]]) -> None:
+    """
+    {user_id: (notifications, messages)} za kupunguza – kiasi tofauti kwa
+    kila user, UPDATE moja (CASE). Row isiyokuwepo haina cha kupunguza.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+
+    def by_user(index: int, field: str):
+        return Greatest(
+            F(field)
+            - Case(
+                *(When(user_id=pk, then=Value(delta[index])) for pk, delta in deltas.items()),
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+    UnreadCounter.objects.filter(user_id__in=deltas).update(
+        notifications=by_user(0, "notifications"),
+        messages=by_user(1, "messages"),
+    )
+
+
+def notifications_created(counts: Dict[int, int]) -> None:
+    """
+    {user_id: idadi ya notifications mpya ambazo hazijasomwa}
+    """
+    by_delta: Dict[int, list] = {}
+    for user_id, count in counts.items():
+        if count:
+            by_delta.setdefault(count, []).append(user_id)
+    for delta, user_ids in by_delta.items():
+        bump_users(user_ids, notifications=delta)
+
+
+def notifications_read(user_id: int, count: int) -> None:
+    if count:
+        bump_users([user_id], notifications=-count)
+
+
+def message_created(conversation_id: int, recipient_id: int) -> None:
+    """
+    Message mpya kwa `recipient_id`: unread ya conversation yake + jumla yake.
+    """
+    states = ConversationParticipantState.objects.filter(
+        conversation_id=conversation_id, user_id=recipient_id
+    )
+    if not states.update(unread_count=F("unread_count") + 1):
+        try:
+            with transaction.atomic():
+                ConversationParticipantState.objects.create(
+                    conversation_id=conversation_id, user_id=recipient_id, unread_count=1
+                )
+        except IntegrityError:
+            states.update(unread_count=F("unread_count") + 1)
+    bump_users([recipient_id], messages=1)
+
+
+def messages_read(conversation_id: int, user_id: int, count: int, reset: bool = False) -> None:
+    """
+    User amesoma `count` messages za conversation hii. `reset=True` (mark_seen:
+    zote zimesomwa) => unread_count = 0.
+    """
+    if not count and not reset:
+        return
+    states = ConversationParticipantState.objects.filter(
+        conversation_id=conversation_id, user_id=user_id
+    )
+    states.update(unread_count=0 if reset else _delta("unread_count", -count))
+    if count:
+        bump_users([user_id], messages=-count)
+
+
+def badges(user) -> dict:
+    """
+    Badges zote kwa queries mbili: counter ya user + conversations zenye unread.
+    """
+    counter = UnreadCounter.objects.filter(user=user).values("notifications", "messages").first()
+    conversations = list(
+        ConversationParticipantState.objects.filter(user=user, unread_count__gt=0)
+        .order_by("conversation_id")
+        .values_list("conversation_id", "unread_count")
+    )
+    counter = counter or {"notifications": 0, "messages": 0}
+    return {
+        "notifications": counter["notifications"],
+        "messages": counter["messages"],
+        "conversations": [
+            {"conversation": conversation_id, "unread": unread}
+            for conversation_id, unread in conversations
+        ],
+    }
+
+
+def recalculate(user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Hesabu upya counters zote (au za users hawa) kutoka messages/notifications.
+    Rudisha idadi ya UnreadCounter rows zilizoguswa.
+    """
+    user_ids = list(user_ids) if user_ids is not None else None
+
+    # 1) participant states kwa kila mshiriki mwenye message isiyosomwa
+    unread = Message.objects.filter(is_read=False)
+    conversations = Conversation.objects.filter(
+        id__in=unread.values("conversation_id")
+    ).values_list("id", "buyer_id", "seller__user_id")
+    ConversationParticipantState.objects.bulk_create(
+        [
+            ConversationParticipantState(conversation_id=conv_id, user_id=user_id)
+            for conv_id, buyer_id, seller_user_id in conversations
+            for user_id in (buyer_id, seller_user_id)
+            if user_ids is None or user_id in user_ids
+        ],
+        ignore_conflicts=True,
+        batch_size=1000,
+    )
+
+    states = ConversationParticipantState.objects.all()
+    if user_ids is not None:
+        states = states.filter(user_id__in=user_ids)
+    per_state = (
+        unread.filter(conversation_id=OuterRef("conversation_id"))
+        .exclude(sender_id=OuterRef("user_id"))
+        .values("conversation_id")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    states.update(unread_count=Coalesce(Subquery(per_state), 0))
+
+    # 2) jumla kwa kila user
+    users = set(
+        Notification.objects.filter(is_read=False).values_list("user_id", flat=True)
+    ) | set(
+        ConversationParticipantState.objects.filter(unread_count__gt=0).values_list(
+            "user_id", flat=True
+        )
+    ) | set(UnreadCounter.objects.values_list("user_id", flat=True))
+    if user_ids is not None:
+        users &= set(user_ids)
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(user_id=pk) for pk in users], ignore_conflicts=True, batch_size=1000
+    )
+
+    notif_count = (
+        Notification.objects.filter(user_id=OuterRef("user_id"), is_read=False)
+        .values("user_id")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    message_count = (
+        ConversationParticipantState.objects.filter(user_id=OuterRef("user_id"))
+        .values("user_id")
+        .annotate(n=Sum("unread_count"))
+        .values("n")
+    )
+    counters = UnreadCounter.objects.filter(user_id__in=users)
+    return counters.update(
+        notifications=Coalesce(Subquery(notif_count), 0),
+        messages=Coalesce(Subquery(message_count), 0),
+    )
@@ -61,6 +61,27 @@ urlpatterns = [
     # ======================
     path("location/distance/", views.calculate_distance, name="calculate-distance"),
 
+    # ======================
+    #  SEARCH AUTOCOMPLETE
+    # ======================
+    path("search/suggest/", views.search_suggest, name="search-suggest"),
+
+    # ======================
+    #  PRESENCE (ONLINE / LAST SEEN)
+    # ======================
+    path("presence/", views.user_presence, name="user-presence"),
+
+    # ======================
+    #  UNREAD BADGES
+    # ======================
+    path("badges/", views.badges, name="badges"),
+
+    # ======================
+    #  REQUEST METRICS (ADMIN)
+    # ======================
+    path("stats/requests/", views.request_stats, name="request-stats"),
+    path("stats/websocket/", views.websocket_stats, name="websocket-stats"),
+
     # ======================
     #  ROUTER URLS (VIEWSETS)
     # ======================
@@ -1,7 +1,15 @@
 # utils.py
 import math
 from decimal import Decimal
-from typing import Optional, Tuple, Any
+from typing import Optional, Sequence, Tuple, Any, List
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# chini ya idadi hii ya points, gharama ya kutengeneza arrays za numpy ni
+# kubwa kuliko faida yake
+HAVERSINE_BATCH_MIN_POINTS = 64
 
 
 def haversine_distance(lat1, lon1, lat2, lon2):
@@ -25,11 +33,56 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     c = 2 * math.asin(math.sqrt(a))
 
     # Radius of earth in kilometers
-    r = 6371.0
+    r = EARTH_RADIUS_KM
 
     return c * r
 
 
+def haversine_many(lat, lon, latitudes: Sequence[float], longitudes: Sequence[float]) -> List[float]:
+    """
+    Umbali (km, float) kutoka (lat, lon) hadi kila point – formula ile ile
+    ya haversine_distance, kwa points nyingi kwa mara moja.
+
+    - points >= HAVERSINE_BATCH_MIN_POINTS: numpy arrays (vectorized,
+      hakuna loop ya Python kwa math).
+    - chache zaidi: loop moja yenye radians/cos za origin zilizohesabiwa mara
+      moja (bila float()/radians za origin kwa kila point).
+    """
+    if len(latitudes) >= HAVERSINE_BATCH_MIN_POINTS:
+        return _haversine_many_numpy(lat, lon, latitudes, longitudes)
+    return _haversine_many_python(lat, lon, latitudes, longitudes)
+
+
+def _haversine_many_numpy(lat, lon, latitudes, longitudes) -> List[float]:
+    lat1 = math.radians(float(lat))
+    lon1 = math.radians(float(lon))
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon2 = np.radians(np.asarray(longitudes, dtype=np.float64))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    # rounding inaweza kuleta a > 1 kidogo kwa points zinazopingana
+    return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))).tolist()
+
+
+def _haversine_many_python(lat, lon, latitudes, longitudes) -> List[float]:
+    lat1 = math.radians(float(lat))
+    lon1 = math.radians(float(lon))
+    cos_lat1 = math.cos(lat1)
+
+    sin, cos, radians = math.sin, math.cos, math.radians
+    distances = []
+    for lat2, lon2 in zip(latitudes, longitudes):
+        lat2 = radians(lat2)
+        a = (
+            sin((lat2 - lat1) / 2) ** 2
+            + cos_lat1 * cos(lat2) * sin((radians(lon2) - lon1) / 2) ** 2
+        )
+        distances.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0))))
+    return distances
+
+
 def calculate_distance_km(point1_lat, point1_lon, point2_lat, point2_lon):
     """
     Wrapper function to calculate distance and return as Decimal (km, 2 d.p.)
@@ -82,6 +135,22 @@ def _get_object_coordinates(obj: Any) -> Optional[Tuple[float, float]]:
     return None
 
 
+def _with_distances(objects, user_lat, user_lon):
+    """
+    (objects zenye coordinates, umbali wao km) – haversine_many moja kwa wote.
+    """
+    items, latitudes, longitudes = [], [], []
+    for obj in objects:
+        coords = _get_object_coordinates(obj)
+        if coords is None:
+            # object haina coordinates – tuna-skip
+            continue
+        items.append(obj)
+        latitudes.append(coords[0])
+        longitudes.append(coords[1])
+    return items, haversine_many(user_lat, user_lon, latitudes, longitudes)
+
+
 def filter_by_radius(queryset, user_lat, user_lon, radius_km):
     """
     Filter queryset by distance radius using Haversine formula.
@@ -97,15 +166,8 @@ def filter_by_radius(queryset, user_lat, user_lon, radius_km):
     results = []
     radius_km_float = float(radius_km)
 
-    for obj in queryset:
-        coords = _get_object_coordinates(obj)
-        if coords is None:
-            # object haina coordinates – tuna-skip
-            continue
-
-        lat, lon = coords
-        distance = haversine_distance(user_lat, user_lon, lat, lon)
-
+    items, distances = _with_distances(queryset, user_lat, user_lon)
+    for obj, distance in zip(items, distances):
         if distance <= radius_km_float:
             obj.distance = Decimal(str(round(distance, 2)))
             results.append(obj)
@@ -122,19 +184,11 @@ def add_distance_to_queryset(queryset, user_lat, user_lon):
     Inarudisha Python list, kila object akiwa na:
       - obj.distance (Decimal, km, 2 d.p.)
     """
-    results = []
-
-    for obj in queryset:
-        coords = _get_object_coordinates(obj)
-        if coords is None:
-            continue
-
-        lat, lon = coords
-        distance = haversine_distance(user_lat, user_lon, lat, lon)
+    items, distances = _with_distances(queryset, user_lat, user_lon)
+    for obj, distance in zip(items, distances):
         obj.distance = Decimal(str(round(distance, 2)))
-        results.append(obj)
 
-    return results
+    return items
 
 
 def sort_by_distance(items):
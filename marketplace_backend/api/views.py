@@ -1,24 +1,35 @@
 from decimal import Decimal
 
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-from django.db import models
-from django.db.models import Count, Q
+from django.db import IntegrityError, models, transaction
+from django.db.models import Prefetch, Q
 from django.utils import timezone
 
 from rest_framework import viewsets, status, filters
-from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.exceptions import ValidationError
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.decorators import (
+    action,
+    api_view,
+    authentication_classes,
+    permission_classes,
+)
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 
 from rest_framework_simplejwt.tokens import RefreshToken
-from drf_spectacular.utils import extend_schema, OpenApiResponse
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
+from marketplace_backend import db_routers
+from marketplace_backend.db import bulk_create_with_pks
+
+from . import chat, idempotency, notifications, presence, unread
+
 from .models import (
     UserProfile,
     SellerProfile,
@@ -55,10 +66,17 @@ from .serializers import (
     SimpleMessageSerializer,
     DistanceRequestSerializer,
     DistanceResponseSerializer,
+    SuggestResponseSerializer,
+    BadgesSerializer,
+    PresenceSerializer,
+    EndpointStatsSerializer,
+    WebSocketStatsSerializer,
     ProductLikeSerializer,
     ProductLikeToggleSerializer,
     OrderSerializer,
     OrderCreateSerializer,
+    OrderStatusSerializer,
+    CheckoutSerializer,
     ConversationSerializer,
     ConversationDetailSerializer,
     MessageSerializer,
@@ -67,6 +85,12 @@ from .serializers import (
     ChangePasswordSerializer,
     UserSettingsUpdateSerializer,
 )
+from . import instrumentation, outbound, regions, suggest
+from .categories import filter_by_category
+from .idempotency import idempotent
+from .instrumentation import SerializerTimingMixin
+from .search import ProductSearchFilter
+from .streaming import StreamingJSONResponse
 from .utils import (
     calculate_distance_km,
     filter_by_radius,
@@ -75,6 +99,47 @@ from .utils import (
 )
 
 
+class Conflict(APIException):
+    """
+    409 – row imebadilishwa na request nyingine kati ya kusoma na kuandika.
+    """
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "The resource was changed by another request."
+    default_code = "conflict"
+
+
+class ReplicaReadMixin:
+    """
+    Actions zilizo kwenye `replica_actions` zinasoma kutoka read replica
+    (marketplace_backend.db_routers) – catalog inayovumilia data iliyochelewa
+    kidogo. Actions nyingine (writes, dashboards za seller) zinabaki primary.
+
+    Queryset ina-pinwa kwa `.using()` pia, ili StreamingJSONResponse
+    (inasoma baada ya dispatch kurudi) ibaki kwenye replica.
+    """
+
+    replica_actions = ()
+
+    def reads_from_replica(self, request) -> bool:
+        # self.action inawekwa ndani ya dispatch (initialize_request) – hapa
+        # tunaisoma moja kwa moja kutoka action_map ya router
+        action = getattr(self, "action_map", {}).get(request.method.lower())
+        return action in self.replica_actions
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.reads_from_replica(request):
+            with db_routers.use_replica():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if db_routers.replica_active():
+            queryset = queryset.using(db_routers.replica_alias())
+        return queryset
+
+
 def get_tokens_for_user(user):
     """
     Generate JWT access & refresh tokens for a given user
@@ -330,11 +395,12 @@ def update_user_settings(request):
 #  SELLER PROFILE
 # =========================
 
-class SellerProfileViewSet(viewsets.ModelViewSet):
+class SellerProfileViewSet(SerializerTimingMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for seller profiles
     """
-    queryset = SellerProfile.objects.select_related("user", "location").all()
+    replica_actions = ("list", "nearby")
+    queryset = SellerProfile.objects.select_related("user", "user__profile", "location").all()
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["business_name", "description", "location__city"]
     ordering_fields = ["created_at", "rating", "total_sales"]
@@ -379,7 +445,9 @@ class SellerProfileViewSet(viewsets.ModelViewSet):
         Get nearby sellers based on user's location (Haversine)
 
         - Hakuna tena LIMIT ya idadi ya maduka.
-        - Kama `radius` imepelekwa → tunatumia filter_by_radius (km).
+        - Kama `radius` imepelekwa → sellers wa regions zinazogusa radius
+          tu (api/regions.py, cache ya kila region); radius kubwa mno →
+          filter_by_radius (km) kwa sellers wote.
         - Kama `radius` haijapelekwa → tunapanga tu kwa distance bila kufilisha.
         - Pagination hatutumii hapa, tunarudisha list yote kwa frontend.
         """
@@ -420,7 +488,13 @@ class SellerProfileViewSet(viewsets.ModelViewSet):
             if radius <= 0:
                 radius = 10.0
 
-            sellers = filter_by_radius(sellers_qs, lat, lon, radius)
+            distances = regions.sellers_within(lat, lon, radius)
+            if distances is None:
+                sellers = filter_by_radius(sellers_qs, lat, lon, radius)
+            else:
+                sellers = list(sellers_qs.filter(pk__in=list(distances)))
+                for seller in sellers:
+                    seller.distance = Decimal(str(round(distances[seller.pk], 2)))
         else:
             # Hakuna radius → pangilia wote kwa distance tu
             sellers = add_distance_to_queryset(sellers_qs, lat, lon)
@@ -442,11 +516,18 @@ class SellerProfileViewSet(viewsets.ModelViewSet):
         Get all products for a specific seller
         """
         seller = self.get_object()
-        products = Product.objects.filter(seller=seller, is_active=True).select_related(
-            "seller",
-            "seller__location",
-            "category",
-        ).prefetch_related("images", "likes")
+        products = (
+            Product.objects.filter(seller=seller, is_active=True)
+            .select_related(
+                "seller",
+                "seller__location",
+                "seller__user__profile",
+                "category",
+                "category__seller",
+            )
+            .prefetch_related("images")
+            .with_stats(request.user)
+        )
         serializer = ProductSerializer(products, many=True, context={"request": request})
         return Response(serializer.data)
 
@@ -456,7 +537,7 @@ class SellerProfileViewSet(viewsets.ModelViewSet):
         Get all reviews for a specific seller
         """
         seller = self.get_object()
-        reviews = Review.objects.filter(seller=seller)
+        reviews = Review.objects.filter(seller=seller).select_related("user__profile", "seller")
         serializer = ReviewSerializer(reviews, many=True, context={"request": request})
         return Response(serializer.data)
     
@@ -465,12 +546,11 @@ class SellerProfileViewSet(viewsets.ModelViewSet):
         """
         GET /api/sellers/<id>/categories/
 
-        Categories za duka hili (zikiwa na product_count).
+        Categories za duka hili (zikiwa na product_count ya products active –
+        column iliyohifadhiwa, hakuna GROUP BY).
         """
         seller = self.get_object()
-        qs = Category.objects.filter(seller=seller).annotate(
-            product_count=Count("products")
-        )
+        qs = Category.objects.filter(seller=seller).select_related("seller")
         serializer = CategorySerializer(qs, many=True, context={"request": request})
         return Response(serializer.data)
 
@@ -478,7 +558,7 @@ class SellerProfileViewSet(viewsets.ModelViewSet):
 # =========================
 #  CATEGORY
 # =========================
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(SerializerTimingMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for product categories
 
@@ -486,10 +566,16 @@ class CategoryViewSet(viewsets.ModelViewSet):
     - GET /api/categories/?mine=1         => categories za duka la current seller
     - POST /api/categories/               => tengeneza category mpya kwa duka langu
     """
-    queryset = Category.objects.all()
+    queryset = Category.objects.select_related("seller")
     serializer_class = CategorySerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ["name"]
+    replica_actions = ("list", "retrieve")
+
+    def reads_from_replica(self, request):
+        # ?mine=1 ni dashboard ya seller – lazima aone category aliyoongeza sasa hivi
+        mine = request.GET.get("mine") in ("1", "true", "True", "yes")
+        return super().reads_from_replica(request) and not mine
 
     def get_permissions(self):
         if self.action in ["create", "update", "partial_update", "destroy", "mine"]:
@@ -497,7 +583,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return [AllowAny()]
 
     def get_queryset(self):
-        qs = super().get_queryset().annotate(product_count=Count("products"))
+        qs = super().get_queryset()
         request = self.request
 
         seller_id = request.query_params.get("seller_id")
@@ -563,7 +649,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
 #  PRODUCT
 # =========================
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(SerializerTimingMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     """
     ViewSet for products with location-based SORTING ONLY.
 
@@ -576,12 +662,22 @@ class ProductViewSet(viewsets.ModelViewSet):
       kama filter ili isilete EMPTY results.
     """
 
+    replica_actions = ("list", "nearby", "search_nearby")
+
     queryset = (
-        Product.objects.select_related("seller", "seller__location", "category")
-        .prefetch_related("images", "likes")
+        Product.objects.select_related(
+            "seller",
+            "seller__location",
+            "seller__user__profile",
+            "category",
+            "category__seller",
+        )
+        .prefetch_related("images")
         .filter(is_active=True)
     )
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    # ProductSearchFilter: FTS5 index (ranked + prefix) ikiwa ipo, vinginevyo
+    # SearchFilter ya kawaida juu ya search_fields
+    filter_backends = [ProductSearchFilter, filters.OrderingFilter]
     search_fields = ["name", "description", "seller__business_name"]
     ordering_fields = ["price", "created_at"]
 
@@ -602,26 +698,43 @@ class ProductViewSet(viewsets.ModelViewSet):
             seller_profile = self.request.user.seller_profile
         except SellerProfile.DoesNotExist:
             raise ValidationError({"detail": "You must create a seller profile first."})
-        serializer.save(seller=seller_profile)
+        product = serializer.save(seller=seller_profile)
+
+        # fan-out kwa wote waliomfavorite seller huyu (INSERT moja)
+        if product.is_active:
+            notifications.notify_users(
+                Favorite.objects.filter(seller=seller_profile).values_list("user_id", flat=True),
+                "seller_new_product",
+                title=f"New from {seller_profile.business_name}",
+                body=product.name,
+                data={"seller_id": seller_profile.id, "product_id": product.id},
+            )
 
     def get_queryset(self):
         """
         Filters za msingi (category, price, location ya mji).
 
+        - `category_id` (category yoyote) au `category` (slug ya global
+          category); global category inajumuisha descendants wake
+          (api/categories.py) – filter ni `category_id__in`, si LIKE.
+        - likes/sales/units/is_liked ni annotations (Product.objects.with_stats)
+          – idadi ya queries haiongezeki na idadi ya products.
+
         KUMBUKA:
         - SearchFilter bado inafanya kazi kupitia ?search=...
         - Hapa hatugusi lat/lng; hizo zinashughulikiwa kwenye list() na nearby().
         """
-        queryset = super().get_queryset()
         request = self.request
+        queryset = super().get_queryset().with_stats(request.user)
 
         category = request.query_params.get("category")
+        category_id = request.query_params.get("category_id")
         min_price = request.query_params.get("min_price")
         max_price = request.query_params.get("max_price")
         location_text = request.query_params.get("location")
 
-        if category:
-            queryset = queryset.filter(category__name__icontains=category)
+        if category or category_id:
+            queryset = filter_by_category(queryset, category, category_id)
         if min_price:
             queryset = queryset.filter(price__gte=min_price)
         if max_price:
@@ -651,6 +764,8 @@ class ProductViewSet(viewsets.ModelViewSet):
         - Kama lat & lng zimetumwa → ina-add distance_km kwa kila product,
           inapanga kwa distance ASC bila ku-cut off kwa radius.
         - Inarudisha ARRAY tu, hakuna pagination ya backend.
+        - Bila lat & lng (na client akitaka JSON) → array ina-stream row kwa
+          row (StreamingJSONResponse) ili memory isikue na ukubwa wa catalog.
         """
         # apply SearchFilter, OrderingFilter, na get_queryset filters
         base_qs = self.filter_queryset(self.get_queryset())
@@ -658,8 +773,7 @@ class ProductViewSet(viewsets.ModelViewSet):
         lat = request.query_params.get("lat") or request.query_params.get("latitude")
         lon = request.query_params.get("lng") or request.query_params.get("longitude")
 
-        items = list(base_qs)
-
+        lat_f = lon_f = None
         if lat and lon:
             try:
                 lat_f = float(lat)
@@ -668,10 +782,20 @@ class ProductViewSet(viewsets.ModelViewSet):
                 lat_f = None
                 lon_f = None
 
-            if lat_f is not None and lon_f is not None:
-                # ongeza distance kwa kila product na upange kwa ukaribu
-                items = add_distance_to_queryset(items, lat_f, lon_f)
-                items = sort_by_distance(items)
+        if lat_f is None or lon_f is None:
+            renderer = getattr(request, "accepted_renderer", None)
+            if renderer is not None and renderer.format == "json":
+                return StreamingJSONResponse(
+                    request,
+                    base_qs,
+                    self.get_serializer_class(),
+                    context=self.get_serializer_context(),
+                )
+            items = base_qs
+        else:
+            # ongeza distance kwa kila product na upange kwa ukaribu
+            items = add_distance_to_queryset(base_qs, lat_f, lon_f)
+            items = sort_by_distance(items)
 
         serializer = self.get_serializer(
             items,
@@ -742,7 +866,8 @@ class ProductViewSet(viewsets.ModelViewSet):
             "latitude": ...,
             "longitude": ...,
             "radius": 10,         # hapa HATUITUMII tena kama LIMIT, tunasort tu
-            "category": "...",
+            "category": "...",     # slug ya global category
+            "category_id": 12,     # au id ya category yoyote
             "min_price": ...,
             "max_price": ...,
             "sort_by": "distance" | "price" | "rating"
@@ -756,14 +881,15 @@ class ProductViewSet(viewsets.ModelViewSet):
         lat = float(data["latitude"])
         lon = float(data["longitude"])
         category = data.get("category")
+        category_id = data.get("category_id")
         min_price = data.get("min_price")
         max_price = data.get("max_price")
         sort_by_field = data.get("sort_by", "distance")
 
         queryset = self.filter_queryset(self.get_queryset())
 
-        if category:
-            queryset = queryset.filter(category__name__icontains=category)
+        if category or category_id:
+            queryset = filter_by_category(queryset, category, category_id)
         if min_price:
             queryset = queryset.filter(price__gte=min_price)
         if max_price:
@@ -826,7 +952,7 @@ class ProductViewSet(viewsets.ModelViewSet):
 #  PRODUCT IMAGES
 # =========================
 
-class ProductImageViewSet(viewsets.ModelViewSet):
+class ProductImageViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     ViewSet for product images (gallery uploads)
     """
@@ -874,11 +1000,11 @@ class ProductImageViewSet(viewsets.ModelViewSet):
 #  REVIEWS
 # =========================
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     ViewSet for seller reviews
     """
-    queryset = Review.objects.select_related("user", "seller").all()
+    queryset = Review.objects.select_related("user", "user__profile", "seller").all()
     serializer_class = ReviewSerializer
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ["created_at", "rating"]
@@ -914,11 +1040,16 @@ class ReviewViewSet(viewsets.ModelViewSet):
 #  FAVORITES (SELLERS)
 # =========================
 
-class FavoriteViewSet(viewsets.ModelViewSet):
+class FavoriteViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     ViewSet for user favorites (sellers)
     """
-    queryset = Favorite.objects.select_related("user", "seller", "seller__location")
+    queryset = Favorite.objects.select_related(
+        "user",
+        "seller",
+        "seller__location",
+        "seller__user__profile",
+    )
     serializer_class = FavoriteSerializer
     permission_classes = [IsAuthenticated]
 
@@ -979,7 +1110,7 @@ class FavoriteViewSet(viewsets.ModelViewSet):
 #  PRODUCT LIKES
 # =========================
 
-class ProductLikeViewSet(viewsets.ModelViewSet):
+class ProductLikeViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     Likes kwa kila product (user mmoja a-like mara moja)
     """
@@ -1043,14 +1174,17 @@ class ProductLikeViewSet(viewsets.ModelViewSet):
 #  ORDERS
 # =========================
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     Orders kati ya mnunuaji (buyer) na muuzaji (seller)
     """
     queryset = Order.objects.select_related(
         "buyer",
+        "buyer__profile",
         "seller",
         "seller__user",
+        "seller__user__profile",
+        "seller__location",
         "product",
         "product__seller",
     )
@@ -1061,6 +1195,8 @@ class OrderViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == "create":
             return OrderCreateSerializer
+        if self.action == "checkout":
+            return CheckoutSerializer
         return OrderSerializer
 
     def get_queryset(self):
@@ -1081,10 +1217,23 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         return qs
 
+    @extend_schema(parameters=[idempotency.HEADER_PARAMETER])
+    @idempotent("orders.create")
+    def create(self, request, *args, **kwargs):
+        """
+        Tengeneza order moja. Tuma `Idempotency-Key` ili retry isilete order
+        ya pili (response ya kwanza inarudishwa).
+        """
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         """
+        - hifadhi stock (conditional UPDATE) – bila stock ya kutosha => 400
         - set buyer, seller, unit_price, total_price
         - tengeneza notification kwa buyer na seller
+
+        Yote ndani ya transaction moja: order ikishindwa, stock na
+        notifications zinarudishwa pamoja.
         """
         user = self.request.user
         product = serializer.validated_data["product"]
@@ -1093,49 +1242,227 @@ class OrderViewSet(viewsets.ModelViewSet):
         unit_price = product.price
         total_price = unit_price * quantity
 
-        order = serializer.save(
-            buyer=user,
-            seller=product.seller,
-            unit_price=unit_price,
-            total_price=total_price,
-        )
+        with transaction.atomic():
+            if not Product.objects.reserve_stock(product.pk, quantity):
+                raise ValidationError({"quantity": "Not enough stock for this product."})
 
-        # notifications
-        Notification.objects.create(
-            user=product.seller.user,
-            notif_type="order_new",
-            title="New order received",
-            body=f"{user.username} ordered {quantity} x {product.name}.",
-            data={"order_id": order.id, "product_id": product.id},
-        )
+            order = serializer.save(
+                buyer=user,
+                seller=product.seller,
+                unit_price=unit_price,
+                total_price=total_price,
+            )
+
+            # notifications
+            data = {"order_id": order.id, "product_id": product.id}
+            notifications.notify([
+                Notification(
+                    user_id=product.seller.user_id,
+                    notif_type="order_new",
+                    title="New order received",
+                    body=f"{user.username} ordered {quantity} x {product.name}.",
+                    data=data,
+                ),
+                Notification(
+                    user=user,
+                    notif_type="order_created",
+                    title="Order created",
+                    body=f"Your order for {product.name} has been created.",
+                    data=data,
+                ),
+            ])
+
+    @extend_schema(
+        summary="Checkout ya cart nzima: orders za sellers wote kwa request moja",
+        parameters=[idempotency.HEADER_PARAMETER],
+        request=CheckoutSerializer,
+        responses={
+            201: OrderSerializer(many=True),
+            400: OpenApiResponse(description="Validation error or not enough stock"),
+        },
+    )
+    @action(detail=False, methods=["post"], pagination_class=None, filter_backends=[])
+    @idempotent("orders.checkout")
+    def checkout(self, request):
+        """
+        Cart -> order moja kwa kila product, zote au hakuna:
+        - stock ya products zote inapunguzwa kwa UPDATE moja
+        - orders zote kwa bulk_create moja (db.bulk_create_with_pks – pk za
+          orders zinahitajika kwa notifications na response, hata MySQL)
+        - notification moja kwa kila seller (orders zake) + moja kwa buyer,
+          kwa bulk_create moja
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = request.user
+        lines = serializer.validated_data["lines"]
+        details = {
+            field: serializer.validated_data[field]
+            for field in ("delivery_address", "contact_phone", "note")
+        }
 
-        Notification.objects.create(
+        with transaction.atomic():
+            quantities = {product.pk: quantity for product, quantity in lines}
+            if not Product.objects.reserve_stock_many(quantities):
+                short = [str(product.pk) for product, quantity in lines
+                         if product.stock_quantity < quantity]
+                raise ValidationError({
+                    "items": "Not enough stock for products: " + ", ".join(short)
+                    if short else "Not enough stock for one or more products."
+                })
+
+            orders = bulk_create_with_pks(Order, [
+                Order(
+                    buyer=user,
+                    seller=product.seller,
+                    product=product,
+                    quantity=quantity,
+                    unit_price=product.price,
+                    total_price=product.price * quantity,
+                    **details,
+                )
+                for product, quantity in lines
+            ])
+            notifications.notify(self._checkout_notifications(user, orders))
+
+        qs = self.queryset.filter(pk__in=[order.pk for order in orders]).order_by("id")
+        data = OrderSerializer(qs, many=True, context=self.get_serializer_context()).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def _checkout_notifications(user, orders):
+        by_seller = {}
+        for order in orders:
+            by_seller.setdefault(order.seller, []).append(order)
+
+        batch = []
+        for seller, seller_orders in by_seller.items():
+            items = ", ".join(f"{o.quantity} x {o.product.name}" for o in seller_orders)
+            batch.append(Notification(
+                user_id=seller.user_id,
+                notif_type="order_new",
+                title="New order received",
+                body=f"{user.username} ordered {items}.",
+                data={
+                    "order_id": seller_orders[0].id,
+                    "order_ids": [o.id for o in seller_orders],
+                    "product_ids": [o.product_id for o in seller_orders],
+                },
+            ))
+
+        batch.append(Notification(
             user=user,
             notif_type="order_created",
             title="Order created",
-            body=f"Your order for {product.name} has been created.",
-            data={"order_id": order.id, "product_id": product.id},
-        )
+            body=(
+                f"Your order for {len(orders)} product(s) from "
+                f"{len(by_seller)} seller(s) has been created."
+            ),
+            data={
+                "order_id": orders[0].id,
+                "order_ids": [o.id for o in orders],
+            },
+        ))
+        return batch
 
-    def perform_update(self, serializer):
+    def perform_destroy(self, instance):
         """
-        Update order and keep seller.sales stats in sync (completed orders only).
+        Futa order; kama bado ilikuwa inashikilia stock, irudishwe. DELETE
+        ina sharti la status iliyosomwa – kama status imebadilika wakati huo
+        (mf. imekuwa cancelled na stock imesharudishwa), stock hairudishwi
+        mara ya pili.
         """
-        order = serializer.instance
-        old_status = order.status
-        order = serializer.save()
-
-        # kama kabla au baada ya update order iko COMPLETED, recompute mauzo
-        if old_status == Order.STATUS_COMPLETED or order.status == Order.STATUS_COMPLETED:
-            order.seller.recalculate_sales()
-
-    def perform_destroy(self, instance):
         was_completed = instance.status == Order.STATUS_COMPLETED
         seller = instance.seller
-        super().perform_destroy(instance)
+        with transaction.atomic():
+            deleted, _ = Order.objects.filter(pk=instance.pk, status=instance.status).delete()
+            if not deleted:
+                raise Conflict("Order status changed meanwhile; reload and retry.")
+            if instance.status in Order.STOCK_HOLDING_STATUSES:
+                Product.objects.release_stock(instance.product_id, instance.quantity)
         if was_completed:
             seller.recalculate_sales()
 
+    @extend_schema(
+        summary="Badilisha status ya order (buyer: cancel/reopen, seller: accept/reject/complete)",
+        request=OrderStatusSerializer,
+        responses={
+            200: OrderSerializer,
+            400: OpenApiResponse(description="Transition not allowed or not enough stock"),
+            403: OpenApiResponse(description="Not the buyer or seller of this order"),
+            409: OpenApiResponse(description="Status changed by another request"),
+        },
+    )
+    @action(detail=True, methods=["post"], url_path="status")
+    def set_status(self, request, pk=None):
+        """
+        Badilisha status kwa mujibu wa Order.BUYER_TRANSITIONS /
+        SELLER_TRANSITIONS:
+        - pending/accepted -> cancelled/rejected: stock ya order inarudishwa
+        - cancelled/rejected -> pending/accepted: stock inahifadhiwa upya
+          (conditional UPDATE; haitoshi => 400)
+        Status inaandikwa kwa `UPDATE ... WHERE status = <ya zamani>`: requests
+        mbili zikishindana, moja tu inabadilisha stock, nyingine inapata 409.
+        """
+        order = self.get_object()
+        user = request.user
+        is_buyer = order.buyer_id == user.id
+        is_seller = order.seller.user_id == user.id
+        if not (is_buyer or is_seller):
+            return Response(
+                {"detail": "You are not part of this order."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        serializer = OrderStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        old_status = order.status
+        new_status = serializer.validated_data["status"]
+
+        allowed = set()
+        if is_buyer:
+            allowed.update(Order.BUYER_TRANSITIONS.get(old_status, ()))
+        if is_seller:
+            allowed.update(Order.SELLER_TRANSITIONS.get(old_status, ()))
+        if new_status not in allowed:
+            raise ValidationError(
+                {"status": f"Cannot change order from {old_status} to {new_status}."}
+            )
+
+        was_returned = old_status in Order.STOCK_RETURNED_STATUSES
+        will_return = new_status in Order.STOCK_RETURNED_STATUSES
+
+        with transaction.atomic():
+            changed = Order.objects.filter(pk=order.pk, status=old_status).update(
+                status=new_status,
+                updated_at=timezone.now(),
+            )
+            if not changed:
+                raise Conflict("Order status changed meanwhile; reload and retry.")
+
+            if will_return and not was_returned:
+                Product.objects.release_stock(order.product_id, order.quantity)
+            elif was_returned and not will_return:
+                if not Product.objects.reserve_stock(order.product_id, order.quantity):
+                    raise ValidationError({"status": "Not enough stock to reopen this order."})
+
+            recipient = order.seller.user_id if is_buyer else order.buyer_id
+            notifications.notify([
+                Notification(
+                    user_id=recipient,
+                    notif_type="order_status",
+                    title="Order status updated",
+                    body=f"Your order for {order.product.name} is now {new_status}.",
+                    data={"order_id": order.id, "status": new_status},
+                ),
+            ])
+
+        if Order.STATUS_COMPLETED in (old_status, new_status):
+            order.seller.recalculate_sales()
+
+        order.refresh_from_db(fields=["status", "updated_at"])
+        return Response(OrderSerializer(order, context=self.get_serializer_context()).data)
+
     @action(detail=False, methods=["get"])
     def as_buyer(self, request):
         """
@@ -1172,15 +1499,16 @@ class OrderViewSet(viewsets.ModelViewSet):
 #  CHAT: CONVERSATIONS & MESSAGES
 # =========================
 
-class ConversationViewSet(viewsets.ModelViewSet):
+class ConversationViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     Conversation kati ya buyer na seller
     """
     queryset = Conversation.objects.select_related(
         "buyer",
+        "buyer__profile",
         "seller",
         "seller__user",
-        "product",
+        "seller__user__profile",
     )
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.OrderingFilter]
@@ -1206,8 +1534,62 @@ class ConversationViewSet(viewsets.ModelViewSet):
         if seller_id:
             qs = qs.filter(seller_id=seller_id)
 
+        # list/detail: unread, typing, last message na product kwa queries
+        # chache zisizotegemea idadi ya conversations
+        if self.action in ("list", "retrieve", "create"):
+            qs = qs.with_inbox_state(user)
+        if self.action in ("retrieve", "create"):
+            qs = qs.prefetch_related(
+                Prefetch(
+                    "messages",
+                    queryset=Message.objects.select_related("sender__profile"),
+                ),
+                Prefetch(
+                    "participant_states",
+                    queryset=ConversationParticipantState.objects.select_related(
+                        "user__profile"
+                    ),
+                ),
+            )
+
         return qs
 
+    def list(self, request, *args, **kwargs):
+        """
+        Inbox ya current user (conversations zake, mpya kwanza).
+
+        `other_presence` ya rows zote za page inasomwa kwa pamoja (cache read
+        moja – api.presence), si moja moja kwa kila row.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        context = self.get_serializer_context()
+        context["presence"] = presence.for_conversations(rows, request.user)
+        serializer = self.get_serializer_class()(rows, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def perform_destroy(self, instance):
+        """
+        Messages, states na chat notifications zinafutwa kwa CASCADE – toa
+        unread zao kwenye UnreadCounter za washiriki.
+        """
+        unread_messages = list(
+            instance.participant_states.filter(unread_count__gt=0).values_list(
+                "user_id", "unread_count"
+            )
+        )
+        unread_notifications = list(
+            instance.notifications.filter(is_read=False).values_list("user_id", flat=True)
+        )
+        super().perform_destroy(instance)
+        deltas = {user_id: [0, count] for user_id, count in unread_messages}
+        for user_id in unread_notifications:
+            deltas.setdefault(user_id, [0, 0])[0] += 1
+        unread.subtract(deltas)
+
     def create(self, request, *args, **kwargs):
         """
         Create or reuse conversation between current user (buyer) and seller.
@@ -1270,9 +1652,11 @@ class ConversationViewSet(viewsets.ModelViewSet):
         )
         ConversationParticipantState.objects.get_or_create(
             conversation=conversation,
-            user=seller.user,
+            user_id=seller.user_id,
         )
 
+        # soma tena kupitia get_queryset (annotations + prefetch za detail)
+        conversation = self.get_queryset().get(pk=conversation.pk)
         serializer = self.get_serializer(conversation, context={"request": request})
         return Response(
             serializer.data,
@@ -1282,8 +1666,8 @@ class ConversationViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["post"])
     def mark_seen(self, request, pk=None):
         """
-        Tandika messages zote (za upande mwingine) kama zimesomwa
-        na update participant_state (last_seen_at, last_read_at).
+        Tandika messages zote (za upande mwingine) kama zimesomwa.
+        last_seen_at / last_read_at zinaenda kwa api.presence (batches).
         """
         conversation = self.get_object()
         user = request.user
@@ -1305,16 +1689,8 @@ class ConversationViewSet(viewsets.ModelViewSet):
             status=Message.STATUS_READ,
         )
 
-        # update participant state
-        state, _ = ConversationParticipantState.objects.get_or_create(
-            conversation=conversation,
-            user=user,
-        )
-        now = timezone.now()
-        state.last_seen_at = now
-        state.last_read_at = now
-        state.is_typing = False
-        state.save(update_fields=["last_seen_at", "last_read_at", "is_typing"])
+        unread.messages_read(conversation.id, user.id, count, reset=True)
+        presence.heartbeat(user.id, conversation.id, read=True)
 
         return Response({"marked_read": count})
 
@@ -1387,7 +1763,7 @@ class ConversationViewSet(viewsets.ModelViewSet):
 
         return Response({"is_typing": is_typing})
 
-class MessageViewSet(viewsets.ModelViewSet):
+class MessageViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     Chat messages ndani ya conversation
     """
@@ -1397,6 +1773,7 @@ class MessageViewSet(viewsets.ModelViewSet):
         "conversation__seller",
         "conversation__seller__user",
         "sender",
+        "sender__profile",
     )
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.OrderingFilter]
@@ -1427,6 +1804,20 @@ class MessageViewSet(viewsets.ModelViewSet):
 
         return qs
 
+    def perform_destroy(self, instance):
+        conversation = instance.conversation
+        super().perform_destroy(instance)
+        if not instance.is_read:
+            # upande mwingine ulikuwa bado haujaisoma
+            recipient_id = (
+                conversation.seller.user_id
+                if instance.sender_id == conversation.buyer_id
+                else conversation.buyer_id
+            )
+            unread.messages_read(conversation.id, recipient_id, 1)
+
+    @extend_schema(parameters=[idempotency.HEADER_PARAMETER])
+    @idempotent("messages.create")
     def create(self, request, *args, **kwargs):
         """
         Create message mpya ndani ya conversation:
@@ -1434,17 +1825,21 @@ class MessageViewSet(viewsets.ModelViewSet):
         Body:
         {
           "conversation": 1,
-          "text": "Habari..."
+          "text": "Habari...",
+          "client_id": "7f3c..."   # optional, id ya client kwa retries
         }
 
         - Inathibitisha kuwa current user ni participant.
-        - Inahakikisha conversation_id sio NULL (tunachukua kutoka validated_data).
-        - Inahifadhi Message manual (Message.objects.create(...)).
-        - Inafanya:
+        - api.chat.send_message (logic ile ile ya WebSocket `message.send`):
             * Conversation.last_message_at update
-            * ParticipantState kwa sender (last_seen, last_read)
-            * Notification kwa mtu wa pili
-            * Realtime WebSocket push -> group "chat_<conversation_id>"
+            * presence ya sender (last_seen, last_read – api.presence)
+            * unread + Notification kwa mtu wa pili
+        - Realtime WebSocket push -> group "chat_<conversation_id>"
+        - `client_id` iliyokwisha tumwa => 200 na message ya awali, bila
+          kurudia side effects wala push; kama ilitumwa kwenye conversation
+          nyingine => 409.
+        - `Idempotency-Key` header => retry inarudisha response ya kwanza
+          (api.idempotency).
         """
         user = request.user
 
@@ -1452,81 +1847,32 @@ class MessageViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
 
         conversation = serializer.validated_data["conversation"]
-        text = serializer.validated_data["text"]
 
         # hakikisha user ni sehemu ya hii conversation
-        if not (
-            conversation.buyer_id == user.id
-            or conversation.seller.user_id == user.id
-        ):
+        if not chat.is_participant(conversation, user):
             return Response(
                 {"detail": "You are not part of this conversation."},
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # HAPA NDIO TUNAFIX NOT NULL:
-        # Tunatengeneza Message kwa mkono, tukipita na conversation=...
-        msg = Message.objects.create(
-            conversation=conversation,
-            sender=user,
-            text=text,
-            status=Message.STATUS_SENT,
-            is_read=False,
-        )
-
-        # update last_message_at
-        Conversation.objects.filter(pk=conversation.pk).update(
-            last_message_at=msg.created_at
-        )
-
-        # update participant state for sender (seen + read)
-        state, _ = ConversationParticipantState.objects.get_or_create(
-            conversation=conversation,
-            user=user,
-        )
-        now = timezone.now()
-        state.last_seen_at = now
-        state.last_read_at = now
-        state.is_typing = False
-        state.save(update_fields=["last_seen_at", "last_read_at", "is_typing"])
-
-        # notifications: target ni participant mwingine
-        if user.id == conversation.buyer_id:
-            target_user = conversation.seller.user
-        else:
-            target_user = conversation.buyer
-
-        Notification.objects.create(
-            user=target_user,
-            notif_type="chat_message",
-            title="New message",
-            body=msg.text[:120],
-            data={
-                "conversation_id": conversation.id,
-                "message_id": msg.id,
-            },
-        )
+        try:
+            msg, created = chat.send_message(
+                conversation,
+                user,
+                serializer.validated_data["text"],
+                client_id=serializer.validated_data.get("client_id"),
+            )
+        except chat.ClientIdConflict as exc:
+            return Response({"detail": exc.detail}, status=status.HTTP_409_CONFLICT)
+        payload = chat.message_payload(msg, request)
+        if not created:
+            return Response(payload, status=status.HTTP_200_OK)
 
         # realtime: broadcast kwa WebSocket group ya conversation hii
-        channel_layer = get_channel_layer()
-        if channel_layer is not None:
-            payload = MessageSerializer(
-                msg,
-                context={"request": request},
-            ).data
-
-            async_to_sync(channel_layer.group_send)(
-                f"chat_{conversation.id}",
-                {
-                    "type": "chat.message",
-                    "message": payload,
-                },
-            )
+        chat.broadcast_message(conversation.id, payload)
 
-        # response ya HTTP
-        output = MessageSerializer(msg, context={"request": request})
-        headers = self.get_success_headers(output.data)
-        return Response(output.data, status=status.HTTP_201_CREATED, headers=headers)
+        headers = self.get_success_headers(payload)
+        return Response(payload, status=status.HTTP_201_CREATED, headers=headers)
 
     @action(detail=True, methods=["post"])
     def mark_read(self, request, pk=None):
@@ -1555,14 +1901,8 @@ class MessageViewSet(viewsets.ModelViewSet):
             msg.status = Message.STATUS_READ
             msg.save(update_fields=["is_read", "status"])
 
-            state, _ = ConversationParticipantState.objects.get_or_create(
-                conversation=conversation,
-                user=user,
-            )
-            now = timezone.now()
-            state.last_seen_at = now
-            state.last_read_at = now
-            state.save(update_fields=["last_seen_at", "last_read_at"])
+            unread.messages_read(conversation.id, user.id, 1)
+            presence.heartbeat(user.id, conversation.id, read=True)
 
         return Response({"is_read": msg.is_read})
 
@@ -1571,11 +1911,11 @@ class MessageViewSet(viewsets.ModelViewSet):
 #  NOTIFICATIONS
 # =========================
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     Notifications kwa user (orders, chat, n.k.)
     """
-    queryset = Notification.objects.select_related("user")
+    queryset = Notification.objects.select_related("user", "user__profile")
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.OrderingFilter]
@@ -1585,14 +1925,51 @@ class NotificationViewSet(viewsets.ModelViewSet):
         return self.queryset.filter(user=self.request.user)
 
     def perform_update(self, serializer):
-        serializer.save(user=self.request.user)
+        """
+        Chat notification iliyosomwa ikirudishwa `is_read=false` wakati tayari
+        kuna row isiyosomwa ya conversation ile ile, zinaunganishwa
+        (notifications.merge_into_unread) na response ni ya row inayobaki.
+        """
+        instance = serializer.instance
+        was_read = instance.is_read
+        reopening = was_read and serializer.validated_data.get("is_read") is False
+
+        merged = None
+        if not reopening:
+            notification = serializer.save(user=self.request.user)
+        else:
+            with transaction.atomic():
+                merged = notifications.merge_into_unread(instance)
+                if merged is None:
+                    try:
+                        with transaction.atomic():
+                            notification = serializer.save(user=self.request.user)
+                    except IntegrityError:
+                        # row isiyosomwa imeingizwa kati ya check na save
+                        merged = notifications.merge_into_unread(instance)
+                        if merged is None:
+                            raise
+
+        if merged is not None:
+            # row iliyopo ilikuwa tayari kwenye unread counter – haibadiliki
+            serializer.instance = merged
+            return
+        if notification.is_read != was_read:
+            unread.bump_users([notification.user_id], notifications=-1 if notification.is_read else 1)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        if not instance.is_read:
+            unread.notifications_read(instance.user_id, 1)
 
     @action(detail=False, methods=["post"])
     def mark_all_read(self, request):
         """
-        Tandika notifications zote kama zimesomwa
+        Tandika notifications zote kama zimesomwa – UPDATE inagusa zile
+        ambazo hazijasomwa tu (index ya user + is_read).
         """
-        count = self.get_queryset().update(is_read=True)
+        count = self.get_queryset().filter(is_read=False).update(is_read=True)
+        unread.notifications_read(request.user.id, count)
         return Response({"updated": count})
 
 
@@ -1641,3 +2018,168 @@ def calculate_distance(request):
         )
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+# =========================
+#  SEARCH AUTOCOMPLETE
+# =========================
+
+@extend_schema(
+    summary="Autocomplete suggestions kwa search box",
+    parameters=[
+        OpenApiParameter("q", str, description="Prefix aliyoandika user"),
+        OpenApiParameter("limit", int, description="Idadi ya suggestions (max SUGGEST_TOP_K)"),
+    ],
+    responses={200: SuggestResponseSerializer},
+    tags=["search"],
+)
+@api_view(["GET"])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def search_suggest(request):
+    """
+    Type-ahead: products, maduka, miji na categories zinazoanza na `q`.
+    Inajibiwa kutoka in-memory prefix index (api/suggest.py) – haiguse DB.
+    """
+    query = request.query_params.get("q", "").strip()
+    try:
+        limit = int(request.query_params.get("limit", settings.SUGGEST_TOP_K))
+    except (TypeError, ValueError):
+        limit = settings.SUGGEST_TOP_K
+    limit = max(1, limit)
+
+    results = suggest.suggest(query, limit) if query else []
+    return Response({"query": query, "results": results})
+
+
+# =========================
+#  PRESENCE (online / last seen)
+# =========================
+
+@extend_schema(
+    summary="Presence ya users wengi (online / last seen) kwa request moja",
+    parameters=[
+        OpenApiParameter(
+            "user",
+            int,
+            many=True,
+            description="User id (rudia: ?user=1&user=2). Users ambao una conversation nao tu.",
+        ),
+    ],
+    responses={200: PresenceSerializer(many=True)},
+    tags=["chat"],
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def user_presence(request):
+    """
+    Presence kutoka cache (api.presence); users wasio kwenye cache =>
+    last_seen_at ya DB. Inarudisha tu users ambao current user ana
+    conversation nao.
+    """
+    try:
+        requested = {int(value) for value in request.query_params.getlist("user")}
+    except ValueError:
+        return Response(
+            {"detail": "user must be an integer id."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    limit = settings.PRESENCE_BULK_MAX_USERS
+    if len(requested) > limit:
+        return Response(
+            {"detail": f"At most {limit} users per request."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    user = request.user
+    allowed = set()
+    if requested:
+        pairs = Conversation.objects.filter(
+            Q(buyer=user, seller__user_id__in=requested)
+            | Q(seller__user=user, buyer_id__in=requested)
+        ).values_list("buyer_id", "seller__user_id")
+        allowed = {pk for pair in pairs for pk in pair if pk != user.id}
+
+    found = presence.bulk(sorted(allowed))
+    missing = [pk for pk, row in found.items() if row["last_seen_at"] is None]
+    if missing:
+        stored = presence.stored_last_seen(missing)
+        for pk in missing:
+            found[pk]["last_seen_at"] = stored.get(pk)
+
+    rows = [{"user": pk, **row} for pk, row in found.items()]
+    return Response(PresenceSerializer(rows, many=True).data)
+
+
+# =========================
+#  BADGES (unread counters)
+# =========================
+
+@extend_schema(
+    summary="Unread badges zote (notifications, messages, kwa kila conversation)",
+    responses={200: BadgesSerializer},
+    tags=["notifications"],
+)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def badges(request):
+    """
+    Counters zilizohifadhiwa (api/unread.py) – queries mbili bila COUNT,
+    hata kama frontend inapiga poll mara kwa mara.
+    """
+    return Response(unread.badges(request.user))
+
+
+# =========================
+#  REQUEST METRICS (admin)
+# =========================
+
+@extend_schema(
+    summary="Takwimu za queries/latency kwa kila endpoint (process hii)",
+    parameters=[
+        OpenApiParameter(
+            "order_by",
+            str,
+            description="avg_queries (default), max_queries, avg_total_ms, flagged ...",
+        ),
+    ],
+    responses={200: EndpointStatsSerializer(many=True)},
+    tags=["stats"],
+)
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminUser])
+def request_stats(request):
+    """
+    GET    => takwimu zilizokusanywa na RequestMetricsMiddleware
+    DELETE => anza upya (reset)
+    """
+    if request.method == "DELETE":
+        instrumentation.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    order_by = request.query_params.get("order_by", "avg_queries")
+    return Response(instrumentation.snapshot(order_by))
+
+
+# =========================
+#  WEBSOCKET SEND QUEUES (admin)
+# =========================
+
+@extend_schema(
+    summary="Takwimu za foleni za WebSocket (queue depth, dropped frames)",
+    responses={200: WebSocketStatsSerializer},
+    tags=["stats"],
+)
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminUser])
+def websocket_stats(request):
+    """
+    GET    => connections zilizo wazi, events zinazosubiri, frames/batches
+              zilizotumwa, typing zilizokunjwa/kutupwa, sockets zilizofungwa
+              kwa overflow (process hii tu)
+    DELETE => anza upya counters (reset)
+    """
+    if request.method == "DELETE":
+        outbound.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(outbound.snapshot())
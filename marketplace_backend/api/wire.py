@@ -0,0 +1,178 @@
+# api/wire.py
+"""
+Compact frame encoding kwa chat WebSocket (opt-in kwa subprotocol).
+
+Client anaomba subprotocol kwenye handshake (`Sec-WebSocket-Protocol`):
+
+- `meetme.compact.v1+msgpack` => frames za binary (MessagePack)
+- `meetme.compact.v1+json`    => frames za text (JSON fupi)
+
+Bila subprotocol hizi, socket inaendelea na JSON ya kawaida (verbose).
+
+Kwenye compact:
+- keys za frames zinafupishwa (`type` => `y`, `message` => `m`, ...) na
+  types pia (`message.created` => `mc`, ...) – ramani ziko chini (KEYS,
+  TYPES, MESSAGE_KEYS, STATE_KEYS).
+- `sender` / `user` (UserMiniSerializer) inabadilishwa kuwa id tu. Card
+  kamili ya user inatumwa MARA MOJA kwa kila connection: frame ya kwanza
+  inayomtaja ina `us: [card, ...]` (juu kabisa ya frame) – client aihifadhi
+  kwa id kabla ya kusoma events za frame hiyo.
+- frames kutoka kwa client zinabaki na schema ile ile (`type`, `text`,
+  `client_id` ...); kwenye msgpack zinaweza kuja kama binary.
+
+Encoding inafanyika pale frame inapoandikwa kwenye socket (writer ya
+api.outbound), kwa hiyo card inatumwa na frame iliyotumwa kweli – si
+iliyotupwa na foleni.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack iko kwenye requirements.txt
+    msgpack = None
+
+SUBPROTOCOL_JSON = "meetme.compact.v1+json"
+SUBPROTOCOL_MSGPACK = "meetme.compact.v1+msgpack"
+
+TYPES = {
+    "connection": "cn",
+    "pong": "po",
+    "batch": "b",
+    "resume": "rs",
+    "message.created": "mc",
+    "message.ack": "ma",
+    "message.error": "me",
+    "conversation.typing": "ty",
+}
+
+KEYS = {
+    "type": "y",
+    "events": "ev",
+    "message": "m",
+    "messages": "ms",
+    "state": "s",
+    "participant_states": "ps",
+    "client_id": "k",
+    "duplicate": "d",
+    "errors": "e",
+    "conversation_id": "c",
+    "user_id": "u",
+    "last_message_id": "l",
+    "has_more": "h",
+}
+
+MESSAGE_KEYS = {
+    "id": "i",
+    "conversation": "c",
+    "sender": "s",  # user id; card kwenye `us`
+    "text": "t",
+    "status": "st",
+    "is_read": "r",
+    "client_id": "k",
+    "created_at": "ca",
+    "updated_at": "ua",
+}
+
+STATE_KEYS = {
+    "id": "i",
+    "conversation": "c",
+    "user": "u",  # user id; card kwenye `us`
+    "user_id": "u",
+    "is_typing": "ty",
+    "last_typing_at": "ta",
+    "last_seen_at": "sa",
+    "last_read_at": "ra",
+}
+
+
+def supported() -> List[str]:
+    protocols = [SUBPROTOCOL_JSON]
+    if msgpack is not None:
+        protocols.insert(0, SUBPROTOCOL_MSGPACK)
+    return protocols
+
+
+def negotiate(offered: Iterable[str]) -> Optional["CompactCodec"]:
+    """
+    Subprotocol ya kwanza (kwa mpangilio wa client) tunayoijua => codec yake;
+    None => JSON ya kawaida.
+    """
+    available = supported()
+    for protocol in offered or ():
+        if protocol in available:
+            return CompactCodec(binary=protocol == SUBPROTOCOL_MSGPACK)
+    return None
+
+
+class CompactCodec:
+    """
+    Codec ya connection moja (inakumbuka cards za users zilizokwisha tumwa).
+    """
+
+    def __init__(self, binary: bool):
+        self.binary = binary
+        self.subprotocol = SUBPROTOCOL_MSGPACK if binary else SUBPROTOCOL_JSON
+        self._users_sent: Set[int] = set()
+
+    # ---------------- outgoing ----------------
+
+    def encode(self, frame: Dict[str, Any]) -> Tuple[Optional[str], Optional[bytes]]:
+        """
+        Rudisha (text_data, bytes_data) kwa `send()` ya consumer.
+        """
+        cards: List[dict] = []
+        compact = self._event(frame, cards)
+        if cards:
+            compact = {"us": cards, **compact}
+        if self.binary:
+            return None, msgpack.packb(compact, use_bin_type=True)
+        return json.dumps(compact, separators=(",", ":")), None
+
+    def _event(self, event: Dict[str, Any], cards: List[dict]) -> Dict[str, Any]:
+        out = {}
+        for key, value in event.items():
+            if key == "type":
+                value = TYPES.get(value, value)
+            elif key == "events":
+                value = [self._event(item, cards) for item in value]
+            elif key == "message" and isinstance(value, dict):
+                value = self._compact(value, MESSAGE_KEYS, "sender", cards)
+            elif key == "messages":
+                value = [self._compact(item, MESSAGE_KEYS, "sender", cards) for item in value]
+            elif key == "state" and isinstance(value, dict):
+                value = self._compact(value, STATE_KEYS, "user", cards)
+            elif key == "participant_states":
+                value = [self._compact(item, STATE_KEYS, "user", cards) for item in value]
+            out[KEYS.get(key, key)] = value
+        return out
+
+    def _compact(
+        self, obj: Dict[str, Any], keys: Dict[str, str], user_key: str, cards: List[dict]
+    ) -> Dict[str, Any]:
+        out = {}
+        for key, value in obj.items():
+            if key == user_key and isinstance(value, dict):
+                value = self._user(value, cards)
+            out[keys.get(key, key)] = value
+        return out
+
+    def _user(self, card: Dict[str, Any], cards: List[dict]) -> Optional[int]:
+        user_id = card.get("id")
+        if user_id is not None and user_id not in self._users_sent:
+            self._users_sent.add(user_id)
+            cards.append(dict(card))
+        return user_id
+
+    # ---------------- incoming ----------------
+
+    def decode(self, bytes_data: bytes) -> Any:
+        """
+        Binary frame ya client (msgpack tu).
+        """
+        if not self.binary:
+            raise ValueError("binary frames need the msgpack subprotocol")
+        return msgpack.unpackb(bytes_data, raw=False)
@@ -0,0 +1,58 @@
+"""
+Database helpers za project.
+
+SQLite ya Django 4.2 haina OPTIONS za PRAGMA, kwa hiyo `configure_sqlite`
+inaunganishwa na signal `connection_created` (ApiConfig.ready) na kuweka:
+
+- journal_mode=WAL     : readers hawazuiwi na writer mmoja
+- synchronous=NORMAL   : fsync kwenye checkpoint tu (salama ukiwa na WAL)
+- mmap_size            : reads kupitia memory-mapped I/O
+- busy_timeout         : writer akikuta lock anasubiri badala ya
+                         "database is locked" papo hapo
+
+Databases nyingine (Postgres/MySQL) haziguswi.
+
+`bulk_create_with_pks` ni bulk_create inayohakikisha kila object ina pk
+baada ya INSERT – MySQL hairudishi pk za bulk insert.
+"""
+
+from typing import Iterable, List
+
+from django.conf import settings
+from django.db import connections, router
+
+
+def sqlite_pragmas() -> List[str]:
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+        f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+    ]
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != "sqlite" or not settings.SQLITE_PRAGMAS_ENABLED:
+        return
+    with connection.cursor() as cursor:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+
+
+def bulk_create_with_pks(model, objs: Iterable) -> List:
+    """
+    INSERT ya `objs` ambayo caller anaweza kutegemea `obj.pk` baadaye.
+
+    - backend inayorudisha rows kutoka bulk INSERT (SQLite 3.35+, Postgres,
+      MariaDB 10.5+) => bulk_create moja
+    - nyingine (MySQL) => INSERT moja kwa kila object; kila INSERT inarudisha
+      pk yake (lastrowid). Itumike ndani ya transaction ya caller ili
+      zote ziingie au zisiingie.
+    """
+    objs = list(objs)
+    using = router.db_for_write(model)
+    if connections[using].features.can_return_rows_from_bulk_insert:
+        return model._default_manager.using(using).bulk_create(objs)
+    for obj in objs:
+        obj.save(force_insert=True, using=using)
+    return objs
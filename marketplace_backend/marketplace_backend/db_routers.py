@@ -0,0 +1,64 @@
+"""
+Read-replica routing.
+
+Catalog (products/sellers/categories kwa list/nearby/search) inasomwa
+kutoka replica; kila kitu kingine – writes, chat, orders, auth – kinabaki
+primary ("default").
+
+Router haiamui yenyewe ni action gani: view inawasha `use_replica()` kwa
+muda wa request (api.views.ReplicaReadMixin). Nje ya block hiyo router
+inarudisha None (Django inatumia "default").
+
+settings.DATABASE_READ_REPLICA ni jina la alias ("" = replica imezimwa).
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+
+_replica_reads: ContextVar[bool] = ContextVar("db_replica_reads", default=False)
+
+# users/tokens/sessions: login au register mpya lazima ionekane mara moja
+PRIMARY_ONLY_APPS = {"auth", "contenttypes", "sessions", "admin", "token_blacklist"}
+
+
+def replica_alias() -> Optional[str]:
+    alias = settings.DATABASE_READ_REPLICA
+    if alias and alias in settings.DATABASES:
+        return alias
+    return None
+
+
+def replica_active() -> bool:
+    return _replica_reads.get() and replica_alias() is not None
+
+
+@contextmanager
+def use_replica():
+    token = _replica_reads.set(True)
+    try:
+        yield replica_alias()
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return None
+        if _replica_reads.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # primary na replica zina data ile ile
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replica inapata schema kwa replication / sync_replica, si migrate
+        return db == "default"